@@ -1,43 +1,97 @@
-from flask import Flask
-from flask_bcrypt import Bcrypt
+from flask import Flask, abort, render_template, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 
-from config import Config, TestingConfig
+from config import config_by_name
 
 db = SQLAlchemy()
 migrate = Migrate()
-bcrypt = Bcrypt()
 login_manager = LoginManager()
 
 
 def create_app(config_name="default"):
     app = Flask(__name__)
-    if config_name == 'testing':
-        app.config.from_object(TestingConfig)
+    if isinstance(config_name, str):
+        app.config.from_object(config_by_name[config_name])  # 'default', 'development', 'production' or 'testing'
     else:
-        # Load default or other configurations
-        app.config.from_object(Config)
+        app.config.from_object(config_name)  # A config class passed directly
+
+    if not app.config.get('SECRET_KEY'):
+        raise RuntimeError('SECRET_KEY must be set (e.g. in the environment) for this configuration.')
+
+    from app import db_pool
+    engine_options = db_pool.engine_options(app.config)
+    if engine_options is not None and not app.config.get('SQLALCHEMY_ENGINE_OPTIONS'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options  # Pool sizing and timeouts from the DB_* settings.
 
     db.init_app(app)
+    db_pool.init_app(app)  # Record connection checkouts, waits and overflow for /metrics.
     migrate.init_app(app, db)
-    bcrypt.init_app(app)  # Initialize Bcrypt with Flask app instance
     login_manager.init_app(app)
 
-    from app.routes import main_routes, auth_routes, post_routes, like_routes, profile_routes, comment_routes
+    from app.routes import main_routes, auth_routes, post_routes, like_routes, profile_routes, comment_routes, \
+        moderation_routes, metrics_routes
     app.register_blueprint(main_routes.main_bp)
     app.register_blueprint(auth_routes.auth_bp)
     app.register_blueprint(post_routes.post_bp)
     app.register_blueprint(comment_routes.comment_bp)
     app.register_blueprint(like_routes.like_bp)
     app.register_blueprint(profile_routes.profile_bp)
+    app.register_blueprint(moderation_routes.moderation_bp)
+    app.register_blueprint(metrics_routes.metrics_bp)
+
+    @app.before_request
+    def refuse_oversized_bodies():
+        limit = app.config.get('MAX_CONTENT_LENGTH')
+        if limit is not None and (request.content_length or 0) > limit:
+            abort(413)
+        # Refused here, before a view's error handling can turn Werkzeug's 413 into a 500.
+
+    @app.errorhandler(413)
+    def request_too_large(error):
+        limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+        return render_template('error.html', message=f"The upload is too large; the limit is {limit_mb} MB."), 413
+
+    from app.commands import register_commands
+    register_commands(app)  # Register `flask` CLI maintenance commands.
+
+    from app import search
+    search.init_app(app)  # Index posts and comments in the same transaction that writes them.
+
+    from app import passwords
+    passwords.init_app(app)  # Hash and check passwords in a bounded process pool instead of request threads.
+
+    from app import user_cache
+    user_cache.init_app(app)  # Cache users for the Flask-Login user loader; invalidated when a user row commits.
+
+    from app import sessions
+    sessions.init_app(app)  # Keep session data server-side; the cookie carries only a signed session id.
+
+    from app import moderation
+    moderation.init_app(app)  # Compile blocked terms once per process; recompiled when the term list changes.
+
+    from app import moderation_queue
+    moderation_queue.init_app(app)  # Queue new posts and comments for background scoring by the moderation classifier.
+
+    from app import avatars
+    avatars.init_app(app)  # Resize profile pictures in the background and give templates the `avatar_url` helper.
+
+    from app import assets
+    assets.init_app(app)  # Resolve url_for('static') to fingerprinted, precompressed files once they have been built.
+
+    if app.config.get('REACTION_WRITE_BEHIND'):
+        from app.reaction_buffer import ReactionBuffer
+        app.extensions['reaction_buffer'] = ReactionBuffer(
+            app,
+            interval_ms=app.config['REACTION_FLUSH_INTERVAL_MS'],
+            max_events=app.config['REACTION_FLUSH_MAX_EVENTS'],
+        ).start()  # Batch post reaction writes in a background thread; flushed again at shutdown.
 
     # Define the user loader function inside `create_app` to avoid circular import
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User  # Import User model here to avoid circular import
-        return User.query.get(int(user_id))  # Retrieve user from database by ID
+        return user_cache.load_user(int(user_id))  # Retrieve user from the per-process cache, or the database
 
     # Optional: Set the login view for redirecting unauthorized users
     login_manager.login_view = "auth.login"  # Change to your actual login route
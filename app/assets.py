@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+# Importing helpers for fingerprinting, compressing and describing the static files.
+
+from flask import current_app, request, send_from_directory
+# Importing the app context, the request (for Accept-Encoding) and the file sender used by the static view.
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are skipped without it; gzip is always written.
+    brotli = None
+# Importing the Brotli encoder for the smallest precompressed variants.
+
+
+MANIFEST_NAME = 'manifest.json'
+FINGERPRINT_LENGTH = 12  # Hex digits of the content hash added to each built filename.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60  # One year: fingerprinted names change whenever the content does.
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml', '.ico'}
+# Images such as WebP, PNG and JPEG are already compressed; re-compressing them only wastes bytes.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # Preferred first when the client accepts both.
+
+
+# -------------------------------
+# Building
+# -------------------------------
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{os.getpid()}.part"
+    with open(temp, 'wb') as handle:
+        handle.write(data)
+    os.replace(temp, path)
+    # Renamed into place, so a running server never serves a half-written file.
+
+
+def _fingerprinted(relative, data):
+    stem, ext = os.path.splitext(relative)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def _compress(data):
+    """Yield (encoding, suffix, payload) for each precompressed variant worth keeping."""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    for encoding, suffix in ENCODINGS:
+        payload = variants.get(encoding)
+        if payload is not None and len(payload) < len(data) * 0.9:
+            yield encoding, suffix, payload
+    # A variant that saves less than 10% is not worth the extra file.
+
+
+def build(static_folder, output='dist', exclude=(), clean=False):
+    """
+    Copy every file under `static_folder` to `output` under a content-hashed name, with
+    gzip (and Brotli, if installed) variants of the text files, and write a manifest.
+
+    Files from earlier builds are kept unless `clean`, so pages rendered by servers still
+    on the previous release keep loading. Returns counters for the command's summary.
+    """
+    target = os.path.join(static_folder, output)
+    if clean and os.path.isdir(target):
+        shutil.rmtree(target)
+
+    manifest = {}
+    stats = {'files': 0, 'compressed': 0, 'bytes': 0, 'smallest_bytes': 0}
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [name for name in dirs if name != output and name not in exclude]
+            # Built files are not rebuilt.
+        dirs.sort()
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as handle:
+                data = handle.read()
+
+            built = _fingerprinted(relative, data)
+            _write(os.path.join(target, built), data)
+            encodings = []
+            smallest = len(data)
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                for encoding, suffix, payload in _compress(data):
+                    _write(os.path.join(target, built + suffix), payload)
+                    encodings.append(encoding)
+                    smallest = min(smallest, len(payload))
+
+            manifest[relative] = {'path': f"{output}/{built}", 'encodings': encodings}
+            stats['files'] += 1
+            stats['compressed'] += bool(encodings)
+            stats['bytes'] += len(data)
+            stats['smallest_bytes'] += smallest
+
+    _write(os.path.join(target, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return stats
+
+
+# -------------------------------
+# Serving
+# -------------------------------
+class AssetManifest:
+    """The built manifest: source filename -> fingerprinted path, and which encodings exist for each."""
+
+    def __init__(self, entries):
+        self.paths = {source: entry['path'] for source, entry in entries.items()}
+        self.encodings = {entry['path']: entry['encodings'] for entry in entries.values()}
+
+    @classmethod
+    def load(cls, path):
+        """Return the manifest at `path`, or None if no build has been run."""
+        try:
+            with open(path, encoding='utf-8') as handle:
+                return cls(json.load(handle))
+        except FileNotFoundError:
+            return None
+
+    def __len__(self):
+        return len(self.paths)
+
+
+def _fingerprint_static_urls(endpoint, values):
+    """url_defaults hook: point url_for('static', filename=...) at the fingerprinted copy."""
+    if endpoint == 'static' and 'filename' in values:
+        manifest = current_app.extensions.get('assets')
+        if manifest is not None:
+            values['filename'] = manifest.paths.get(values['filename'], values['filename'])
+
+
+def _immutable(response):
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+def send_static(filename):
+    """
+    The static view: fingerprinted files are sent precompressed when the client accepts it,
+    with far-future immutable caching. Anything else falls back to Flask's static view.
+    """
+    manifest = current_app.extensions.get('assets')
+    encodings = manifest.encodings.get(filename) if manifest is not None else None
+    if encodings is None:
+        return current_app.send_static_file(filename)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ENCODINGS:
+        if encoding in encodings and request.accept_encodings.quality(encoding) > 0:
+            response = send_from_directory(current_app.static_folder, filename + suffix, mimetype=mimetype)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(current_app.static_folder, filename, mimetype=mimetype)
+    if encodings:
+        response.vary.add('Accept-Encoding')
+    return _immutable(response)
+
+
+def init_app(app):
+    """Serve fingerprinted static files if ASSET_FINGERPRINTS is on and `flask assets build` has been run."""
+    if not app.config.get('ASSET_FINGERPRINTS') or not app.static_folder:
+        return
+    manifest = AssetManifest.load(os.path.join(app.static_folder, app.config.get('ASSET_OUTPUT_DIR', 'dist'),
+                                               MANIFEST_NAME))
+    if manifest is None:
+        return
+    # Without a build, url_for('static') keeps returning the plain filenames.
+
+    app.extensions['assets'] = manifest
+    app.url_defaults(_fingerprint_static_urls)
+    app.view_functions['static'] = send_static
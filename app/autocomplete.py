@@ -0,0 +1,140 @@
+import threading
+import time
+from bisect import bisect_left
+# Importing the lock guarding the cached array, a monotonic clock for its TTL, and binary search.
+
+from flask import current_app
+# Importing the app context for reading the autocomplete settings and holding the per-process cache.
+
+from sqlalchemy import func, select
+# Importing SQL expression helpers for the indexed prefix query.
+
+from app import db
+from app.models import User
+
+
+# Importing the database instance and the user model.
+
+def normalize_prefix(raw):
+    """Lower-case a typed prefix, dropping surrounding whitespace and a leading '@' from mentions."""
+    return (raw or '').strip().lstrip('@').lower()[:150]
+
+
+# -------------------------------
+# In-process Username Cache
+# -------------------------------
+class UsernameIndex:
+    """
+    Every username in a sorted array, answering prefix queries with one binary search.
+
+    Keys are lower-cased usernames kept in step with a parallel array of display names.
+    The array is loaded lazily on first use and reloaded after `ttl` seconds, so changes
+    made by other worker processes show up within that window; changes made by this
+    process are applied immediately through `add`, `remove` and `rename`.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = []  # Sorted (lower-cased username, username) pairs.
+        self._loaded_at = None
+
+    def _stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def refresh(self):
+        """Reload every username from the database with one query."""
+        entries = sorted((name.lower(), name) for name in db.session.scalars(select(User.username)))
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+
+    def complete(self, prefix, limit=10):
+        """Return up to `limit` usernames starting with `prefix` (already normalized), alphabetically."""
+        if self._stale():
+            self.refresh()
+        with self._lock:
+            start = bisect_left(self._entries, (prefix,))
+            matches = []
+            for key, name in self._entries[start:start + limit]:
+                if not key.startswith(prefix):
+                    break
+                matches.append(name)
+            return matches
+
+    def add(self, username):
+        with self._lock:
+            entry = (username.lower(), username)
+            position = bisect_left(self._entries, entry)
+            if position == len(self._entries) or self._entries[position] != entry:
+                self._entries.insert(position, entry)
+
+    def remove(self, username):
+        with self._lock:
+            entry = (username.lower(), username)
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def rename(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_index():
+    """Return this process's UsernameIndex, or None if the cache is disabled."""
+    if not current_app.config.get('USERNAME_CACHE_ENABLED'):
+        return None
+    index = current_app.extensions.get('username_index')
+    if index is None:
+        index = current_app.extensions.setdefault(
+            'username_index', UsernameIndex(ttl=current_app.config.get('USERNAME_CACHE_TTL', 300))
+        )
+    return index
+
+
+# -------------------------------
+# Lookups
+# -------------------------------
+def query_usernames(prefix, limit=10):
+    """Return up to `limit` usernames starting with `prefix`, read from the database."""
+    pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    # Escape LIKE wildcards so '_' in a username prefix matches literally.
+    return db.session.scalars(
+        select(User.username)
+        .where(func.lower(User.username).like(pattern, escape='\\'))
+        .order_by(func.lower(User.username), User.username)
+        .limit(limit)
+    ).all()
+    # A range scan on ix_user_username_lower that stops after `limit` rows.
+
+
+def complete_usernames(raw_prefix, limit=10):
+    """Return up to `limit` usernames starting with `raw_prefix`, case-insensitively, alphabetically."""
+    prefix = normalize_prefix(raw_prefix)
+    if not prefix:
+        return []
+    index = get_index()
+    if index is not None:
+        return index.complete(prefix, limit)
+    return query_usernames(prefix, limit)
+
+
+# -------------------------------
+# Cache Maintenance
+# -------------------------------
+def on_username_added(username):
+    """Add a newly registered username to this process's cache. Call after the commit."""
+    index = get_index()
+    if index is not None:
+        index.add(username)
+
+
+def on_username_changed(old, new):
+    """Replace a renamed user's entry in this process's cache. Call after the commit."""
+    index = get_index()
+    if index is not None and old != new:
+        index.rename(old, new)
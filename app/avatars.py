@@ -0,0 +1,323 @@
+import atexit
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+# Importing helpers for hashing and writing uploads, the background pool and its counters.
+
+from flask import current_app, url_for, send_from_directory
+# Importing the app context for settings and the per-process processor, url_for for the template helper
+# and the file sender used by the variant view.
+
+from sqlalchemy import update
+# Importing the UPDATE construct used to point a user at their new picture.
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is only needed where pictures are processed.
+    Image = ImageOps = None
+# Importing Pillow for decoding and resizing; without it uploads are refused and existing pictures still render.
+
+from app import db, user_cache
+from app.assets import IMMUTABLE_MAX_AGE
+from app.models import User
+
+
+# Importing the database instance, the user cache (invalidated when a picture changes), the far-future
+# cache lifetime shared with fingerprinted static files and the user model.
+
+CHUNK_SIZE = 64 * 1024  # Bytes read from the upload stream at a time.
+KEY_LENGTH = 32  # Hex digits of the content hash used in filenames and stored in User.profile_picture.
+FORMATS = {'webp': ('WEBP', {'quality': 80, 'method': 4}),
+           'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True})}
+# Every size is written in each of these formats; templates use WebP, JPEG is the fallback for other clients.
+
+_MAGIC = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n')  # JPEG and PNG signatures, matching the form's allowed extensions.
+_KEY = re.compile(rf'^[0-9a-f]{{{KEY_LENGTH}}}$')
+
+
+class AvatarRejected(ValueError):
+    """Raised for uploads that are too large or are not JPEG/PNG images."""
+
+
+def enabled():
+    """Return True if Pillow is installed, so uploads can be processed."""
+    return Image is not None
+
+
+def _upload_dir():
+    return current_app.config.get('AVATAR_UPLOAD_DIR') or os.path.join(current_app.instance_path, 'avatar_uploads')
+
+
+def _variant_dir():
+    return current_app.config.get('AVATAR_DIR') or os.path.join(current_app.instance_path, 'avatars')
+
+
+def _variant_name(key, size, ext):
+    return f"{key}-{size}.{ext}"
+
+
+# -------------------------------
+# Uploading
+# -------------------------------
+def save_upload(file_storage):
+    """
+    Stream an uploaded picture to disk and return its content key. Raises AvatarRejected for bad uploads.
+
+    The upload is read in CHUNK_SIZE pieces and hashed as it is written, so it is never
+    held in memory whole. Only the image header is read on the request path (to check the
+    format and pixel count); decoding and resizing happen in the background. Identical
+    uploads share one stored original.
+    """
+    limit = current_app.config.get('AVATAR_MAX_UPLOAD_BYTES', 5 * 1024 * 1024)
+    directory = _upload_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.part', delete=False) as temp:
+        try:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0 and not chunk.startswith(_MAGIC):
+                    raise AvatarRejected('Only JPEG and PNG images can be used as a profile picture.')
+                size += len(chunk)
+                if size > limit:
+                    raise AvatarRejected(f'Profile pictures must be smaller than {limit // (1024 * 1024)} MB.')
+                digest.update(chunk)
+                temp.write(chunk)
+            if size == 0:
+                raise AvatarRejected('The uploaded picture is empty.')
+        except BaseException:
+            temp.close()
+            os.unlink(temp.name)
+            raise
+
+    key = digest.hexdigest()[:KEY_LENGTH]
+    original = os.path.join(directory, key)
+    if os.path.exists(original):
+        os.unlink(temp.name)
+        # Seen (and checked) before.
+    else:
+        try:
+            _check_header(temp.name)
+        except BaseException:
+            os.unlink(temp.name)
+            raise
+        os.replace(temp.name, original)
+    return key
+
+
+def _check_header(path):
+    """Reject files Pillow cannot identify or that are too large to decode. Reads the header only."""
+    if Image is None:
+        raise AvatarRejected('Profile picture uploads are not available right now.')
+    try:
+        with Image.open(path) as image:
+            fmt, (width, height) = image.format, image.size
+    except Exception:
+        raise AvatarRejected('The uploaded file is not a readable image.') from None
+    if fmt not in ('JPEG', 'PNG'):
+        raise AvatarRejected('Only JPEG and PNG images can be used as a profile picture.')
+    if width * height > current_app.config.get('AVATAR_MAX_PIXELS', 40_000_000):
+        raise AvatarRejected('The uploaded picture has too many pixels.')
+
+
+# -------------------------------
+# Processing
+# -------------------------------
+def variants_exist(key):
+    directory = _variant_dir()
+    return all(
+        os.path.exists(os.path.join(directory, _variant_name(key, size, ext)))
+        for size in current_app.config.get('AVATAR_SIZES', (48, 96, 256)) for ext in FORMATS
+    )
+
+
+def render_variants(key):
+    """Decode the stored original once and write every size/format variant. Returns the number of files written."""
+    if Image is None:
+        raise RuntimeError('Pillow is required to process profile pictures.')
+
+    sizes = sorted(current_app.config.get('AVATAR_SIZES', (48, 96, 256)), reverse=True)
+    directory = _variant_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    with Image.open(os.path.join(_upload_dir(), key)) as image:
+        image.draft('RGB', (sizes[0] * 2, sizes[0] * 2))
+        # JPEGs are decoded at a reduced scale when that is still larger than the biggest variant.
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        written = 0
+        for size in sizes:
+            image = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            # Each size is cropped to a square and scaled from the previous, larger one.
+            for ext, (fmt, options) in FORMATS.items():
+                path = os.path.join(directory, _variant_name(key, size, ext))
+                if os.path.exists(path):
+                    continue
+                frame = image.convert('RGB') if fmt == 'JPEG' else image
+                temp = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+                frame.save(temp, fmt, **options)
+                os.replace(temp, path)
+                # Written under a temporary name and renamed, so a half-written file is never served.
+                written += 1
+    return written
+
+
+def _assign(user_id, key):
+    """Point the user at a processed picture and drop them from the user cache on commit."""
+    db.session.execute(update(User).where(User.id == user_id).values(profile_picture=key))
+    user_cache.mark_changed([user_id])
+    db.session.commit()
+
+
+class AvatarProcessor:
+    """
+    Resizes uploaded pictures in background threads (Pillow releases the GIL while it
+    decodes, resizes and encodes), then points the user at the new variants.
+
+    A user keeps their previous picture until processing finishes. If they upload again
+    in the meantime, only the newest upload is assigned. With `workers=0` processing runs
+    inline (used under TestingConfig). Use `stats()` to read throughput counters.
+    """
+
+    def __init__(self, app, workers=2):
+        self.app = app
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='avatars') if workers > 0 else None
+        self._lock = threading.Lock()
+        self._latest = {}  # user_id -> key of their newest upload still being processed
+        self._stats = {'submitted': 0, 'processed': 0, 'reused': 0, 'failed': 0, 'last_ms': 0.0, 'max_ms': 0.0}
+        if self._pool is not None:
+            atexit.register(self.shutdown)
+
+    def submit(self, user_id, key):
+        """Process `key` and then assign it to `user_id`. Returns a Future (or None when run inline)."""
+        with self._lock:
+            self._latest[user_id] = key
+            self._stats['submitted'] += 1
+        if self._pool is None:
+            self._process(user_id, key)
+            return None
+        return self._pool.submit(self._process, user_id, key)
+
+    def _process(self, user_id, key):
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                reused = variants_exist(key)
+                # Another user (or an earlier upload) with the same picture may already have paid for the variants.
+                if not reused:
+                    render_variants(key)
+
+                with self._lock:
+                    current = self._latest.get(user_id) == key
+                    if current:
+                        del self._latest[user_id]
+                if current:
+                    _assign(user_id, key)
+        except Exception as e:
+            self.app.logger.error(f"Error processing profile picture {key} for user {user_id}: {e}")
+            with self._lock:
+                if self._latest.get(user_id) == key:
+                    del self._latest[user_id]
+                self._stats['failed'] += 1
+            return False
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats['reused' if reused else 'processed'] += 1
+            self._stats['last_ms'] = elapsed_ms
+            self._stats['max_ms'] = max(self._stats['max_ms'], elapsed_ms)
+        return True
+
+    def shutdown(self):
+        """Finish queued pictures and stop the worker threads."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    # -------------------------------
+    # Metrics
+    # -------------------------------
+    def stats(self):
+        """Return processing counters and latencies (in ms) for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._latest)
+        stats['workers'] = self.workers
+        return stats
+
+
+def get_processor():
+    """Return the current app's AvatarProcessor."""
+    return current_app.extensions['avatars']
+
+
+# -------------------------------
+# Template Helper
+# -------------------------------
+def avatar_url(picture, size=96, ext='webp'):
+    """
+    Return the URL of the smallest stored variant of `picture` at least `size` pixels wide.
+
+    `picture` is a User.profile_picture value. Pictures stored before processing
+    existed (plain paths or URLs) are returned unchanged, and users without one get
+    the default picture.
+    """
+    if not picture:
+        return url_for('static', filename='img/default_profile.webp')
+    if not _KEY.match(picture):
+        return picture
+
+    sizes = sorted(current_app.config.get('AVATAR_SIZES', (48, 96, 256)))
+    chosen = next((candidate for candidate in sizes if candidate >= size), sizes[-1])
+    return url_for('avatar', filename=_variant_name(picture, chosen, ext))
+
+
+def send_variant(filename):
+    """The avatar view: serve a resized picture from AVATAR_DIR with far-future immutable caching."""
+    response = send_from_directory(_variant_dir(), filename)
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+    # Content-hashed names never change meaning, so these files can be cached indefinitely.
+
+
+def init_app(app):
+    """Create this process's picture processor, the /avatars view and the `avatar_url` template helper."""
+    app.extensions['avatars'] = AvatarProcessor(app, workers=app.config.get('AVATAR_WORKERS', 2))
+    app.add_url_rule('/avatars/<path:filename>', 'avatar', send_variant)
+    app.add_template_global(avatar_url)
+
+
+# -------------------------------
+# Maintenance
+# -------------------------------
+def reprocess(force=False):
+    """
+    Render the variants of every user's stored picture, e.g. after changing AVATAR_SIZES.
+
+    Only missing files are written unless `force`. Returns the number of pictures rendered.
+    """
+    keys = {key for (key,) in db.session.query(User.profile_picture).filter(User.profile_picture.isnot(None))
+            if _KEY.match(key)}
+    rendered = 0
+    for key in sorted(keys):
+        if force:
+            for size in current_app.config.get('AVATAR_SIZES', (48, 96, 256)):
+                for ext in FORMATS:
+                    path = os.path.join(_variant_dir(), _variant_name(key, size, ext))
+                    if os.path.exists(path):
+                        os.unlink(path)
+        if force or not variants_exist(key):
+            render_variants(key)
+            rendered += 1
+    return rendered
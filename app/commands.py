@@ -0,0 +1,254 @@
+import click
+# Importing click for defining command-line options.
+
+from flask.cli import AppGroup
+# Importing AppGroup to group related `flask` CLI commands under one name.
+
+counters_cli = AppGroup('counters', help='Maintain cached post and follow counters.')
+# Command group for `flask counters ...`.
+
+ranking_cli = AppGroup('ranking', help='Maintain precomputed explore rankings.')
+# Command group for `flask ranking ...`.
+
+reactions_cli = AppGroup('reactions', help='Maintain the reactions table.')
+# Command group for `flask reactions ...`.
+
+suggestions_cli = AppGroup('suggestions', help='Maintain precomputed follow suggestions.')
+# Command group for `flask suggestions ...`.
+
+search_cli = AppGroup('search', help='Maintain the full-text search index.')
+# Command group for `flask search ...`.
+
+tags_cli = AppGroup('tags', help='Maintain the normalized tag index.')
+# Command group for `flask tags ...`.
+
+passwords_cli = AppGroup('passwords', help='Tune password hashing.')
+# Command group for `flask passwords ...`.
+
+sessions_cli = AppGroup('sessions', help='Maintain server-side sessions.')
+# Command group for `flask sessions ...`.
+
+moderation_cli = AppGroup('moderation', help='Manage blocked terms and re-scan content.')
+# Command group for `flask moderation ...`.
+
+avatars_cli = AppGroup('avatars', help='Maintain resized profile pictures.')
+# Command group for `flask avatars ...`.
+
+assets_cli = AppGroup('assets', help='Build fingerprinted, precompressed static files.')
+# Command group for `flask assets ...`.
+
+
+@counters_cli.command('repair')
+@click.option('--batch-size', default=500, show_default=True, help='Posts recomputed per transaction.')
+def repair_counters(batch_size):
+    """Recompute like, dislike and comment counters for every post."""
+    from app.counters import repair_post_counters
+    processed = repair_post_counters(batch_size=batch_size)
+    click.echo(f"Recomputed counters for {processed} posts.")
+
+
+@counters_cli.command('repair-follows')
+@click.option('--batch-size', default=500, show_default=True, help='Users recomputed per transaction.')
+def repair_follows(batch_size):
+    """Recompute follower and following counters for every user."""
+    from app.follows import repair_follow_counts
+    processed = repair_follow_counts(batch_size=batch_size)
+    click.echo(f"Recomputed follow counters for {processed} users.")
+
+
+@ranking_cli.command('refresh')
+@click.option('--batch-size', default=500, show_default=True, help='Posts rescored per transaction.')
+def refresh_ranking(batch_size):
+    """Rescore posts whose reactions changed since the last run (schedule this periodically)."""
+    from app.ranking import refresh_scores
+    refreshed = refresh_scores(batch_size=batch_size)
+    click.echo(f"Rescored {refreshed} posts.")
+
+
+@reactions_cli.command('migrate')
+@click.option('--batch-size', default=1000, show_default=True, help='Legacy rows copied per transaction.')
+@click.option('--drop', is_flag=True, help='Drop each legacy table once its rows are copied.')
+def migrate_reactions(batch_size, drop):
+    """Copy likes/dislikes from post_likes, post_dislikes and comment_likes into the reactions table."""
+    from app.counters import repair_post_counters
+    from app.reactions import migrate_legacy_reactions
+    copied = migrate_legacy_reactions(batch_size=batch_size, drop=drop)
+    click.echo(f"Copied {copied} reactions.")
+    processed = repair_post_counters()
+    click.echo(f"Recomputed counters for {processed} posts.")
+
+
+@suggestions_cli.command('build')
+@click.option('--shard-size', default=500, show_default=True, help='Users rebuilt per shard and transaction.')
+@click.option('--workers', default=1, show_default=True, help='Worker processes; 1 runs in-process.')
+def build_suggestions(shard_size, workers):
+    """Rebuild every user's "people you may know" list (schedule this periodically)."""
+    import os
+    from flask import current_app
+    from app.suggestions import build_suggestions as build
+    config_name = 'testing' if current_app.config.get('TESTING') else os.environ.get('FLASK_CONFIG', 'default')
+    # Worker processes build their own app, so they need the same profile as this one.
+    processed = build(shard_size=shard_size, workers=workers, config_name=config_name)
+    click.echo(f"Rebuilt suggestions for {processed} users.")
+
+
+@search_cli.command('reindex')
+@click.option('--batch-size', default=500, show_default=True, help='Posts or comments indexed per transaction.')
+def reindex_search(batch_size):
+    """Rebuild the search index for every post and comment."""
+    from app.search import reindex
+    written = reindex(batch_size=batch_size)
+    click.echo(f"Indexed {written} posts and comments.")
+
+
+@tags_cli.command('backfill')
+@click.option('--batch-size', default=500, show_default=True, help='Posts tagged per transaction.')
+def backfill_tags(batch_size):
+    """Build post_tags from the existing free-form Post.tags strings."""
+    from app.tags import backfill_tags as backfill, repair_tag_counts
+    tagged = backfill(batch_size=batch_size)
+    click.echo(f"Tagged {tagged} posts.")
+    repaired = repair_tag_counts()
+    click.echo(f"Recomputed counts for {repaired} tags.")
+
+
+@passwords_cli.command('benchmark')
+@click.option('--min-rounds', default=10, show_default=True, help='Lowest bcrypt cost factor to time.')
+@click.option('--max-rounds', default=14, show_default=True, help='Highest bcrypt cost factor to time.')
+@click.option('--samples', default=3, show_default=True, help='Hashes timed per cost factor.')
+def benchmark_passwords(min_rounds, max_rounds, samples):
+    """Time one bcrypt hash per cost factor on this machine, to pick BCRYPT_LOG_ROUNDS."""
+    from flask import current_app
+    from app.passwords import benchmark
+    configured = current_app.config.get('BCRYPT_LOG_ROUNDS')
+    for rounds, ms in benchmark(range(min_rounds, max_rounds + 1), samples=samples).items():
+        marker = '  (configured)' if rounds == configured else ''
+        click.echo(f"rounds={rounds}: {ms:.1f} ms{marker}")
+
+
+@sessions_cli.command('cleanup')
+@click.option('--batch-size', default=1000, show_default=True, help='Expired sessions deleted per transaction.')
+def cleanup_sessions(batch_size):
+    """Delete expired server-side sessions (schedule this periodically)."""
+    from flask import current_app
+    from app.sessions import ServerSessionInterface
+    interface = current_app.session_interface
+    if not isinstance(interface, ServerSessionInterface):
+        click.echo("Sessions are stored in cookies; nothing to clean up.")
+        return
+    deleted = interface.store.cleanup(batch_size=batch_size)
+    click.echo(f"Deleted {deleted} expired sessions.")
+
+
+@moderation_cli.command('add')
+@click.argument('terms', nargs=-1, required=True)
+@click.option('--substring', is_flag=True, help='Also match inside longer words.')
+def add_blocked_terms(terms, substring):
+    """Block TERMS in new posts and comments."""
+    from app import db
+    from app.moderation import add_terms
+    added = add_terms(terms, whole_word=not substring)
+    db.session.commit()
+    click.echo(f"Added {added} blocked terms.")
+
+
+@moderation_cli.command('remove')
+@click.argument('terms', nargs=-1, required=True)
+def remove_blocked_terms(terms):
+    """Stop blocking TERMS."""
+    from app import db
+    from app.moderation import remove_terms
+    removed = remove_terms(terms)
+    db.session.commit()
+    click.echo(f"Removed {removed} blocked terms.")
+
+
+@moderation_cli.command('rescan')
+@click.option('--batch-size', default=500, show_default=True, help='Posts or comments scanned per transaction.')
+def rescan_content(batch_size):
+    """Flag existing posts and comments that contain a blocked term."""
+    from app.moderation import rescan
+    for kind, (scanned, flagged) in rescan(batch_size=batch_size).items():
+        click.echo(f"Scanned {scanned} {kind}, flagged {flagged}.")
+
+
+@moderation_cli.command('work')
+@click.option('--workers', default=2, show_default=True, help='Worker threads scoring jobs.')
+@click.option('--batch-size', default=None, type=int, help='Jobs claimed per batch (defaults to MODERATION_BATCH_SIZE).')
+@click.option('--once', is_flag=True, help='Drain the jobs that are due now and exit.')
+def work_moderation(workers, batch_size, once):
+    """Score queued posts and comments with the moderation classifier."""
+    import time
+    from flask import current_app
+    from app.moderation_queue import ModerationWorkerPool
+    pool = ModerationWorkerPool(
+        current_app._get_current_object(),
+        workers=workers,
+        poll_interval=current_app.config.get('MODERATION_POLL_SECONDS', 2.0),
+        batch_size=batch_size or current_app.config.get('MODERATION_BATCH_SIZE', 50),
+    )
+    if once:
+        while pool.run_batch():
+            pass
+    else:
+        click.echo(f"Scoring moderation jobs with {workers} workers; press Ctrl+C to stop.")
+        pool.start()
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pool.stop()
+    stats = pool.stats()
+    click.echo(f"Processed {stats['processed']} jobs, flagged {stats['flagged']}.")
+
+
+@moderation_cli.command('reviewer')
+@click.argument('username')
+@click.option('--revoke', is_flag=True, help='Take the reviewer role away instead.')
+def set_reviewer(username, revoke):
+    """Let USERNAME work the moderation review queue."""
+    from app import db
+    from app.models import User
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"No user named {username!r}.")
+    user.is_moderator = not revoke
+    db.session.commit()
+    click.echo(f"{username} {'can no longer' if revoke else 'can now'} review flagged content.")
+
+
+@avatars_cli.command('reprocess')
+@click.option('--force', is_flag=True, help='Rewrite variants that already exist.')
+def reprocess_avatars(force):
+    """Render missing profile picture variants (run after changing AVATAR_SIZES)."""
+    from app.avatars import reprocess
+    rendered = reprocess(force=force)
+    click.echo(f"Rendered variants for {rendered} pictures.")
+
+
+@assets_cli.command('build')
+@click.option('--clean', is_flag=True, help='Delete earlier builds first (pages from older releases lose their assets).')
+def build_assets(clean):
+    """Hash every static file, write gzip/Brotli variants and the manifest (run on each deploy)."""
+    from flask import current_app
+    from app.assets import build, brotli
+    stats = build(current_app.static_folder, output=current_app.config.get('ASSET_OUTPUT_DIR', 'dist'), clean=clean)
+    click.echo(f"Built {stats['files']} files ({stats['compressed']} precompressed): "
+               f"{stats['bytes']} bytes, {stats['smallest_bytes']} bytes as sent to capable clients.")
+    if brotli is None:
+        click.echo("Brotli is not installed; only gzip variants were written.")
+
+
+def register_commands(app):
+    """Register all CLI command groups with the Flask app."""
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(ranking_cli)
+    app.cli.add_command(reactions_cli)
+    app.cli.add_command(suggestions_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(tags_cli)
+    app.cli.add_command(passwords_cli)
+    app.cli.add_command(sessions_cli)
+    app.cli.add_command(moderation_cli)
+    app.cli.add_command(avatars_cli)
+    app.cli.add_command(assets_cli)
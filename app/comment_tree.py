@@ -0,0 +1,154 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+# Importing dataclass helpers for the in-memory comment tree nodes.
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import aliased
+# Importing SQL expression helpers for building the recursive CTE and counting direct replies.
+
+from app import db
+from app.models import Comment, User
+from app.pagination import paginate_keyset
+
+
+# Importing the database instance, the models read by the loader and the keyset pagination helper.
+
+# -------------------------------
+# Comment Tree Node
+# -------------------------------
+@dataclass
+class CommentNode:
+    """One comment and its loaded replies, ready for `post_detail.html` to render without queries."""
+    id: int
+    content: str
+    date_posted: datetime
+    author_id: int
+    author_username: str
+    parent_comment_id: int | None
+    depth: int
+    reply_count: int = 0
+    replies: list = field(default_factory=list)
+
+    @property
+    def has_more_replies(self):
+        """True if some direct replies were left out by the depth or size limits."""
+        return self.reply_count > len(self.replies)
+
+    def to_dict(self, liked_ids=()):
+        """Serialize this node and its loaded replies for the JSON comments endpoint."""
+        return {
+            'id': self.id,
+            'content': self.content,
+            'date_posted': self.date_posted.strftime('%B %d, %Y %I:%M %p'),
+            'author_username': self.author_username,
+            'parent_comment_id': self.parent_comment_id,
+            'reply_count': self.reply_count,
+            'has_more_replies': self.has_more_replies,
+            'liked': self.id in liked_ids,
+            'replies': [reply.to_dict(liked_ids) for reply in self.replies],
+        }
+
+
+# -------------------------------
+# Loader
+# -------------------------------
+def load_comment_tree(post_id, root_ids=None, max_depth=None, max_nodes=None):
+    """
+    Load a post's comment thread with one recursive CTE and return its top-level nodes.
+
+    `root_ids` restricts the thread to the subtrees under those comments (default: every
+    top-level comment). `max_depth` caps how many reply levels are followed and `max_nodes`
+    caps the total number of comments returned. Rows come back breadth-first, so a
+    truncated thread never contains a reply without its parent.
+    """
+    anchor = select(
+        Comment.id, Comment.parent_comment_id, literal(0).label('depth')
+    ).where(Comment.post_id == post_id)
+    if root_ids is None:
+        anchor = anchor.where(Comment.parent_comment_id.is_(None))
+    else:
+        anchor = anchor.where(Comment.id.in_(root_ids))
+
+    tree = anchor.cte('comment_tree', recursive=True)
+    replies = select(
+        Comment.id, Comment.parent_comment_id, (tree.c.depth + 1).label('depth')
+    ).join(tree, Comment.parent_comment_id == tree.c.id)
+    if max_depth is not None:
+        replies = replies.where(tree.c.depth < max_depth)
+    tree = tree.union_all(replies)
+    # Walk from the roots down through `parent_comment_id`, one level per recursion step.
+
+    reply = aliased(Comment)
+    reply_count = select(func.count()).where(reply.parent_comment_id == Comment.id).scalar_subquery()
+    # Direct reply counts let the page offer "show replies" for branches cut off by the limits.
+
+    query = (
+        select(
+            Comment.id, Comment.content, Comment.date_posted, Comment.author_id,
+            Comment.parent_comment_id, tree.c.depth, User.username, reply_count.label('reply_count'),
+        )
+        .join(tree, tree.c.id == Comment.id)
+        .join(User, User.id == Comment.author_id)
+        .order_by(tree.c.depth, Comment.date_posted, Comment.id)
+    )
+    # Authors are joined into the same statement, so the whole thread costs one round trip.
+    if max_nodes is not None:
+        query = query.limit(max_nodes)
+
+    return build_tree(db.session.execute(query))
+
+
+def load_comment_page(post_id, parent_id=None, after=None, per_page=20, max_depth=None, max_nodes=None):
+    """
+    Load one page of a post's comments, oldest first, with a bounded slice of their replies.
+
+    Pages are taken over the top-level comments (or over the direct replies of `parent_id`)
+    with a keyset cursor, then each page's subtrees are loaded with `load_comment_tree`.
+    Returns (nodes, next_cursor).
+    """
+    siblings = Comment.query.with_entities(Comment.id, Comment.date_posted).filter(Comment.post_id == post_id)
+    if parent_id is None:
+        siblings = siblings.filter(Comment.parent_comment_id.is_(None))
+    else:
+        siblings = siblings.filter(Comment.parent_comment_id == parent_id)
+
+    page, next_cursor = paginate_keyset(
+        siblings, Comment.date_posted, Comment.id, after=after, per_page=per_page, ascending=True
+    )
+    if not page:
+        return [], None
+
+    nodes = load_comment_tree(post_id, root_ids=[row.id for row in page], max_depth=max_depth, max_nodes=max_nodes)
+    return nodes, next_cursor
+
+
+def build_tree(rows):
+    """Assemble breadth-first (id, ..., depth, username, reply_count) rows into nested CommentNodes."""
+    nodes = {}
+    roots = []
+    for row in rows:
+        node = CommentNode(
+            id=row.id,
+            content=row.content,
+            date_posted=row.date_posted,
+            author_id=row.author_id,
+            author_username=row.username,
+            parent_comment_id=row.parent_comment_id,
+            depth=row.depth,
+            reply_count=row.reply_count,
+        )
+        nodes[node.id] = node
+
+        parent = nodes.get(node.parent_comment_id) if node.depth else None
+        if parent is not None:
+            parent.replies.append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+def iter_tree(nodes):
+    """Yield every node in `nodes` and their replies, depth-first."""
+    for node in nodes:
+        yield node
+        yield from iter_tree(node.replies)
@@ -0,0 +1,85 @@
+from sqlalchemy import func, select, update
+# Importing SQL expression helpers for atomic counter updates and bulk recomputation.
+
+from app import db
+from app.models import Post, Reaction, Comment
+
+
+# Importing the database instance and the models whose rows are counted.
+
+# Maps each reaction kind to the `adjust_post_counters` argument for its cached Post counter.
+REACTION_COUNTERS = {
+    Reaction.LIKE: 'likes',
+    Reaction.DISLIKE: 'dislikes',
+}
+
+
+def adjust_post_counters(post_id, likes=0, dislikes=0, comments=0):
+    """
+    Atomically add the given deltas to a post's cached counters.
+
+    The UPDATE runs in the caller's transaction, so the counters commit (or roll back)
+    together with the reaction or comment rows that changed them. Returns the post's
+    new (like_count, dislike_count, comment_count), or None if there was nothing to change.
+    """
+    post = Post.__table__
+    values = {}
+    if likes:
+        values['like_count'] = post.c.like_count + likes
+    if dislikes:
+        values['dislike_count'] = post.c.dislike_count + dislikes
+    if comments:
+        values['comment_count'] = post.c.comment_count + comments
+    if not values:
+        return None
+    values['score_dirty'] = True
+    # Flag the post so the ranking job rescores it on its next run.
+
+    return db.session.execute(
+        update(post).where(post.c.id == post_id).values(values)
+        .returning(post.c.like_count, post.c.dislike_count, post.c.comment_count)
+    ).first()
+    # Incrementing in SQL (rather than read-modify-write in Python) keeps concurrent clicks from losing updates,
+    # and RETURNING hands back the new totals without another SELECT. A Core UPDATE leaves the ORM identity
+    # map alone; loaded Post objects pick up the new values once the commit expires them.
+
+
+def _count_reactions(kind):
+    """Correlated subquery counting a post's reactions of one kind (a range scan on the reactions primary key)."""
+    return select(func.count()).where(
+        Reaction.target_type == Reaction.POST, Reaction.target_id == Post.id, Reaction.kind == kind
+    ).scalar_subquery()
+
+
+def repair_post_counters(batch_size=500):
+    """
+    Recompute every post's cached counters from the underlying tables.
+
+    Posts are processed in id ranges of `batch_size`, each range in its own short
+    transaction with one UPDATE. Returns the number of posts processed.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        ids = db.session.scalars(
+            select(Post.id).where(Post.id > last_id).order_by(Post.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        db.session.execute(
+            update(Post)
+            .where(Post.id.between(ids[0], ids[-1]))
+            .values(
+                like_count=_count_reactions(Reaction.LIKE),
+                dislike_count=_count_reactions(Reaction.DISLIKE),
+                comment_count=select(func.count()).where(Comment.post_id == Post.id).scalar_subquery(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        processed += len(ids)
+        last_id = ids[-1]
+
+    return processed
@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import deque
+# Importing the lock, clock and sample buffer behind the pool metrics.
+
+from flask import current_app
+# Importing the app context for reaching the per-process pool stats.
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+# Importing pool events, the pool timeout error, URL parsing and the pool classes chosen by the DB_* settings.
+
+from app import db
+
+
+# Importing the database instance whose engine is instrumented.
+
+WAIT_SAMPLES = 1000  # Recent checkout waits kept for the percentile metrics.
+
+
+# -------------------------------
+# Instrumented Pool
+# -------------------------------
+class PoolStats:
+    """Counters for one connection pool: checkouts, time spent waiting for a connection, overflow and timeouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._stats = {
+            'checkouts': 0,
+            'checkins': 0,
+            'connects': 0,
+            'invalidations': 0,
+            'timeouts': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+            'max_checked_out': 0,
+            'max_overflow_used': 0,
+        }
+
+    def record_wait(self, wait_ms, pool):
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['total_wait_ms'] += wait_ms
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+            self._waits.append(wait_ms)
+            if isinstance(pool, QueuePool):
+                self._stats['max_checked_out'] = max(self._stats['max_checked_out'], pool.checkedout())
+                self._stats['max_overflow_used'] = max(self._stats['max_overflow_used'], pool.overflow())
+                # High-water marks: the numbers to compare against DB_POOL_SIZE and DB_MAX_OVERFLOW.
+
+    def increment(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def snapshot(self, pool):
+        """Return the counters plus live gauges read from `pool`."""
+        with self._lock:
+            stats = dict(self._stats)
+            waits = sorted(self._waits)
+        stats['avg_wait_ms'] = stats['total_wait_ms'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        for percentile in (50, 95, 99):
+            stats[f'wait_p{percentile}_ms'] = waits[min(len(waits) - 1, len(waits) * percentile // 100)] if waits else 0.0
+
+        stats['pool_class'] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            stats['pool_size'] = pool.size()
+            stats['checked_out'] = pool.checkedout()
+            stats['checked_in'] = pool.checkedin()
+            stats['overflow'] = pool.overflow()
+            # overflow() is negative while the pool has not yet opened pool_size connections.
+        return stats
+
+
+class _TimedPoolMixin:
+    """Times every checkout, including the wait for a free connection, and counts timeouts."""
+
+    stats = None  # PoolStats, attached by `init_app`.
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.increment('timeouts')
+            raise
+        if self.stats is not None:
+            self.stats.record_wait((time.perf_counter() - started) * 1000, self)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+        # Keep counting after the engine replaces the pool (e.g. after a disconnect).
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """QueuePool that records checkout waits."""
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    """NullPool (for PgBouncer) that records how long opening each connection takes."""
+
+
+# -------------------------------
+# Engine Options
+# -------------------------------
+def engine_options(config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings, or return None if they are not set.
+
+    With DB_PGBOUNCER the app keeps no connections of its own (PgBouncer does the pooling)
+    and the statement timeout is set per transaction, which works in transaction pooling
+    mode; otherwise the timeout is a connection startup option.
+    """
+    if config.get('DB_POOL_SIZE') is None:
+        return None
+
+    timeout_ms = config.get('DB_STATEMENT_TIMEOUT_MS')
+    if config.get('DB_PGBOUNCER'):
+        return {'poolclass': TimedNullPool}
+        # PgBouncer rejects the `options` startup parameter, so no connect_args here; see `_set_local_timeout`.
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'pool_use_lifo': True,
+        # LIFO reuses the warmest connections and lets the rest sit idle long enough to be recycled.
+    }
+    if timeout_ms and _is_postgresql(config):
+        options['connect_args'] = {'options': f'-c statement_timeout={int(timeout_ms)}'}
+    return options
+
+
+def _is_postgresql(config):
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    return bool(uri) and make_url(uri).get_backend_name() == 'postgresql'
+    # Statement timeouts are a PostgreSQL setting; other databases get the pool settings only.
+
+
+def _set_local_timeout(timeout_ms):
+    def set_local_timeout(connection):
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout_ms)}')
+    return set_local_timeout
+    # SET LOCAL lasts for the transaction only, so it never leaks to another client sharing the server connection.
+
+
+def init_app(app):
+    """Instrument the engine's pool, and apply the per-transaction statement timeout in PgBouncer mode."""
+    pool_stats = PoolStats()
+    app.extensions['db_pool'] = pool_stats
+
+    with app.app_context():
+        engine = db.engine
+    pool = engine.pool
+    if isinstance(pool, _TimedPoolMixin):
+        pool.stats = pool_stats
+
+    event.listen(pool, 'connect', lambda dbapi_connection, record: pool_stats.increment('connects'))
+    event.listen(pool, 'checkin', lambda dbapi_connection, record: pool_stats.increment('checkins'))
+    event.listen(pool, 'invalidate', lambda dbapi_connection, record, error: pool_stats.increment('invalidations'))
+    # Pool events follow the engine's pool across recreate().
+
+    timeout_ms = app.config.get('DB_STATEMENT_TIMEOUT_MS')
+    if app.config.get('DB_PGBOUNCER') and timeout_ms and engine.dialect.name == 'postgresql':
+        event.listen(engine, 'begin', _set_local_timeout(timeout_ms))
+
+
+def stats():
+    """Return this process's pool counters and live gauges."""
+    stats = current_app.extensions['db_pool'].snapshot(db.engine.pool)
+    stats['max_overflow'] = current_app.config.get('DB_MAX_OVERFLOW')
+    stats['pgbouncer'] = bool(current_app.config.get('DB_PGBOUNCER'))
+    return stats
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from datetime import datetime
+# Importing dataclass for the plain view-model objects handed to templates.
+
+from sqlalchemy import select
+# Importing select for the grouped lookup queries.
+
+from app import db
+from app.models import User, Post, Reaction
+from app.utils import get_user_reactions
+
+
+# Importing the database instance, the models read while hydrating a feed page and the bulk reaction lookup.
+
+# -------------------------------
+# Post View Model
+# -------------------------------
+@dataclass(frozen=True)
+class PostView:
+    """Everything `post_partial.html` needs to render one post, with no lazy relationships left."""
+    id: int
+    title: str
+    content: str
+    date_posted: datetime
+    author_id: int
+    author_username: str
+    author_picture: str | None
+    like_count: int
+    dislike_count: int
+    comment_count: int
+    tags: str | None = None
+    liked: bool = False
+    disliked: bool = False
+
+
+# -------------------------------
+# Hydration
+# -------------------------------
+def hydrate_posts(posts, viewer_id=None):
+    """
+    Turn a page of Post rows into PostView objects.
+
+    Authors are fetched with one IN query and, for a signed-in viewer, their own
+    likes and dislikes with one more, so the number of queries does not grow with
+    the page size. Counts come from the cached counters on Post.
+    """
+    if not posts:
+        return []
+
+    post_ids = [post.id for post in posts]
+    author_ids = {post.author_id for post in posts}
+
+    authors = {
+        row.id: row for row in db.session.execute(
+            select(User.id, User.username, User.profile_picture).where(User.id.in_(author_ids))
+        )
+    }
+    # Read only the author columns the feed shows, rather than whole User rows.
+
+    reacted = get_user_reactions(viewer_id, Post, post_ids)
+
+    views = []
+    for post in posts:
+        author = authors.get(post.author_id)
+        views.append(PostView(
+            id=post.id,
+            title=post.title,
+            content=post.content,
+            date_posted=post.date_posted,
+            author_id=post.author_id,
+            author_username=author.username if author else '',
+            author_picture=author.profile_picture if author else None,
+            like_count=post.like_count or 0,
+            dislike_count=post.dislike_count or 0,
+            comment_count=post.comment_count or 0,
+            tags=post.tags,
+            liked=reacted.get(post.id) == Reaction.LIKE,
+            disliked=reacted.get(post.id) == Reaction.DISLIKE,
+        ))
+    return views
+
+
+def current_viewer_id(user):
+    """Return the id of `user` if they are signed in, otherwise None."""
+    return user.id if user.is_authenticated else None
@@ -0,0 +1,145 @@
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+# Importing SQL expression helpers and the dialect-specific INSERT constructs that support ON CONFLICT.
+
+from app import db, user_cache
+from app.models import Follow, User
+from app.pagination import paginate_keyset
+
+
+# Importing the database instance, the user cache, the follow graph models and the keyset pagination helper.
+
+def _insert():
+    """Build an INSERT into follows that supports ON CONFLICT (SQLite under tests, PostgreSQL otherwise)."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(Follow)
+    return postgresql.insert(Follow)
+
+
+# -------------------------------
+# Membership
+# -------------------------------
+def is_following(follower_id, followed_id):
+    """Return True if `follower_id` follows `followed_id`, with one primary key probe."""
+    if follower_id is None or follower_id == followed_id:
+        return False
+    return db.session.scalar(
+        select(exists().where(Follow.follower_id == follower_id, Follow.followed_id == followed_id))
+    )
+
+
+# -------------------------------
+# Writes
+# -------------------------------
+def _adjust_counts(follower_id, followed_id, delta):
+    """Move both users' cached follow counters by `delta` in the caller's transaction."""
+    user = User.__table__
+    db.session.execute(
+        update(user).where(user.c.id == follower_id).values(following_count=user.c.following_count + delta)
+    )
+    db.session.execute(
+        update(user).where(user.c.id == followed_id).values(follower_count=user.c.follower_count + delta)
+    )
+    # Incrementing in SQL keeps concurrent follows from losing updates.
+
+    user_cache.mark_changed((follower_id, followed_id))
+    # Core UPDATEs bypass the ORM, so tell the user cache which rows changed.
+
+
+def follow(follower_id, followed_id):
+    """
+    Make `follower_id` follow `followed_id`. Returns True if a new follow was created.
+
+    The follow row and both cached counters are written in the caller's transaction.
+    """
+    inserted = db.session.execute(
+        _insert().values(follower_id=follower_id, followed_id=followed_id)
+        .on_conflict_do_nothing(index_elements=['follower_id', 'followed_id'])
+        .returning(Follow.follower_id)
+    ).first() is not None
+    if inserted:
+        _adjust_counts(follower_id, followed_id, 1)
+    return inserted
+    # A double click or concurrent request finds the row already there and leaves the counters alone.
+
+
+def unfollow(follower_id, followed_id):
+    """Remove a follow if it exists. Returns True if a row was deleted. The caller commits."""
+    removed = db.session.execute(
+        delete(Follow)
+        .where(Follow.follower_id == follower_id, Follow.followed_id == followed_id)
+        .returning(Follow.follower_id)
+        .execution_options(synchronize_session=False)
+    ).first() is not None
+    if removed:
+        _adjust_counts(follower_id, followed_id, -1)
+    return removed
+
+
+def toggle_follow(follower_id, followed_id):
+    """Follow or unfollow. Returns True if `follower_id` now follows `followed_id`. The caller commits."""
+    if unfollow(follower_id, followed_id):
+        return False
+    follow(follower_id, followed_id)
+    return True
+
+
+# -------------------------------
+# Lists
+# -------------------------------
+def _page(user_column, other_column, user_id, after, per_page):
+    """Page through the users on the other side of `user_id`'s follows, most recent first."""
+    query = (
+        db.session.query(User.id, User.username, User.profile_picture, Follow.timestamp)
+        .join(Follow, other_column == User.id)
+        .filter(user_column == user_id)
+    )
+    return paginate_keyset(query, Follow.timestamp, User.id, after=after, per_page=per_page)
+    # Served by the (user, timestamp, other) follows index, so a page costs the same however long the list is.
+
+
+def followers_page(user_id, after=None, per_page=20):
+    """Return one page of the users following `user_id` as (rows, next_cursor)."""
+    return _page(Follow.followed_id, Follow.follower_id, user_id, after, per_page)
+
+
+def following_page(user_id, after=None, per_page=20):
+    """Return one page of the users `user_id` follows as (rows, next_cursor)."""
+    return _page(Follow.follower_id, Follow.followed_id, user_id, after, per_page)
+
+
+# -------------------------------
+# Maintenance
+# -------------------------------
+def repair_follow_counts(batch_size=500):
+    """
+    Recompute every user's cached follower/following counters from the follows table.
+
+    Users are processed in id ranges of `batch_size`, each range in its own short
+    transaction with one UPDATE. Returns the number of users processed.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        ids = db.session.scalars(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        db.session.execute(
+            update(User)
+            .where(User.id.between(ids[0], ids[-1]))
+            .values(
+                follower_count=select(func.count()).where(Follow.followed_id == User.id).scalar_subquery(),
+                following_count=select(func.count()).where(Follow.follower_id == User.id).scalar_subquery(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        user_cache.mark_changed(ids)
+        db.session.commit()
+
+        processed += len(ids)
+        last_id = ids[-1]
+
+    return processed
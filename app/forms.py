@@ -15,9 +15,21 @@ from flask_login import current_user
 # Importing the current_user object to access the currently logged-in user's information.
 
 from app.models import User
+# Importing the User model for querying the database during validation.
 
+from app import moderation
+
+
+# Importing the compiled blocked-term filter shared by posts and comments.
+
+RESERVED_USERNAMES = {'account', 'autocomplete'}
+# Fixed /users/<name> routes that would shadow a profile page of the same name.
+
+
+def _check_reserved_username(username):
+    if username.data and username.data.lower() in RESERVED_USERNAMES:
+        raise ValidationError("This username is reserved. Please choose a different one.")
 
-# Importing the User model for querying the database during validation.
 
 # -------------------------------
 # Registration Form
@@ -38,6 +50,11 @@ class RegistrationForm(FlaskForm):
     # Submit button for the form.
     submit = SubmitField('Register')
 
+    # Custom validation method for username.
+    def validate_username(self, username):
+        # Reject names whose profile URL is taken by another page.
+        _check_reserved_username(username)
+
 
 # -------------------------------
 # Login Form
@@ -66,9 +83,22 @@ class CreatePostForm(FlaskForm):
     # Text area field for post content with data requirement.
     content = TextAreaField('Content', validators=[DataRequired()])
 
+    # Optional free-form tags (e.g. "#tomatoes, raised-beds"), normalized by `app.tags.parse_tags`.
+    tags = StringField('Tags', validators=[Length(max=200)])
+
     # Submit button for the form.
     submit = SubmitField('Post')
 
+    # Custom validation method for the post title.
+    def validate_title(self, field):
+        if moderation.is_blocked(field.data):
+            raise ValidationError("Your post contains prohibited words. Please remove them.")
+
+    # Custom validation method for post content.
+    def validate_content(self, field):
+        if moderation.is_blocked(field.data):
+            raise ValidationError("Your post contains prohibited words. Please remove them.")
+
 
 # -------------------------------
 # Comment Form
@@ -85,10 +115,8 @@ class CommentForm(FlaskForm):
 
     # Custom validation method for comment content.
     def validate_content(self, field):
-        prohibited_words = ["spam", "advertisement", "clickbait"]
-        # List of prohibited words to filter out.
-
-        if any(word in field.data.lower() for word in prohibited_words):
+        if moderation.is_blocked(field.data):
+            # One pass over the normalized text, however many terms are blocked.
             # Raise a validation error if the content contains any prohibited words.
             raise ValidationError("Your comment contains prohibited words. Please remove them.")
 
@@ -120,8 +148,9 @@ class UpdateAccountForm(FlaskForm):
 
     # Custom validation method for username.
     def validate_username(self, username):
-        # Check if the new username is already taken, excluding the current user.
+        # Check if the new username is already taken or reserved, excluding the current user.
         if username.data != current_user.username:
+            _check_reserved_username(username)
             user = User.query.filter_by(username=username.data).first()
             if user:
                 raise ValidationError("This username is already taken. Please choose a different one.")
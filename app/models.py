@@ -4,11 +4,29 @@ from datetime import datetime, timezone
 from flask_login import UserMixin
 # Importing UserMixin to integrate user authentication with Flask-Login.
 
+from sqlalchemy import DDL, and_, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import foreign
+# Importing helpers for the reaction relationships, whose join has no foreign key to follow,
+# and for the full-text search index (a tsvector on PostgreSQL, an FTS5 table on SQLite).
+
 from app import db
 
 
 # Importing the database instance for defining and managing models.
 
+# -------------------------------
+# Column Defaults
+# -------------------------------
+def _initial_hot_score(context):
+    """Insert default for Post.hot_score: the score of the post's starting counters and post time."""
+    from app.ranking import hot_score
+    # Imported here because app.ranking imports these models.
+    params = context.get_current_parameters()
+    return hot_score(params.get('like_count') or 0, params.get('dislike_count') or 0,
+                     params.get('comment_count') or 0, params.get('date_posted') or datetime.now(timezone.utc))
+
+
 # -------------------------------
 # User Model
 # -------------------------------
@@ -43,9 +61,16 @@ class User(UserMixin, db.Model):
         backref='following'
     )
 
+    # Cached follow counters, kept in step with the follows table by `app.follows`.
+    follower_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    following_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # Boolean flag for private accounts.
     is_private = db.Column(db.Boolean, default=False)
 
+    # May work the moderation review queue (granted with `flask moderation reviewer`).
+    is_moderator = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
     # User preferences (optional fields).
     preferred_garden_type = db.Column(db.String(50), nullable=True)
     preferred_planting_zone = db.Column(db.String(50), nullable=True)
@@ -53,9 +78,15 @@ class User(UserMixin, db.Model):
     # One-to-many relationship with posts.
     posts = db.relationship('Post', back_populates='author')
 
-    # Many-to-many relationships for likes on posts and comments.
-    liked_posts = db.relationship('PostLike', backref='user', lazy='dynamic', cascade="all, delete-orphan")
-    liked_comments = db.relationship('CommentLike', backref='user', lazy='dynamic', cascade="all, delete-orphan")
+    # Likes and dislikes the user has given to posts and comments.
+    reactions = db.relationship('Reaction', backref='user', lazy='dynamic', cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Serves case-insensitive prefix lookups (autocomplete): WHERE lower(username) LIKE 'pre%'.
+        # text_pattern_ops lets PostgreSQL use the index for LIKE under any collation.
+        db.Index('ix_user_username_lower', db.func.lower(username).label('username_lower'),
+                 postgresql_ops={'username_lower': 'text_pattern_ops'}),
+    )
 
     def __init__(self, username, email, password_hash, **kwargs):
         # Constructor to initialize a user with optional additional attributes.
@@ -79,49 +110,91 @@ class Follow(db.Model):
     followed_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
 
     # Timestamp for when the follow action occurred.
-    timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # The primary key answers "does A follow B"; these serve the newest-first follower/following lists.
+        db.Index('ix_follows_followed_timestamp', 'followed_id', 'timestamp', 'follower_id'),
+        db.Index('ix_follows_follower_timestamp', 'follower_id', 'timestamp', 'followed_id'),
+    )
 
 
 # -------------------------------
-# PostLike Model
+# FollowSuggestion Model
 # -------------------------------
-class PostLike(db.Model):
-    __tablename__ = 'post_likes'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+class FollowSuggestion(db.Model):
+    __tablename__ = 'follow_suggestions'
+    # Precomputed "people you may know": the top candidates per user, rebuilt by `flask suggestions build`.
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+
+    score = db.Column(db.Float, nullable=False)
+    mutual_count = db.Column(db.Integer, nullable=False, default=0)  # Followed users who follow the candidate.
+
+    __table_args__ = (
+        # Serves the read path: WHERE user_id = ? ORDER BY score DESC LIMIT k.
+        db.Index('ix_follow_suggestions_user_score', 'user_id', 'score'),
+    )
 
     def __repr__(self):
-        return f"<PostLike User {self.user_id} likes Post {self.post_id}>"
+        return f"<FollowSuggestion User {self.candidate_id} for User {self.user_id}>"
 
 
 # -------------------------------
-# PostDislike Model
+# TimelineEntry Model
 # -------------------------------
-class PostDislike(db.Model):
-    __tablename__ = 'post_dislikes'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+class TimelineEntry(db.Model):
+    __tablename__ = 'timeline_entries'
+    # Materialized "following" feed: one row per (reader, post), written when the post is created.
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True)
+
+    # Copied from the post so a reader's feed is a single range scan over this table.
+    author_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    date_posted = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # Serves the feed query: WHERE user_id = ? ORDER BY date_posted DESC, post_id DESC.
+        db.Index('ix_timeline_entries_user_date', 'user_id', 'date_posted', 'post_id'),
+        # Serves unfollow cleanup: WHERE user_id = ? AND author_id = ?.
+        db.Index('ix_timeline_entries_user_author', 'user_id', 'author_id'),
+        # Serves post deletion: WHERE post_id = ?.
+        db.Index('ix_timeline_entries_post', 'post_id'),
+    )
 
     def __repr__(self):
-        return f"<PostDislike User {self.user_id} dislikes Post {self.post_id}>"
+        return f"<TimelineEntry Post {self.post_id} for User {self.user_id}>"
 
 
 # -------------------------------
-# CommentLike Model
+# Reaction Model
 # -------------------------------
-class CommentLike(db.Model):
-    __tablename__ = 'comment_likes'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+class Reaction(db.Model):
+    __tablename__ = 'reactions'
+    # Target types: what `target_id` points at.
+    POST = 1
+    COMMENT = 2
+
+    # Reaction kinds.
+    LIKE = 1
+    DISLIKE = 2
+
+    # One row per user per target; the primary key doubles as the conflict target for upserts.
+    target_type = db.Column(db.SmallInteger, primary_key=True)
+    target_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+
+    kind = db.Column(db.SmallInteger, nullable=False)  # LIKE or DISLIKE.
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # Covers "which of these targets did I react to, and how": WHERE user_id = ? AND target_type = ?
+        # AND target_id IN (...), answered from the index alone (kind is included on PostgreSQL).
+        db.Index('ix_reactions_user_target', 'user_id', 'target_type', 'target_id', postgresql_include=['kind']),
+    )
 
     def __repr__(self):
-        return f"<CommentLike User {self.user_id} likes Comment {self.comment_id}>"
+        return f"<Reaction {self.kind} by User {self.user_id} on {self.target_type}:{self.target_id}>"
 
 
 # -------------------------------
@@ -131,23 +204,50 @@ class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)  # Title of the post.
     content = db.Column(db.Text, nullable=False)  # Content of the post.
-    date_posted = db.Column(db.DateTime, default=datetime.now(timezone.utc))  # Post timestamp.
+    date_posted = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)  # Post timestamp.
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Foreign key for the author.
 
     # Relationship with User.
     author = db.relationship('User', back_populates='posts', lazy=True)
 
-    # Relationships for likes and dislikes.
-    likes = db.relationship('PostLike', backref='post', lazy='dynamic', cascade="all, delete-orphan")
-    dislikes = db.relationship('PostDislike', backref='post', lazy='dynamic', cascade="all, delete-orphan")
+    # Likes and dislikes on the post (reactions have no foreign key to posts, so the join names the target type).
+    reactions = db.relationship(
+        'Reaction',
+        primaryjoin=lambda: and_(Reaction.target_type == Reaction.POST, foreign(Reaction.target_id) == Post.id),
+        lazy='dynamic', cascade="all, delete-orphan", overlaps='reactions'
+    )
+
+    # Cached counters, kept in step with the rows above by `app.counters` so feeds never count per post.
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    dislike_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Precomputed ranking scores, refreshed by `flask ranking refresh` (see `app.ranking`).
+    # New posts are scored on insert, so they rank by their post time before the next refresh.
+    hot_score = db.Column(db.Float, nullable=False, default=_initial_hot_score, server_default='0', index=True)
+    top_score = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+
+    # Set whenever the counters change, cleared once the scores have been recomputed.
+    score_dirty = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
 
     # Additional optional fields.
     image_url = db.Column(db.String(300), nullable=True)
     comments = db.relationship('Comment', backref='post', lazy=True, cascade="all, delete-orphan")
-    tags = db.Column(db.String(200), nullable=True)
+    tags = db.Column(db.String(200), nullable=True)  # Normalized, space-separated copy of the post's tags for display.
     is_public = db.Column(db.Boolean, default=True)
+    is_flagged = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # Set by moderation.
+    flag_reason = db.Column(db.String(200), nullable=True)  # Why the moderation classifier flagged the post.
     edited_at = db.Column(db.DateTime, nullable=True)
 
+    __table_args__ = (
+        # Partial index so the ranking job finds posts with new reactions without scanning the table.
+        db.Index('ix_post_score_dirty', 'score_dirty',
+                 postgresql_where=db.text('score_dirty'), sqlite_where=db.text('score_dirty')),
+        # Partial index serving the review queue; it only holds the (few) flagged posts.
+        # SQLite only uses it when the query's predicate matches literally, hence `is_flagged = 1` there.
+        db.Index('ix_post_flagged', 'id', postgresql_where=db.text('is_flagged'), sqlite_where=db.text('is_flagged = 1')),
+    )
+
     def __init__(self, title, content, author_id, **kwargs):
         # Constructor to initialize a post with optional additional attributes.
         self.title = title
@@ -166,24 +266,34 @@ class Post(db.Model):
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)  # Content of the comment.
-    date_posted = db.Column(db.DateTime, default=datetime.now(timezone.utc))  # Comment timestamp.
+    date_posted = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Comment timestamp.
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Foreign key for the author.
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False)  # Foreign key for the associated post.
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), nullable=False, index=True)  # Foreign key for the associated post.
 
     # Relationship with User.
     author = db.relationship('User', backref=db.backref('comments', lazy=True))
 
-    # Relationship for likes on the comment.
-    likes = db.relationship('CommentLike', backref='comment', lazy='dynamic', cascade="all, delete-orphan")
+    # Likes on the comment.
+    reactions = db.relationship(
+        'Reaction',
+        primaryjoin=lambda: and_(Reaction.target_type == Reaction.COMMENT, foreign(Reaction.target_id) == Comment.id),
+        lazy='dynamic', cascade="all, delete-orphan", overlaps='reactions'
+    )
 
     # Fields for threaded replies.
-    parent_comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=True)
+    parent_comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=True, index=True)
     replies = db.relationship('Comment', backref=db.backref('parent_comment', remote_side=[id]), lazy=True)
 
     # Additional optional fields.
     is_flagged = db.Column(db.Boolean, default=False)
+    flag_reason = db.Column(db.String(200), nullable=True)  # Why the moderation classifier flagged the comment.
     edited_at = db.Column(db.DateTime, nullable=True)
 
+    __table_args__ = (
+        # Partial index serving the review queue; it only holds the (few) flagged comments.
+        db.Index('ix_comment_flagged', 'id', postgresql_where=db.text('is_flagged'), sqlite_where=db.text('is_flagged = 1')),
+    )
+
     def __init__(self, content, author_id, post_id, **kwargs):
         # Constructor to initialize a comment with optional additional attributes.
         self.content = content
@@ -194,3 +304,146 @@ class Comment(db.Model):
 
     def __repr__(self):
         return f"<Comment {self.id} by User {self.author_id} on Post {self.post_id}>"
+
+
+# -------------------------------
+# Tag Model
+# -------------------------------
+class Tag(db.Model):
+    __tablename__ = 'tags'
+    # One row per distinct, normalized tag name (see `app.tags.parse_tags`).
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)
+
+    # Cached number of posts carrying the tag, kept in step by `app.tags` so summaries never count rows.
+    post_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+
+    def __repr__(self):
+        return f"<Tag {self.name}>"
+
+
+# -------------------------------
+# PostTag Model
+# -------------------------------
+class PostTag(db.Model):
+    __tablename__ = 'post_tags'
+    # Association between posts and tags, replacing LIKE scans over `Post.tags`.
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True)
+
+    # Copied from the post so a tag feed is a single range scan over this table.
+    date_posted = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # Serves the tag feed: WHERE tag_id = ? ORDER BY date_posted DESC, post_id DESC.
+        db.Index('ix_post_tags_tag_date', 'tag_id', 'date_posted', 'post_id'),
+        # Serves re-tagging and post deletion: WHERE post_id = ?.
+        db.Index('ix_post_tags_post', 'post_id'),
+    )
+
+    def __repr__(self):
+        return f"<PostTag Post {self.post_id} Tag {self.tag_id}>"
+
+
+# -------------------------------
+# SessionRecord Model
+# -------------------------------
+class SessionRecord(db.Model):
+    __tablename__ = 'sessions'
+    # Server-side Flask sessions (see `app.sessions`); the cookie only carries the signed session id.
+    sid = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)  # Serialized session, see `SessionSerializer`.
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # Indexed for the batched cleanup.
+
+    def __repr__(self):
+        return f"<SessionRecord {self.sid[:8]}>"
+
+
+# -------------------------------
+# BlockedTerm Model
+# -------------------------------
+class BlockedTerm(db.Model):
+    __tablename__ = 'blocked_terms'
+    # Terms rejected in posts and comments, compiled into one matcher by `app.moderation`.
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(100), nullable=False, unique=True)  # Stored normalized, see `moderation.normalize`.
+    whole_word = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())  # False also matches inside words.
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<BlockedTerm {self.term}>"
+
+
+class BlockedTermVersion(db.Model):
+    __tablename__ = 'blocked_term_version'
+    # Single row, bumped whenever blocked_terms changes so each process knows when to recompile its matcher.
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<BlockedTermVersion {self.version}>"
+
+
+# -------------------------------
+# ModerationJob Model
+# -------------------------------
+class ModerationJob(db.Model):
+    __tablename__ = 'moderation_jobs'
+    # Posts and comments waiting to be scored by the moderation workers (see `app.moderation_queue`).
+    POST = 1
+    COMMENT = 2
+
+    id = db.Column(db.Integer, primary_key=True)
+    target_type = db.Column(db.SmallInteger, nullable=False)  # POST or COMMENT.
+    target_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    run_after = db.Column(db.DateTime, nullable=False)  # Not claimed before this time; pushed back after a failure.
+    locked_until = db.Column(db.DateTime, nullable=True)  # Set while a worker holds the job; expired leases are reclaimed.
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    failed = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # Gave up after too many attempts.
+    last_error = db.Column(db.String(300), nullable=True)
+
+    __table_args__ = (
+        # Serves the claim query: the oldest due jobs, skipping the ones that gave up.
+        db.Index('ix_moderation_jobs_due', 'run_after', 'id',
+                 postgresql_where=db.text('NOT failed'), sqlite_where=db.text('failed = 0')),
+    )
+
+    def __repr__(self):
+        return f"<ModerationJob {self.target_type}:{self.target_id}>"
+
+
+# -------------------------------
+# SearchDocument Model
+# -------------------------------
+class SearchDocument(db.Model):
+    __tablename__ = 'search_documents'
+    # One row per indexed post or comment, written by `app.search` whenever one is created, edited or deleted.
+    POST = 1
+    COMMENT = 2
+
+    # doc_id * 2 for posts, doc_id * 2 + 1 for comments; also the rowid of the SQLite FTS5 table.
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    doc_type = db.Column(db.SmallInteger, nullable=False)
+    doc_id = db.Column(db.Integer, nullable=False)
+    post_id = db.Column(db.Integer, nullable=False, index=True)  # The post itself, or the post a comment is on.
+
+    # Weighted tsvector of title (A), tags (B) and content (C). Unused on SQLite, which matches against `search_fts`.
+    document = db.Column(TSVECTOR().with_variant(db.Text(), 'sqlite'), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_search_documents_document', 'document', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+
+    def __repr__(self):
+        return f"<SearchDocument {self.doc_type}:{self.doc_id}>"
+
+
+# SQLite (TestingConfig) has no tsvector; its full-text index is an FTS5 table keyed by SearchDocument.id.
+event.listen(SearchDocument.__table__, 'after_create', DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(title, tags, body, tokenize='porter unicode61')"
+).execute_if(dialect='sqlite'))
+event.listen(SearchDocument.__table__, 'before_drop', DDL(
+    "DROP TABLE IF EXISTS search_fts"
+).execute_if(dialect='sqlite'))
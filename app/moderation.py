@@ -0,0 +1,301 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+# Importing helpers for text normalization, the cache's lock and clock, and the queue used to build fail links.
+
+from flask import current_app
+# Importing the app context for reaching the per-process filter and its settings.
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+# Importing SQL expression helpers and the dialect-specific INSERT constructs that support ON CONFLICT.
+
+from app import db
+from app.models import BlockedTerm, BlockedTermVersion, Comment, Post
+
+
+# Importing the database instance, the term tables and the moderated content.
+
+VERSION_ROW_ID = 1  # blocked_term_version holds a single row.
+
+_LEET = str.maketrans({'0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '@': 'a', '$': 's'})
+_NON_WORD = re.compile(r'[^\w@$]+')
+
+
+# -------------------------------
+# Normalization
+# -------------------------------
+def normalize(text):
+    """
+    Fold `text` to the form terms are matched in: lower-case words without accents, separated by single spaces.
+
+    Look-alike digits and symbols inside words are read as letters ("fr33 $eeds" -> "free seeds");
+    numbers on their own are left alone.
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    words = []
+    for word in _NON_WORD.split(text.replace('_', ' ')):
+        if any(ch.isalpha() for ch in word):
+            word = word.translate(_LEET)
+        word = word.strip('@$')
+        if word:
+            words.append(word)
+    return ' '.join(words)
+
+
+# -------------------------------
+# Aho-Corasick Automaton
+# -------------------------------
+class Automaton:
+    """
+    Every blocked term compiled into one Aho-Corasick automaton, so a text is scanned once
+    no matter how many terms there are.
+
+    `terms` is an iterable of (normalized term, whole_word) pairs. Whole-word terms only
+    match between spaces or the ends of the normalized text.
+    """
+
+    def __init__(self, terms):
+        self._goto = [{}]  # state -> {char: next state}
+        self._fail = [0]
+        self._out = [[]]  # state -> indexes into self.terms ending here
+        self.terms = []
+
+        for term, whole_word in terms:
+            if not term:
+                continue
+            state = 0
+            for ch in term:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(len(self.terms))
+            self.terms.append((term, whole_word))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+        # Breadth-first, so each state's fail target is finished before the states below it.
+
+    def __len__(self):
+        return len(self.terms)
+
+    def find(self, text, first=False):
+        """Return the blocked terms found in already-normalized `text` (only the first one if `first`)."""
+        found = []
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for index in self._out[state]:
+                term, whole_word = self.terms[index]
+                if whole_word:
+                    start = end - len(term)
+                    if (start and text[start - 1] != ' ') or (end < len(text) and text[end] != ' '):
+                        continue
+                if term not in found:
+                    found.append(term)
+                    if first:
+                        return found
+        return found
+
+
+# -------------------------------
+# Per-Process Filter
+# -------------------------------
+class ModerationFilter:
+    """
+    The compiled automaton for this process, rebuilt only when the term list's version changes.
+
+    The version row is read at most once every `check_interval` seconds, so most
+    validations cost no query at all. Use `stats()` to read rebuild and match counters.
+    """
+
+    def __init__(self, base_terms=(), check_interval=10):
+        self.base_terms = [(normalize(term), True) for term in base_terms]
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._automaton = None
+        self._version = None
+        self._checked_at = None
+        self._stats = {'rebuilds': 0, 'version_checks': 0, 'scans': 0, 'matches': 0}
+
+    def _current_version(self):
+        version = db.session.execute(
+            select(BlockedTermVersion.version).where(BlockedTermVersion.id == VERSION_ROW_ID)
+        ).scalar()
+        return version or 0
+
+    def _build(self):
+        rows = db.session.execute(select(BlockedTerm.term, BlockedTerm.whole_word)).all()
+        return Automaton(self.base_terms + [(term, whole_word) for term, whole_word in rows])
+
+    def automaton(self):
+        """Return the compiled automaton, rebuilding it first if the term list changed."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._automaton
+
+        version = self._current_version()
+        with self._lock:
+            self._stats['version_checks'] += 1
+            if self._automaton is not None and version == self._version:
+                self._checked_at = now
+                return self._automaton
+
+        automaton = self._build()
+        with self._lock:
+            self._automaton, self._version, self._checked_at = automaton, version, now
+            self._stats['rebuilds'] += 1
+        return automaton
+        # Building happens outside the lock; a concurrent rebuild of the same version is harmless.
+
+    def expire(self):
+        """Re-read the version on the next lookup (called after this process changes the term list)."""
+        self._checked_at = None
+
+    def find(self, text, first=False):
+        found = self.automaton().find(normalize(text), first=first)
+        with self._lock:
+            self._stats['scans'] += 1
+            self._stats['matches'] += bool(found)
+        return found
+
+    # -------------------------------
+    # Metrics
+    # -------------------------------
+    def stats(self):
+        """Return rebuild and match counters, the compiled version and its size for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['version'] = self._version
+            stats['terms'] = len(self._automaton) if self._automaton is not None else 0
+        return stats
+
+
+def init_app(app):
+    """Create this process's moderation filter; the automaton is compiled on first use."""
+    app.extensions['moderation'] = ModerationFilter(
+        base_terms=app.config.get('MODERATION_BASE_TERMS', ()),
+        check_interval=app.config.get('MODERATION_VERSION_CHECK_SECONDS', 10),
+    )
+
+
+def get_filter():
+    """Return the current app's ModerationFilter."""
+    return current_app.extensions['moderation']
+
+
+def find_blocked_terms(text, first=False):
+    """Return the blocked terms that appear in `text`, in order of appearance."""
+    return get_filter().find(text, first=first)
+
+
+def is_blocked(text):
+    """Return True if `text` contains any blocked term."""
+    return bool(find_blocked_terms(text, first=True))
+
+
+# -------------------------------
+# Managing Terms
+# -------------------------------
+def _insert(model):
+    return (sqlite if db.engine.dialect.name == 'sqlite' else postgresql).insert(model)
+
+
+def _bump_version():
+    db.session.execute(
+        _insert(BlockedTermVersion).values(id=VERSION_ROW_ID, version=1)
+        .on_conflict_do_update(index_elements=['id'], set_={'version': BlockedTermVersion.version + 1})
+    )
+    get_filter().expire()
+
+
+def add_terms(terms, whole_word=True):
+    """
+    Block `terms` (normalized first) and bump the term list version. Returns the number newly added.
+
+    The caller commits; other processes pick the change up within MODERATION_VERSION_CHECK_SECONDS.
+    """
+    normalized = sorted({normalize(term) for term in terms} - {''})
+    if not normalized:
+        return 0
+    existing = set(db.session.execute(select(BlockedTerm.term).where(BlockedTerm.term.in_(normalized))).scalars())
+    added = [term for term in normalized if term not in existing]
+    if added:
+        db.session.execute(
+            _insert(BlockedTerm).values([{'term': term, 'whole_word': whole_word} for term in added])
+            .on_conflict_do_nothing(index_elements=['term'])
+        )
+        _bump_version()
+    return len(added)
+
+
+def remove_terms(terms):
+    """Unblock `terms` and bump the term list version. Returns the number removed; the caller commits."""
+    normalized = {normalize(term) for term in terms} - {''}
+    if not normalized:
+        return 0
+    removed = db.session.execute(delete(BlockedTerm).where(BlockedTerm.term.in_(normalized))).rowcount
+    if removed:
+        _bump_version()
+    return removed
+
+
+# -------------------------------
+# Re-scanning Existing Content
+# -------------------------------
+def _rescan_model(model, columns, batch_size):
+    moderation = get_filter()
+    scanned = flagged = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(model.id, *columns).where(model.id > last_id).order_by(model.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return scanned, flagged
+
+        automaton = moderation.automaton()
+        hits = [row[0] for row in rows
+                if any(automaton.find(normalize(value), first=True) for value in row[1:] if value)]
+        # Fields are scanned separately so a phrase cannot match across the end of a title and the start of the content.
+        if hits:
+            db.session.execute(
+                update(model).where(model.id.in_(hits), model.is_flagged.is_not(True)).values(is_flagged=True)
+            )
+        db.session.commit()
+        # One range read and at most one UPDATE per batch, committed so locks stay short.
+
+        scanned += len(rows)
+        flagged += len(hits)
+        last_id = rows[-1][0]
+
+
+def rescan(batch_size=500):
+    """
+    Flag existing posts and comments that contain a blocked term.
+
+    Content is only ever flagged here, never unflagged, so reviewers' decisions survive a
+    re-scan. Returns {'posts': (scanned, flagged), 'comments': (scanned, flagged)}.
+    """
+    return {
+        'posts': _rescan_model(Post, (Post.title, Post.content, Post.tags), batch_size),
+        'comments': _rescan_model(Comment, (Comment.content,), batch_size),
+    }
@@ -0,0 +1,378 @@
+import atexit
+import importlib
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+# Importing helpers for loading the configured classifier, the worker threads and their clock,
+# and the timestamps used for leases and retries.
+
+from flask import current_app, has_app_context
+# Importing the app context for reaching the classifier, the worker pool and their settings.
+
+from sqlalchemy import bindparam, delete, event, inspect, insert, or_, select, update
+# Importing SQL expression helpers for the claim, result and retry statements.
+
+from app import db, moderation
+from app.models import Comment, ModerationJob, Post
+from app.pagination import paginate_keyset
+
+
+# Importing the database instance, the blocked-term filter, the moderated models and the keyset pager.
+
+ENQUEUED_KEY = 'moderation_enqueued'  # session.info key set when a flush queued jobs, to wake the workers on commit.
+
+_LINK = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+    # Stored naive, matching how the database columns hand timestamps back.
+
+
+# -------------------------------
+# Classifiers
+# -------------------------------
+class Classifier:
+    """
+    Scores the text of a post or comment. Subclasses implement `classify`.
+
+    Set MODERATION_CLASSIFIER to the dotted path of a subclass to plug in another model;
+    it is built once per process with the app's config. Classifiers run only in the
+    moderation workers, never on the request path, so they may be slow.
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def classify(self, text):
+        """Return (score between 0 and 1, reason or None). Scores at MODERATION_FLAG_THRESHOLD or above are flagged."""
+        raise NotImplementedError
+
+
+class HeuristicClassifier(Classifier):
+    """Flags blocked terms, link spam and shouting."""
+
+    def classify(self, text):
+        signals = []
+
+        blocked = moderation.find_blocked_terms(text)
+        if blocked:
+            signals.append((1.0, f"Blocked term: {blocked[0]}"))
+            # Catches terms blocked after the text was submitted.
+
+        links = len(_LINK.findall(text))
+        if links >= self.config.get('MODERATION_MAX_LINKS', 3):
+            signals.append((0.8, f"{links} links"))
+
+        letters = [ch for ch in text if ch.isalpha()]
+        if len(letters) >= 20 and sum(ch.isupper() for ch in letters) / len(letters) >= 0.7:
+            signals.append((0.6, "Mostly capital letters"))
+
+        return max(signals, default=(0.0, None))
+
+
+def load_classifier(app):
+    """Build the classifier named by MODERATION_CLASSIFIER."""
+    module_name, _, class_name = app.config.get(
+        'MODERATION_CLASSIFIER', 'app.moderation_queue.HeuristicClassifier'
+    ).rpartition('.')
+    return getattr(importlib.import_module(module_name), class_name)(app.config)
+
+
+def get_classifier():
+    """Return the current app's classifier."""
+    return current_app.extensions['moderation_classifier']
+
+
+# -------------------------------
+# Enqueueing
+# -------------------------------
+def _text_changed(obj, names):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+def _enqueue_after_flush(session, flush_context):
+    """Queue every new or edited post and comment for scoring, in the same transaction that writes it."""
+    now = _utcnow()
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, Post):
+            rows.append({'target_type': ModerationJob.POST, 'target_id': obj.id, 'run_after': now})
+        elif isinstance(obj, Comment):
+            rows.append({'target_type': ModerationJob.COMMENT, 'target_id': obj.id, 'run_after': now})
+    for obj in session.dirty:
+        if isinstance(obj, Post) and _text_changed(obj, ('title', 'content', 'tags')):
+            rows.append({'target_type': ModerationJob.POST, 'target_id': obj.id, 'run_after': now})
+        elif isinstance(obj, Comment) and _text_changed(obj, ('content',)):
+            rows.append({'target_type': ModerationJob.COMMENT, 'target_id': obj.id, 'run_after': now})
+
+    if rows:
+        session.connection().execute(insert(ModerationJob.__table__), rows)
+        session.info[ENQUEUED_KEY] = True
+    # One multi-row INSERT per flush is all the request path pays; scoring happens in the workers.
+
+
+def _wake_workers(session):
+    if session.info.pop(ENQUEUED_KEY, None) and has_app_context():
+        pool = current_app.extensions.get('moderation_workers')
+        if pool is not None:
+            pool.wake()
+
+
+def _discard_on_rollback(session):
+    session.info.pop(ENQUEUED_KEY, None)
+
+
+# -------------------------------
+# Processing
+# -------------------------------
+def claim_jobs(limit, lease_seconds=60):
+    """
+    Lease up to `limit` due jobs to the caller and commit. Returns rows of (id, target_type, target_id, attempts).
+
+    On PostgreSQL, concurrent workers skip each other's locked rows; a lease that runs
+    out (the worker died) makes the job claimable again.
+    """
+    now = _utcnow()
+    available = or_(ModerationJob.locked_until.is_(None), ModerationJob.locked_until < now)
+    ids = db.session.scalars(
+        select(ModerationJob.id)
+        .where(~ModerationJob.failed, ModerationJob.run_after <= now, available)
+        .order_by(ModerationJob.run_after, ModerationJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        db.session.commit()
+        return []
+
+    claimed = db.session.execute(
+        update(ModerationJob)
+        .where(ModerationJob.id.in_(ids), available)
+        .values(locked_until=now + timedelta(seconds=lease_seconds), attempts=ModerationJob.attempts + 1)
+        .returning(ModerationJob.id, ModerationJob.target_type, ModerationJob.target_id, ModerationJob.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return claimed
+    # Re-checking the lease in the UPDATE keeps two workers from both taking a job where SKIP LOCKED is unavailable.
+
+
+def _load_texts(jobs):
+    """Return {(target_type, target_id): text} for the jobs' posts and comments that still exist."""
+    texts = {}
+    post_ids = [job.target_id for job in jobs if job.target_type == ModerationJob.POST]
+    comment_ids = [job.target_id for job in jobs if job.target_type == ModerationJob.COMMENT]
+    if post_ids:
+        for post_id, title, content, tags in db.session.execute(
+            select(Post.id, Post.title, Post.content, Post.tags).where(Post.id.in_(post_ids))
+        ):
+            texts[(ModerationJob.POST, post_id)] = '\n'.join(value for value in (title, content, tags) if value)
+    if comment_ids:
+        for comment_id, content in db.session.execute(
+            select(Comment.id, Comment.content).where(Comment.id.in_(comment_ids))
+        ):
+            texts[(ModerationJob.COMMENT, comment_id)] = content
+    return texts
+
+
+def process_jobs(jobs, classifier, threshold=0.5, max_attempts=5, retry_seconds=30):
+    """
+    Score claimed jobs and write the results. Returns (processed, flagged).
+
+    Flagged posts and comments get is_flagged and a reason; finished jobs are deleted.
+    A job whose classification raised is retried with exponential backoff, and marked
+    failed after `max_attempts`.
+    """
+    texts = _load_texts(jobs)
+    db.session.commit()
+    # Nothing is held open while the classifier runs.
+
+    flagged = {ModerationJob.POST: [], ModerationJob.COMMENT: []}
+    done, errors = [], []
+    for job in jobs:
+        text = texts.get((job.target_type, job.target_id))
+        if text is None:
+            done.append(job.id)
+            continue
+            # Deleted before its turn came.
+        try:
+            score, reason = classifier.classify(text)
+        except Exception as e:
+            errors.append((job, e))
+            continue
+        if score >= threshold:
+            flagged[job.target_type].append({'b_id': job.target_id, 'b_reason': (reason or 'Flagged')[:200]})
+        done.append(job.id)
+
+    for target_type, model in ((ModerationJob.POST, Post), (ModerationJob.COMMENT, Comment)):
+        if flagged[target_type]:
+            table = model.__table__
+            db.session.execute(
+                update(table).where(table.c.id == bindparam('b_id'))
+                .values(is_flagged=True, flag_reason=bindparam('b_reason')),
+                flagged[target_type]
+            )
+    if done:
+        db.session.execute(
+            delete(ModerationJob).where(ModerationJob.id.in_(done)).execution_options(synchronize_session=False)
+        )
+
+    now = _utcnow()
+    for job, error in errors:
+        db.session.execute(
+            update(ModerationJob).where(ModerationJob.id == job.id)
+            .values(run_after=now + timedelta(seconds=retry_seconds * 2 ** (job.attempts - 1)),
+                    locked_until=None, failed=job.attempts >= max_attempts, last_error=str(error)[:300])
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return len(done), sum(len(rows) for rows in flagged.values())
+
+
+def run_once(batch_size=None):
+    """Claim and score one batch of due jobs with the app's settings. Returns (processed, flagged)."""
+    config = current_app.config
+    jobs = claim_jobs(batch_size or config.get('MODERATION_BATCH_SIZE', 50), config.get('MODERATION_LEASE_SECONDS', 60))
+    if not jobs:
+        return 0, 0
+    return process_jobs(
+        jobs,
+        get_classifier(),
+        threshold=config.get('MODERATION_FLAG_THRESHOLD', 0.5),
+        max_attempts=config.get('MODERATION_MAX_ATTEMPTS', 5),
+        retry_seconds=config.get('MODERATION_RETRY_SECONDS', 30),
+    )
+
+
+# -------------------------------
+# Worker Pool
+# -------------------------------
+class ModerationWorkerPool:
+    """
+    Background threads that drain the moderation job table.
+
+    Each worker claims a batch, scores it and writes the results, then polls again every
+    `poll_interval` seconds once the table is empty (or sooner, when this process
+    enqueues new work). Use `stats()` to read throughput counters.
+    """
+
+    def __init__(self, app, workers=1, poll_interval=2.0, batch_size=50):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._threads = []
+        self._stats = {'batches': 0, 'processed': 0, 'flagged': 0, 'errors': 0, 'last_batch_ms': 0.0}
+
+    def run_batch(self):
+        """Process one batch inside an app context. Returns the number of jobs processed."""
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                processed, flagged = run_once(self.batch_size)
+        except Exception as e:
+            self.app.logger.error(f"Error processing moderation jobs: {e}")
+            with self._lock:
+                self._stats['errors'] += 1
+            return 0
+            # Claimed jobs keep their lease and are retried once it runs out.
+
+        if processed:
+            with self._lock:
+                self._stats['batches'] += 1
+                self._stats['processed'] += processed
+                self._stats['flagged'] += flagged
+                self._stats['last_batch_ms'] = (time.perf_counter() - started) * 1000
+        return processed
+
+    def wake(self):
+        """Poll for new jobs now instead of at the next interval."""
+        self._wake.set()
+
+    def start(self):
+        """Start the worker threads and stop them at interpreter exit."""
+        if not self._threads:
+            self._stopping = False
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'moderation-worker-{number}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Stop the worker threads after their current batch."""
+        self._stopping = True
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while not self._stopping:
+            if not self.run_batch():
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    # -------------------------------
+    # Metrics
+    # -------------------------------
+    def stats(self):
+        """Return batch, throughput and error counters for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        return stats
+
+
+def init_app(app):
+    """Queue new posts and comments for moderation and, if MODERATION_WORKERS > 0, start in-process workers."""
+    app.extensions['moderation_classifier'] = load_classifier(app)
+    for name, listener in (('after_flush', _enqueue_after_flush),
+                           ('after_commit', _wake_workers),
+                           ('after_rollback', _discard_on_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+
+    workers = app.config.get('MODERATION_WORKERS', 0)
+    if workers > 0:
+        app.extensions['moderation_workers'] = ModerationWorkerPool(
+            app,
+            workers=workers,
+            poll_interval=app.config.get('MODERATION_POLL_SECONDS', 2.0),
+            batch_size=app.config.get('MODERATION_BATCH_SIZE', 50),
+        ).start()
+    # With no in-process workers, run `flask moderation work` as a separate process.
+
+
+# -------------------------------
+# Review Queue
+# -------------------------------
+REVIEW_MODELS = {'posts': Post, 'comments': Comment}
+
+
+def review_queue(kind, after=None, per_page=20):
+    """
+    Return one page of flagged posts or comments, oldest first, as (items, next_cursor).
+
+    Served from the partial index on is_flagged (the bare column keeps the predicate in
+    the form the index was declared with), so the cost tracks the queue's length, not the table's.
+    """
+    model = REVIEW_MODELS[kind]
+    return paginate_keyset(
+        model.query.filter(model.is_flagged), model.id, model.id,
+        after=after, per_page=per_page, parse=int, ascending=True
+    )
+
+
+def approve(item):
+    """Clear a post's or comment's flag after review. The caller commits."""
+    item.is_flagged = False
+    item.flag_reason = None
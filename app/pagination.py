@@ -0,0 +1,89 @@
+import base64
+import binascii
+from datetime import datetime
+# Importing encoding helpers for building opaque cursors and datetime for parsing them back.
+
+from flask import current_app, request
+# Importing the app context (for page size settings) and the request (for query string arguments).
+
+from sqlalchemy import and_, or_
+
+
+# Importing SQL expression helpers for building the keyset predicate.
+
+# -------------------------------
+# Cursor Encoding
+# -------------------------------
+def encode_cursor(sort_value, row_id):
+    """Encode a (sort value, id) pair into an opaque, URL-safe cursor string."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.replace(tzinfo=None).isoformat()
+        # Store timestamps naive, matching how the database columns hand them back.
+
+    raw = f"{sort_value}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+    # Strip the base64 padding so the cursor stays short in the query string.
+
+
+def decode_cursor(cursor, parse=datetime.fromisoformat):
+    """Decode a cursor produced by `encode_cursor`. Returns None if it is missing or malformed."""
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = base64.urlsafe_b64decode(padded).decode('utf-8').rsplit('|', 1)
+        return parse(sort_value), int(row_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        # A tampered or stale cursor simply restarts the feed from the first page.
+        return None
+
+
+# -------------------------------
+# Keyset Pagination
+# -------------------------------
+def get_page_size(default_key='FEED_PAGE_SIZE'):
+    """Read the requested page size from `?per_page=`, clamped to the configured bounds."""
+    default = current_app.config.get(default_key, 20)
+    maximum = current_app.config.get('FEED_MAX_PAGE_SIZE', 100)
+    per_page = request.args.get('per_page', default, type=int)
+    return max(1, min(per_page, maximum))
+
+
+def paginate_keyset(query, sort_column, id_column, after=None, per_page=20, parse=datetime.fromisoformat,
+                    ascending=False):
+    """
+    Return one page of `query` ordered by (sort_column, id_column), descending unless `ascending`.
+
+    Only `per_page + 1` rows are fetched, no matter how large the table is. The
+    result is a tuple of (items, next_cursor); next_cursor is None on the last page.
+    """
+    position = decode_cursor(after, parse=parse)
+    if position is not None:
+        sort_value, row_id = position
+        if ascending:
+            query = query.filter(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > row_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            ))
+        # Seek past the last row of the previous page instead of using OFFSET.
+
+    if ascending:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    rows = query.limit(per_page + 1).all()
+    # Fetch one extra row to find out whether another page exists.
+
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    return items, next_cursor
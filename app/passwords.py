@@ -0,0 +1,207 @@
+import atexit
+import multiprocessing
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+# Importing the process pool that runs bcrypt off the request threads, and helpers for bounding and timing it.
+
+import bcrypt
+# Importing the bcrypt library directly; hashes stay compatible with those made by the earlier Flask-Bcrypt setup.
+
+from flask import current_app
+
+
+# Importing the app context for reaching the per-process hasher.
+
+BCRYPT_MAX_BYTES = 72  # bcrypt only reads this many bytes; newer releases reject longer input instead of ignoring it.
+LATENCY_SAMPLES = 1000  # Recent hash/check durations kept for the percentile metrics.
+
+_COST = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when every hashing slot stays taken for longer than the configured wait."""
+
+
+def _encode(password):
+    return password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+    # Matches what older bcrypt releases did implicitly, so existing hashes of long passwords still verify.
+
+
+def _hash(password, rounds):
+    """Worker function: hash `password` with a fresh salt at cost `rounds`."""
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _check(password_hash, password):
+    """Worker function: check `password` against a stored bcrypt hash."""
+    try:
+        return bcrypt.checkpw(_encode(password), password_hash.encode('utf-8'))
+    except ValueError:
+        return False
+        # A malformed stored hash never matches.
+
+
+def hash_cost(password_hash):
+    """Return the cost factor (log rounds) a bcrypt hash was made with, or None if it is not a bcrypt hash."""
+    match = _COST.match(password_hash or '')
+    return int(match.group(1)) if match else None
+
+
+# -------------------------------
+# Hashing Service
+# -------------------------------
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and checking in a bounded process pool.
+
+    At most `max_pending` operations are queued or running at once; callers wait up to
+    `wait_timeout` seconds for a slot and then get PasswordHasherBusy, so a login storm
+    queues in front of the pool instead of pinning every request thread. With
+    `workers=0` the work runs inline (used under TestingConfig). Use `stats()` to read
+    queue wait and hashing latency counters.
+    """
+
+    def __init__(self, rounds=12, workers=2, max_pending=32, wait_timeout=5.0):
+        self.rounds = rounds
+        self.workers = workers
+        self.wait_timeout = wait_timeout
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        self._latencies = {'hash': deque(maxlen=LATENCY_SAMPLES), 'check': deque(maxlen=LATENCY_SAMPLES)}
+        self._stats = {
+            'hashes': 0,
+            'checks': 0,
+            'rehashes': 0,
+            'rejected': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                # Spawned workers only import bcrypt; they never inherit the app's open connections.
+                atexit.register(self.shutdown)
+            return self._pool
+
+    def _run(self, kind, fn, *args):
+        queued = time.perf_counter()
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise PasswordHasherBusy('Password hashing is saturated; try again shortly.')
+
+        try:
+            started = time.perf_counter()
+            if self.workers > 0:
+                result = self._get_pool().submit(fn, *args).result()
+            else:
+                result = fn(*args)
+            finished = time.perf_counter()
+        finally:
+            self._slots.release()
+
+        wait_ms = (started - queued) * 1000
+        with self._lock:
+            self._stats['hashes' if kind == 'hash' else 'checks'] += 1
+            self._stats['total_wait_ms'] += wait_ms
+            self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+            self._latencies[kind].append((finished - started) * 1000)
+        return result
+
+    def hash_password(self, password, rounds=None):
+        """Return a bcrypt hash of `password` at the configured cost (or `rounds`)."""
+        if not password:
+            raise ValueError('Password must be non-empty.')
+        return self._run('hash', _hash, password, rounds or self.rounds)
+
+    def check_password(self, password_hash, password):
+        """Return True if `password` matches `password_hash`."""
+        if not password_hash or not password:
+            return False
+        return self._run('check', _check, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Return True if a hash was made with a different cost factor than the configured one."""
+        return hash_cost(password_hash) != self.rounds
+
+    def verify_and_upgrade(self, user, password):
+        """
+        Check `password` for `user`, re-hashing it at the current cost if the stored hash is outdated.
+
+        Returns True on a match. An upgraded hash is set on `user`; the caller commits.
+        """
+        if not self.check_password(user.password_hash, password):
+            return False
+        if self.needs_rehash(user.password_hash):
+            user.password_hash = self.hash_password(password)
+            with self._lock:
+                self._stats['rehashes'] += 1
+        return True
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    # -------------------------------
+    # Metrics
+    # -------------------------------
+    def stats(self):
+        """Return counters, queue wait and hash/check latency percentiles (in ms) for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = {kind: sorted(samples) for kind, samples in self._latencies.items()}
+        operations = stats['hashes'] + stats['checks']
+        stats['avg_wait_ms'] = stats['total_wait_ms'] / operations if operations else 0.0
+        stats['rounds'] = self.rounds
+        stats['workers'] = self.workers
+        for kind, samples in latencies.items():
+            for percentile in (50, 95, 99):
+                value = samples[min(len(samples) - 1, len(samples) * percentile // 100)] if samples else 0.0
+                stats[f'{kind}_p{percentile}_ms'] = value
+        return stats
+
+
+def init_app(app):
+    """Create this process's hasher from the BCRYPT_LOG_ROUNDS and PASSWORD_HASH_* settings."""
+    app.extensions['password_hasher'] = PasswordHasher(
+        rounds=app.config.get('BCRYPT_LOG_ROUNDS', 12),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 32),
+        wait_timeout=app.config.get('PASSWORD_HASH_WAIT_SECONDS', 5.0),
+    )
+    # The pool itself starts on first use, so CLI commands and tests that never hash pay nothing.
+
+
+def get_hasher():
+    """Return the current app's PasswordHasher."""
+    return current_app.extensions['password_hasher']
+
+
+# -------------------------------
+# Cost Calibration
+# -------------------------------
+def benchmark(rounds_range, samples=3):
+    """Return {rounds: median milliseconds} for hashing one password at each cost, run inline."""
+    results = {}
+    for rounds in rounds_range:
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            _hash('benchmark-password', rounds)
+            timings.append((time.perf_counter() - started) * 1000)
+        results[rounds] = sorted(timings)[len(timings) // 2]
+    return results
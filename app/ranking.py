@@ -0,0 +1,123 @@
+import math
+from datetime import datetime, timedelta, timezone
+# Importing math for the logarithmic vote weighting and datetime utilities for time decay and windows.
+
+from sqlalchemy import and_, bindparam, select, update
+# Importing SQL expression helpers for the batched score updates.
+
+from app import db
+from app.models import Post
+from app.pagination import paginate_keyset
+
+
+# Importing the database instance, the Post model and the keyset pagination helper.
+
+SORTS = ('hot', 'new', 'top')
+# Supported `?sort=` values for the explore page.
+
+WINDOWS = {
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+# Supported `?window=` values, mapped to how far back they reach.
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# Reference point for the time term of the hot score. Only differences matter, so any fixed date works.
+
+DECAY_SECONDS = 45000
+# A post needs 10x the net votes to outrank one posted this many seconds (12.5 hours) later.
+
+COMMENT_WEIGHT = 0.5
+# How much one comment counts towards a post's score, relative to one like.
+
+
+# -------------------------------
+# Scoring
+# -------------------------------
+def hot_score(likes, dislikes, comments, date_posted):
+    """
+    Reddit-style hot score: log-scaled net votes plus a term that grows with post time.
+
+    Newer posts get a permanently higher time term instead of older posts decaying, so a
+    stored score only needs recomputing when the post's reactions change.
+    """
+    score = likes - dislikes + COMMENT_WEIGHT * comments
+    order = math.log10(max(abs(score), 1))
+    sign = 1 if score > 0 else -1 if score < 0 else 0
+
+    if date_posted.tzinfo is None:
+        date_posted = date_posted.replace(tzinfo=timezone.utc)
+        # Stored timestamps come back naive; they were written in UTC.
+    seconds = (date_posted - EPOCH).total_seconds()
+
+    return round(sign * order + seconds / DECAY_SECONDS, 7)
+
+
+def refresh_scores(batch_size=500):
+    """
+    Recompute hot/top scores for posts whose reactions changed since they were last scored.
+
+    Each batch is one SELECT and one executemany UPDATE. The UPDATE only clears the dirty
+    flag if the counters still match what was read, so a reaction that lands mid-batch
+    leaves the post dirty for the next run. Returns the number of posts rescored.
+    """
+    refreshed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Post.id, Post.like_count, Post.dislike_count, Post.comment_count, Post.date_posted)
+            .where(Post.score_dirty.is_(True), Post.id > last_id)
+            .order_by(Post.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        params = [{
+            'b_id': row.id,
+            'b_likes': row.like_count,
+            'b_dislikes': row.dislike_count,
+            'b_comments': row.comment_count,
+            'b_hot': hot_score(row.like_count, row.dislike_count, row.comment_count, row.date_posted),
+            'b_top': row.like_count - row.dislike_count,
+        } for row in rows]
+
+        db.session.execute(
+            update(Post.__table__)
+            .where(and_(
+                Post.__table__.c.id == bindparam('b_id'),
+                Post.__table__.c.like_count == bindparam('b_likes'),
+                Post.__table__.c.dislike_count == bindparam('b_dislikes'),
+                Post.__table__.c.comment_count == bindparam('b_comments'),
+            ))
+            .values(hot_score=bindparam('b_hot'), top_score=bindparam('b_top'), score_dirty=False),
+            params
+        )
+        db.session.commit()
+
+        refreshed += len(rows)
+        last_id = rows[-1].id
+
+    return refreshed
+
+
+# -------------------------------
+# Reading Ranked Pages
+# -------------------------------
+def ranked_posts(sort='new', window=None, after=None, per_page=20):
+    """
+    Return one page of posts for the explore page as (posts, next_cursor).
+
+    `hot` and `top` are served from the indexed precomputed score columns; `new` orders
+    by post time. `window` limits any sort to posts from the last day or week.
+    """
+    query = Post.query
+    if window in WINDOWS:
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - WINDOWS[window]
+        query = query.filter(Post.date_posted >= since)
+
+    if sort == 'hot':
+        return paginate_keyset(query, Post.hot_score, Post.id, after=after, per_page=per_page, parse=float)
+    if sort == 'top':
+        return paginate_keyset(query, Post.top_score, Post.id, after=after, per_page=per_page, parse=int)
+    return paginate_keyset(query, Post.date_posted, Post.id, after=after, per_page=per_page)
@@ -0,0 +1,287 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+# Importing threading/time for the background flusher, atexit for flushing on shutdown,
+# and collection helpers for the in-memory buffer.
+
+from sqlalchemy import bindparam, delete, select, tuple_, update
+# Importing SQL expression helpers for the batched multi-row statements.
+
+from app import db
+from app.counters import REACTION_COUNTERS
+from app.models import Post, Reaction
+from app.reactions import KINDS, _insert, post_reaction_state
+
+
+# Importing the database instance, the reaction model and the shared reaction helpers.
+
+
+@dataclass
+class PendingReaction:
+    """A user's reaction to one post as stored in the database (`original`) and as last toggled (`current`)."""
+    original: str | None
+    current: str | None
+
+
+# -------------------------------
+# Write-behind Reaction Buffer
+# -------------------------------
+class ReactionBuffer:
+    """
+    Coalesces post like/dislike toggles in memory and writes them in batches.
+
+    Toggles by the same user on the same post collapse into a single pending change
+    (toggling twice cancels out). A background thread flushes every `interval_ms`
+    milliseconds, or sooner once `max_events` toggles have been buffered. Use
+    `stats()` to read buffer depth and flush latency counters.
+    """
+
+    def __init__(self, app, interval_ms=200, max_events=500):
+        self.app = app
+        self.interval = interval_ms / 1000
+        self.max_events = max_events
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+        self._pending = {}
+        # (user_id, post_id) -> PendingReaction, waiting for the next flush.
+        self._deltas = defaultdict(lambda: [0, 0])
+        # post_id -> [likes, dislikes] not yet written to the cached counters.
+        self._flushing = {}
+        self._flushing_deltas = {}
+        # Snapshot currently being written, still counted until its transaction commits.
+        self._events = 0
+
+        self._stats = {
+            'toggles': 0,
+            'flushes': 0,
+            'flushed_reactions': 0,
+            'flush_errors': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    # -------------------------------
+    # Request Path
+    # -------------------------------
+    def toggle(self, user_id, post_id, reaction):
+        """
+        Buffer a like/dislike toggle and return the (likes, dislikes) deltas still pending for the post.
+
+        Add the deltas to the post's stored counters to get the totals the user should see.
+        """
+        key = (user_id, post_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                in_flight = self._flushing.get(key)
+                original = in_flight.current if in_flight else None
+                entry = PendingReaction(original, original)
+                needs_state = in_flight is None
+            else:
+                needs_state = False
+
+        if needs_state:
+            state = post_reaction_state(user_id, post_id)
+            # Read the stored reaction outside the lock; only the first toggle per flush window pays for it.
+            entry = PendingReaction(state, state)
+
+        with self._lock:
+            entry = self._pending.setdefault(key, entry)
+            new = None if entry.current == reaction else reaction
+
+            deltas = self._deltas[post_id]
+            for kind, index in (('like', 0), ('dislike', 1)):
+                deltas[index] += (new == kind) - (entry.current == kind)
+            entry.current = new
+
+            if entry.current == entry.original:
+                del self._pending[key]
+                # Toggled back to the stored state: nothing left to write.
+
+            self._events += 1
+            self._stats['toggles'] += 1
+            if self._events >= self.max_events:
+                self._wake.set()
+
+            return self._pending_deltas(post_id)
+
+    def apply(self, user_id, operations):
+        """
+        Buffer a list of (post_id, reaction) toggles and return {post_id: (likes, dislikes)} as the user should see them.
+
+        Operations on posts that no longer exist are skipped.
+        """
+        stored = {
+            row.id: row for row in db.session.execute(
+                select(Post.id, Post.like_count, Post.dislike_count)
+                .where(Post.id.in_({post_id for post_id, _ in operations}))
+            )
+        }
+        for post_id, reaction in operations:
+            if post_id in stored:
+                self.toggle(user_id, post_id, reaction)
+
+        counts = {}
+        for post_id, row in stored.items():
+            pending_likes, pending_dislikes = self.pending_deltas(post_id)
+            counts[post_id] = (row.like_count + pending_likes, row.dislike_count + pending_dislikes)
+        return counts
+
+    def _pending_deltas(self, post_id):
+        """Sum the buffered and in-flight counter deltas for a post. Caller holds the lock."""
+        likes, dislikes = self._deltas.get(post_id, (0, 0))
+        flushing_likes, flushing_dislikes = self._flushing_deltas.get(post_id, (0, 0))
+        return likes + flushing_likes, dislikes + flushing_dislikes
+
+    def pending_deltas(self, post_id):
+        """Return the (likes, dislikes) deltas not yet written to the post's cached counters."""
+        with self._lock:
+            return self._pending_deltas(post_id)
+
+    # -------------------------------
+    # Flushing
+    # -------------------------------
+    def flush(self):
+        """Write every buffered change in one transaction of batched statements. Returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    self._deltas.clear()
+                    self._events = 0
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+                self._flushing_deltas = {post_id: tuple(d) for post_id, d in self._deltas.items()}
+                self._deltas = defaultdict(lambda: [0, 0])
+                self._events = 0
+
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    self._write(self._flushing)
+            except Exception as e:
+                self.app.logger.error(f"Error flushing reaction buffer: {e}")
+                with self._lock:
+                    self._stats['flush_errors'] += 1
+                    self._requeue()
+                return 0
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                written = len(self._flushing)
+                self._flushing, self._flushing_deltas = {}, {}
+                self._stats['flushes'] += 1
+                self._stats['flushed_reactions'] += written
+                self._stats['last_flush_ms'] = elapsed_ms
+                self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+                self._stats['total_flush_ms'] += elapsed_ms
+            return written
+
+    def _requeue(self):
+        """Put a failed snapshot back in front of anything buffered since. Caller holds the lock."""
+        for key, entry in self._flushing.items():
+            newer = self._pending.get(key)
+            if newer is None:
+                self._pending[key] = entry
+            else:
+                newer.original = entry.original
+                # The newer toggles were based on the in-flight state; they now start from what is really stored.
+                if newer.current == newer.original:
+                    del self._pending[key]
+        for post_id, (likes, dislikes) in self._flushing_deltas.items():
+            self._deltas[post_id][0] += likes
+            self._deltas[post_id][1] += dislikes
+        self._flushing, self._flushing_deltas = {}, {}
+
+    def _write(self, changes):
+        """Apply a snapshot of changes with one DELETE, one INSERT and one counter UPDATE."""
+        keys = [(post_id, user_id) for user_id, post_id in changes]
+        rows = [
+            {'target_type': Reaction.POST, 'target_id': post_id, 'user_id': user_id, 'kind': KINDS[entry.current]}
+            for (user_id, post_id), entry in changes.items() if entry.current
+        ]
+
+        deltas = defaultdict(lambda: {'likes': 0, 'dislikes': 0})
+        removed = db.session.execute(
+            delete(Reaction)
+            .where(Reaction.target_type == Reaction.POST, tuple_(Reaction.target_id, Reaction.user_id).in_(keys))
+            .returning(Reaction.target_id, Reaction.kind)
+            .execution_options(synchronize_session=False)
+        )
+        for post_id, kind in removed:
+            deltas[post_id][REACTION_COUNTERS[kind]] -= 1
+        # Clear every touched reaction first; RETURNING reports what was really stored.
+
+        if rows:
+            added = db.session.execute(
+                _insert().values(rows)
+                .on_conflict_do_nothing(index_elements=['target_type', 'target_id', 'user_id'])
+                .returning(Reaction.target_id, Reaction.kind)
+            )
+            for post_id, kind in added:
+                deltas[post_id][REACTION_COUNTERS[kind]] += 1
+        # Counting the rows actually deleted and inserted keeps the counters exact even if another
+        # request touched the same reactions directly.
+
+        params = [
+            {'b_id': post_id, 'b_likes': d['likes'], 'b_dislikes': d['dislikes']}
+            for post_id, d in deltas.items() if d['likes'] or d['dislikes']
+        ]
+        if params:
+            post = Post.__table__
+            db.session.execute(
+                update(post)
+                .where(post.c.id == bindparam('b_id'))
+                .values(
+                    like_count=post.c.like_count + bindparam('b_likes'),
+                    dislike_count=post.c.dislike_count + bindparam('b_dislikes'),
+                    score_dirty=True,
+                ),
+                params
+            )
+        db.session.commit()
+
+    # -------------------------------
+    # Background Thread
+    # -------------------------------
+    def start(self):
+        """Start the background flusher and make sure buffered work is flushed at interpreter exit."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='reaction-buffer', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Stop the background flusher and write whatever is still buffered."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    # -------------------------------
+    # Metrics
+    # -------------------------------
+    def stats(self):
+        """Return buffer depth and flush counters for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['depth'] = len(self._pending)
+            stats['in_flight'] = len(self._flushing)
+            stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
@@ -0,0 +1,220 @@
+from sqlalchemy import column, delete, func, inspect, literal, select, table, update
+from sqlalchemy.dialects import postgresql, sqlite
+# Importing SQL expression helpers and the dialect-specific INSERT constructs that support ON CONFLICT.
+
+from app import db
+from app.counters import REACTION_COUNTERS, adjust_post_counters
+from app.models import Post, Comment, Reaction
+
+
+# Importing the database instance, the cached counter helpers and the reaction model.
+
+# Maps the models users can react to onto `Reaction.target_type`.
+TARGET_TYPES = {
+    Post: Reaction.POST,
+    Comment: Reaction.COMMENT,
+}
+
+# Maps reaction names used by routes and templates onto `Reaction.kind`, and back.
+KINDS = {'like': Reaction.LIKE, 'dislike': Reaction.DISLIKE}
+KIND_NAMES = {kind: name for name, kind in KINDS.items()}
+
+OPPOSITE = {Reaction.LIKE: Reaction.DISLIKE, Reaction.DISLIKE: Reaction.LIKE}
+# A user holds at most one reaction per target, so the row being replaced is always the other kind.
+
+
+def _insert():
+    """Build an INSERT into reactions that supports ON CONFLICT (SQLite under tests, PostgreSQL otherwise)."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(Reaction)
+    return postgresql.insert(Reaction)
+
+
+def _key(target_type, target_id, user_id):
+    """WHERE clause for one (target_type, target_id, user_id) primary key."""
+    return (Reaction.target_type == target_type, Reaction.target_id == target_id, Reaction.user_id == user_id)
+
+
+# -------------------------------
+# Single-statement Reaction Writes
+# -------------------------------
+def _insert_row(target_type, target_id, user_id, kind):
+    """INSERT ... ON CONFLICT DO NOTHING RETURNING kind. Returns True if a row was inserted."""
+    stmt = _insert().values(
+        target_type=target_type, target_id=target_id, user_id=user_id, kind=kind
+    ).on_conflict_do_nothing(
+        index_elements=['target_type', 'target_id', 'user_id']
+    ).returning(Reaction.kind)
+    return db.session.execute(stmt).first() is not None
+    # RETURNING yields a row only if the insert happened; an existing or concurrent reaction yields nothing.
+
+
+def _delete_row(target_type, target_id, user_id, kind):
+    """DELETE ... RETURNING kind for a reaction of `kind`. Returns True if a row was deleted."""
+    return db.session.execute(
+        delete(Reaction)
+        .where(*_key(target_type, target_id, user_id), Reaction.kind == kind)
+        .returning(Reaction.kind)
+        .execution_options(synchronize_session=False)
+    ).first() is not None
+
+
+def _switch_row(target_type, target_id, user_id, kind):
+    """UPDATE ... SET kind RETURNING kind, turning the opposite reaction into `kind`. Returns True if switched."""
+    return db.session.execute(
+        update(Reaction)
+        .where(*_key(target_type, target_id, user_id), Reaction.kind != kind)
+        .values(kind=kind)
+        .returning(Reaction.kind)
+        .execution_options(synchronize_session=False)
+    ).first() is not None
+    # Switching like <-> dislike rewrites one row in place instead of a delete in one table and an insert in another.
+
+
+def _adjust(target_type, target_id, added=None, removed=None):
+    """Apply the counter deltas for one reaction change with a single UPDATE. Returns the post's new totals."""
+    if target_type != Reaction.POST:
+        return None
+    # Only posts keep cached reaction counters.
+
+    deltas = {'likes': 0, 'dislikes': 0}
+    if added is not None:
+        deltas[REACTION_COUNTERS[added]] += 1
+    if removed is not None:
+        deltas[REACTION_COUNTERS[removed]] -= 1
+    return adjust_post_counters(target_id, **deltas)
+
+
+def add_reaction(target_type, target_id, user_id, kind=Reaction.LIKE):
+    """
+    Set a user's reaction to `kind` unless it already is. Returns True if anything changed.
+
+    The cached post counters are adjusted in the same transaction; the caller commits.
+    """
+    if _insert_row(target_type, target_id, user_id, kind):
+        _adjust(target_type, target_id, added=kind)
+        return True
+    if _switch_row(target_type, target_id, user_id, kind):
+        _adjust(target_type, target_id, added=kind, removed=OPPOSITE[kind])
+        return True
+    return False
+
+
+def remove_reaction(target_type, target_id, user_id, kind=Reaction.LIKE):
+    """
+    Remove a user's reaction of `kind` if it exists. Returns True if a row was deleted.
+
+    The cached post counters are adjusted in the same transaction; the caller commits.
+    """
+    removed = _delete_row(target_type, target_id, user_id, kind)
+    if removed:
+        _adjust(target_type, target_id, removed=kind)
+    return removed
+
+
+def _toggle(target_type, target_id, user_id, kind):
+    """
+    Flip a reaction of `kind` on or off. Returns (now_on, counts); counts is None if nothing changed.
+
+    Each outcome writes one row: a DELETE if the reaction was on, an UPDATE if the opposite
+    reaction was on, otherwise an INSERT. If a concurrent request inserted the same reaction
+    first, the insert is a no-op and the reaction simply stays on.
+    """
+    if _delete_row(target_type, target_id, user_id, kind):
+        return False, _adjust(target_type, target_id, removed=kind)
+    if _switch_row(target_type, target_id, user_id, kind):
+        return True, _adjust(target_type, target_id, added=kind, removed=OPPOSITE[kind])
+    if _insert_row(target_type, target_id, user_id, kind):
+        return True, _adjust(target_type, target_id, added=kind)
+    return True, None
+
+
+def toggle_reaction(target_type, target_id, user_id, kind=Reaction.LIKE):
+    """Flip a reaction on or off. Returns True if it is now on. The caller commits."""
+    now_on, _ = _toggle(target_type, target_id, user_id, kind)
+    return now_on
+
+
+def toggle_post_reaction(post_id, user_id, reaction):
+    """
+    Toggle a like or dislike on a post, replacing the opposite reaction when turning one on.
+
+    Returns the post's new (like_count, dislike_count, comment_count), or None if nothing
+    changed (e.g. a concurrent request already applied the same toggle). The caller commits.
+    """
+    _, counts = _toggle(Reaction.POST, post_id, user_id, KINDS[reaction])
+    return counts
+    # The counter UPDATE ... RETURNING applies the deltas and reads back the new totals.
+
+
+def apply_post_reactions(user_id, operations):
+    """
+    Apply a list of (post_id, reaction) toggles in order and return {post_id: (likes, dislikes)}.
+
+    Operations on posts that no longer exist are skipped. Every toggle joins the caller's
+    transaction, and the final totals for all affected posts are read back with one query.
+    """
+    post_ids = {post_id for post_id, _ in operations}
+    existing = set(db.session.execute(select(Post.id).where(Post.id.in_(post_ids))).scalars())
+
+    for post_id, reaction in operations:
+        if post_id in existing:
+            toggle_post_reaction(post_id, user_id, reaction)
+
+    rows = db.session.execute(
+        select(Post.id, Post.like_count, Post.dislike_count).where(Post.id.in_(existing))
+    )
+    return {row.id: (row.like_count, row.dislike_count) for row in rows}
+
+
+def post_reaction_state(user_id, post_id):
+    """Return 'like', 'dislike' or None for a user's stored reaction to a post, with one primary key probe."""
+    kind = db.session.execute(
+        select(Reaction.kind).where(*_key(Reaction.POST, post_id, user_id))
+    ).scalar()
+    return KIND_NAMES.get(kind)
+
+
+# -------------------------------
+# Maintenance
+# -------------------------------
+# Tables that held reactions before the unified `reactions` table: (name, target column, target type, kind).
+LEGACY_TABLES = (
+    ('post_likes', 'post_id', Reaction.POST, Reaction.LIKE),
+    ('post_dislikes', 'post_id', Reaction.POST, Reaction.DISLIKE),
+    ('comment_likes', 'comment_id', Reaction.COMMENT, Reaction.LIKE),
+)
+
+
+def migrate_legacy_reactions(batch_size=1000, drop=False):
+    """
+    Copy rows from the old post_likes/post_dislikes/comment_likes tables into `reactions`.
+
+    Rows are copied with INSERT ... SELECT in id ranges of `batch_size`, each range in its
+    own transaction. Duplicates (and a like and dislike by the same user on the same post)
+    collapse onto the primary key, first one wins. Missing legacy tables are skipped, so
+    the command can be re-run safely. With `drop`, each legacy table is dropped once copied.
+    Returns the number of rows copied; run `flask counters repair` afterwards.
+    """
+    copied = 0
+    for name, target, target_type, kind in LEGACY_TABLES:
+        if not inspect(db.engine).has_table(name):
+            continue
+
+        legacy = table(name, column('id'), column('user_id'), column(target), column('timestamp'))
+        last_id = db.session.execute(select(func.max(legacy.c.id))).scalar() or 0
+        for start in range(0, last_id, batch_size):
+            rows = select(
+                literal(target_type), legacy.c[target], legacy.c.user_id, literal(kind), legacy.c.timestamp
+            ).where(legacy.c.id > start, legacy.c.id <= start + batch_size)
+            # The WHERE clause also keeps SQLite from reading ON CONFLICT as part of the SELECT.
+
+            copied += db.session.execute(
+                _insert().from_select(['target_type', 'target_id', 'user_id', 'kind', 'created_at'], rows)
+                .on_conflict_do_nothing(index_elements=['target_type', 'target_id', 'user_id'])
+            ).rowcount
+            db.session.commit()
+
+        if drop:
+            db.Table(name, db.MetaData()).drop(db.engine)
+    return copied
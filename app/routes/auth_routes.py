@@ -1,8 +1,8 @@
 # app/routes/auth_routes.py
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, session
 # Importing necessary Flask utilities for Blueprint, rendering templates, redirecting, flashing messages,
-# handling requests, and accessing the current app context.
+# handling requests, accessing the current app context, and the session.
 
 from app.forms import LoginForm, RegistrationForm
 # Importing custom form classes for login and registration functionality.
@@ -10,8 +10,11 @@ from app.forms import LoginForm, RegistrationForm
 from app.models import User
 # Importing the User model for interacting with the database.
 
-from app import db, bcrypt
-# Importing the database instance (db) and bcrypt for password hashing and verification.
+from app import db, autocomplete
+from app.passwords import get_hasher, PasswordHasherBusy
+from app.sessions import regenerate
+# Importing the database instance (db), the username autocomplete cache, the password hashing service,
+# which runs bcrypt in a bounded process pool, and session id rotation for server-side sessions.
 
 from flask_login import login_user, logout_user, login_required, current_user
 
@@ -35,8 +38,8 @@ def register():
 
         if form.validate_on_submit():
             # If the form is valid upon submission:
-            hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
-            # Hash the user's password securely using bcrypt.
+            hashed_password = get_hasher().hash_password(form.password.data)
+            # Hash the user's password with bcrypt in the hashing pool, at the configured cost.
 
             user = User(username=form.username.data, email=form.email.data, password_hash=hashed_password)
             # Create a new User object with the submitted data.
@@ -47,6 +50,9 @@ def register():
             db.session.commit()
             # Commit the transaction to save the user to the database.
 
+            autocomplete.on_username_added(user.username)
+            # Make the new username suggestible right away in this process.
+
             flash('Your account has been created! You can now log in.', 'success')
             # Flash a success message to the user.
 
@@ -56,6 +62,11 @@ def register():
         return render_template('authentication/register.html', form=form)
         # Render the registration template and pass the form to it.
 
+    except PasswordHasherBusy:
+        flash('We are handling a lot of sign-ups right now. Please try again in a moment.', 'warning')
+        return render_template('authentication/register.html', form=form), 503
+        # Every hashing slot stayed busy; ask the user to retry instead of piling onto the pool.
+
     except Exception as e:
         current_app.logger.error(f"Error during registration: {e}")
         # Log any exceptions that occur during registration.
@@ -80,8 +91,14 @@ def login():
             user = User.query.filter_by(email=form.email.data).first()
             # Query the database for a user with the submitted email address.
 
-            if user and bcrypt.check_password_hash(user.password_hash, form.password.data):
+            if user and get_hasher().verify_and_upgrade(user, form.password.data):
                 # Check if the user exists and the submitted password matches the stored hash.
+                db.session.commit()
+                # Save the re-hashed password if the stored one used an outdated cost factor.
+
+                regenerate(session)
+                # Issue a fresh session id so an id planted before login cannot be reused.
+
                 login_user(user, remember=form.remember.data)
                 # Log in the user and handle the 'remember me' option.
 
@@ -101,6 +118,11 @@ def login():
         return render_template('authentication/login.html', form=form)
         # Render the login template and pass the form to it.
 
+    except PasswordHasherBusy:
+        flash('We are handling a lot of logins right now. Please try again in a moment.', 'warning')
+        return render_template('authentication/login.html', form=form), 503
+        # Every hashing slot stayed busy; ask the user to retry instead of piling onto the pool.
+
     except Exception as e:
         current_app.logger.error(f"Error during login: {e}")
         # Log any exceptions that occur during login.
@@ -117,6 +139,9 @@ def logout():
         logout_user()
         # Log out the current user and end their session.
 
+        regenerate(session)
+        # Retire the logged-in session id.
+
         flash('You have been logged out.', 'info')
         # Flash an informational message to the user.
 
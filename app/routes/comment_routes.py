@@ -19,6 +19,9 @@ from app.models import Comment, Post
 from app import db
 # Importing the database instance for managing database operations.
 
+from app.counters import adjust_post_counters
+# Importing the helper that keeps a post's cached comment counter up to date.
+
 comment_bp = Blueprint('comment', __name__, url_prefix='/comments')
 # Creating a Blueprint for comment-related routes, with a URL prefix of '/comments'.
 
@@ -52,6 +55,9 @@ def create_comment(post_id):
             db.session.add(comment)
             # Add the new comment to the database session.
 
+            adjust_post_counters(post_id, comments=1)
+            # Bump the post's cached comment counter in the same transaction.
+
             db.session.commit()
             # Commit the transaction to save the comment to the database.
 
@@ -85,7 +91,7 @@ def update_comment(comment_id):
         comment = Comment.query.get_or_404(comment_id)
         # Retrieve the comment to be updated or return a 404 error.
 
-        if comment.comment_author != current_user:
+        if comment.author != current_user:
             # Ensure that only the author of the comment can edit it.
             abort(403)  # Return a 403 Forbidden error if the user is not the author.
 
@@ -131,13 +137,16 @@ def delete_comment(comment_id):
         comment = Comment.query.get_or_404(comment_id)
         # Retrieve the comment to be deleted or return a 404 error.
 
-        if comment.comment_author != current_user:
+        if comment.author != current_user:
             # Ensure that only the author of the comment can delete it.
             abort(403)  # Return a 403 Forbidden error if the user is not the author.
 
         db.session.delete(comment)
         # Mark the comment for deletion.
 
+        adjust_post_counters(comment.post_id, comments=-1)
+        # Decrement the post's cached comment counter in the same transaction.
+
         db.session.commit()
         # Commit the transaction to remove the comment from the database.
 
@@ -5,8 +5,8 @@ from flask import Blueprint, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
 # Importing Flask-Login utilities to restrict access to authenticated users and retrieve the current user.
 
-from app.models import Post, PostLike, Comment, CommentLike
-# Importing database models for posts, post likes, comments, and comment likes.
+from app.models import Post, Comment
+# Importing database models for posts and comments.
 
 from app.utils import add_like, remove_like
 # Importing utility functions for handling like and unlike operations.
@@ -22,7 +22,7 @@ def like_post(post_id):
         post = Post.query.get_or_404(post_id)
         # Retrieve the post by its ID or return a 404 error if it doesn't exist.
 
-        if add_like(current_user, Post, PostLike, post_id):
+        if add_like(current_user, Post, post_id):
             # Attempt to add a like for the post. If successful:
             flash('Post liked!', 'success')
             # Flash a success message.
@@ -46,7 +46,7 @@ def like_post(post_id):
 def unlike_post(post_id):
     """Route for unliking a post."""
     try:
-        if remove_like(current_user, PostLike, post_id):
+        if remove_like(current_user, Post, post_id):
             # Attempt to remove a like for the post. If successful:
             flash('Post unliked.', 'success')
             # Flash a success message.
@@ -73,7 +73,7 @@ def like_comment(comment_id):
         comment = Comment.query.get_or_404(comment_id)
         # Retrieve the comment by its ID or return a 404 error if it doesn't exist.
 
-        if add_like(current_user, Comment, CommentLike, comment_id):
+        if add_like(current_user, Comment, comment_id):
             # Attempt to add a like for the comment. If successful:
             flash('Comment liked!', 'success')
             # Flash a success message.
@@ -100,7 +100,7 @@ def unlike_comment(comment_id):
         comment = Comment.query.get_or_404(comment_id)
         # Retrieve the comment by its ID or return a 404 error if it doesn't exist.
 
-        if remove_like(current_user, CommentLike, comment_id):
+        if remove_like(current_user, Comment, comment_id):
             # Attempt to remove a like for the comment. If successful:
             flash('Comment unliked.', 'success')
             # Flash a success message.
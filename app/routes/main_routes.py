@@ -1,6 +1,6 @@
 # app/routes/main_routes.py
 
-from flask import Blueprint, render_template, request, current_app, redirect, url_for, flash
+from flask import Blueprint, render_template, request, current_app, redirect, url_for, flash, abort
 # Importing Flask utilities for blueprint creation, rendering templates, handling requests,
 # accessing the current app context, redirects, URL generation, and flashing messages.
 
@@ -13,9 +13,15 @@ from app.forms import CreatePostForm
 from app.models import Post, User
 # Importing the database models for posts and users.
 
-from app import db
+from app.pagination import paginate_keyset, get_page_size
+# Importing keyset pagination helpers so feeds only load one bounded page at a time.
 
-# Importing the database instance for handling database operations.
+from app.feed import hydrate_posts, current_viewer_id
+# Importing the feed hydration layer that batches author and reaction lookups for a page of posts.
+
+from app import db, timeline, ranking, suggestions, search, tags
+
+# Importing the database instance for handling database operations and the timeline fan-out helpers.
 
 main_bp = Blueprint('main', __name__)
 
@@ -26,11 +32,17 @@ main_bp = Blueprint('main', __name__)
 def home():
     """Render the home page with recent posts."""
     try:
-        posts = Post.query.order_by(Post.date_posted.desc()).all()
-        # Fetch all posts from the database, ordered by the most recent first.
+        posts, next_cursor = paginate_keyset(
+            Post.query, Post.date_posted, Post.id,
+            after=request.args.get('after'), per_page=get_page_size()
+        )
+        # Fetch one page of posts, most recent first, starting after the `?after=` cursor if given.
+
+        posts = hydrate_posts(posts, current_viewer_id(current_user))
+        # Load authors and the viewer's reactions for the whole page in a fixed number of queries.
 
-        return render_template('home.html', posts=posts)
-        # Render the home page template and pass the posts to it.
+        return render_template('home.html', posts=posts, next_cursor=next_cursor)
+        # Render the home page template and pass the posts and the cursor for the next page to it.
 
     except Exception as e:
         current_app.logger.error(f"Error loading home page: {e}")
@@ -71,6 +83,12 @@ def explore():
             db.session.add(post)
             # Add the new post to the database session.
 
+            tags.set_post_tags(post, form.tags.data)
+            # Store the normalized tags; this also flushes, assigning the post an id before fanning it out.
+
+            timeline.fan_out_post(post)
+            # Copy the post into followers' timelines within the same transaction.
+
             db.session.commit()
             # Commit the transaction to save the post to the database.
 
@@ -91,11 +109,26 @@ def explore():
             # Flash an error message to the user.
 
     try:
-        posts = Post.query.order_by(Post.date_posted.desc()).all()
-        # Fetch all posts from the database, ordered by the most recent first.
+        sort = request.args.get('sort', 'new')
+        sort = sort if sort in ranking.SORTS else 'new'
+        window = request.args.get('window')
+        window = window if window in ranking.WINDOWS else None
+        # Read the requested ranking mode and time window, falling back to the newest posts.
 
-        return render_template('explore.html', posts=posts, form=form)
-        # Render the explore page template, passing the posts and the form to it.
+        posts, next_cursor = ranking.ranked_posts(
+            sort, window, after=request.args.get('after'), per_page=get_page_size()
+        )
+        # Fetch one page of posts from the precomputed ranking index, starting after the `?after=` cursor if given.
+
+        posts = hydrate_posts(posts, current_user.id)
+        # Load authors and the viewer's reactions for the whole page in a fixed number of queries.
+
+        people = suggestions.suggestions_for(current_user.id)
+        # Precomputed follow suggestions, read with one indexed range scan.
+
+        return render_template('explore.html', posts=posts, form=form, next_cursor=next_cursor,
+                               sort=sort, window=window, suggestions=people)
+        # Render the explore page template, passing the posts, the form and the next page cursor to it.
 
     except Exception as e:
         current_app.logger.error(f"Error loading explore page: {e}")
@@ -103,3 +136,75 @@ def explore():
 
         return render_template('error.html', message="An error occurred while loading the explore page."), 500
         # Render an error page with a 500 status code if an exception is caught.
+
+
+@main_bp.route('/following')
+@login_required  # Restricts access to authenticated users only.
+def following():
+    """Render the feed of posts from users the current user follows."""
+    try:
+        posts, next_cursor = timeline.following_feed(
+            current_user.id, after=request.args.get('after'), per_page=get_page_size()
+        )
+        # Read one page of the current user's materialized timeline.
+
+        posts = hydrate_posts(posts, current_user.id)
+        # Load authors and the viewer's reactions for the whole page in a fixed number of queries.
+
+        return render_template('following.html', posts=posts, next_cursor=next_cursor)
+        # Render the following feed template with the page of posts and the next page cursor.
+
+    except Exception as e:
+        current_app.logger.error(f"Error loading following feed: {e}")
+        # Log any exceptions that occur while reading the timeline or rendering the template.
+
+        return render_template('error.html', message="An error occurred while loading your feed."), 500
+        # Render an error page with a 500 status code if an exception is caught.
+
+
+@main_bp.route('/search')
+def search_posts():
+    """Render ranked full-text search results over posts and comments."""
+    try:
+        query = request.args.get('q', '').strip()
+        # Read the search terms from the `?q=` query string.
+
+        results, next_cursor = search.search(query, after=request.args.get('after'), per_page=get_page_size())
+        # Fetch one ranked page of matching posts and comments, starting after the `?after=` cursor if given.
+
+        return render_template('search.html', query=query, results=results, next_cursor=next_cursor)
+        # Render the results page with highlighted snippets and the cursor for the next page.
+
+    except Exception as e:
+        current_app.logger.error(f"Error running search: {e}")
+        # Log any exceptions that occur while querying the index or rendering the template.
+
+        return render_template('error.html', message="An error occurred while searching."), 500
+        # Render an error page with a 500 status code if an exception is caught.
+
+
+@main_bp.route('/tags/<name>')
+def tag_feed(name):
+    """Render the feed of posts carrying one tag."""
+    tag = tags.get_tag(name)
+    if tag is None:
+        abort(404)
+        # Return a 404 error if no post has ever used the tag.
+
+    try:
+        posts, next_cursor = tags.tag_feed(tag.id, after=request.args.get('after'), per_page=get_page_size())
+        # Fetch one page of the tag's posts, newest first, starting after the `?after=` cursor if given.
+
+        posts = hydrate_posts(posts, current_viewer_id(current_user))
+        # Load authors and the viewer's reactions for the whole page in a fixed number of queries.
+
+        return render_template('tag.html', tag=tag, posts=posts, next_cursor=next_cursor,
+                               popular=tags.popular_tags())
+        # Render the tag feed with the next page cursor and the most used tags.
+
+    except Exception as e:
+        current_app.logger.error(f"Error loading tag feed for {name}: {e}")
+        # Log any exceptions that occur while reading the feed or rendering the template.
+
+        return render_template('error.html', message="An error occurred while loading the tag feed."), 500
+        # Render an error page with a 500 status code if an exception is caught.
@@ -0,0 +1,49 @@
+# app/routes/metrics_routes.py
+
+import hmac
+import os
+# Importing a constant-time comparison for the metrics token, and os for the worker's process id.
+
+from flask import Blueprint, request, current_app, jsonify, abort
+# Importing Flask utilities for blueprint creation, reading the Authorization header, settings,
+# JSON responses and aborting.
+
+from app import db_pool
+# Importing the connection pool metrics.
+
+metrics_bp = Blueprint('metrics', __name__)
+# Creating a Blueprint for the monitoring endpoint.
+
+SERVICE_STATS = {
+    'password_hasher': 'passwords',
+    'user_cache': 'user_cache',
+    'moderation': 'moderation',
+    'moderation_workers': 'moderation_workers',
+    'avatars': 'avatars',
+    'reaction_buffer': 'reaction_buffer',
+}
+# app.extensions key -> name in the response, for every per-process service with a stats() method.
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Return this worker process's pool and service counters as JSON (requires the METRICS_TOKEN bearer token)."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        abort(404)
+        # Disabled unless a token is configured.
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), f"Bearer {token}".encode('utf-8')):
+        abort(401)
+
+    try:
+        response = {'pid': os.getpid(), 'db_pool': db_pool.stats()}
+        # Each gunicorn worker has its own pool, so scrape every worker (or sum checkouts by pid).
+        for key, name in SERVICE_STATS.items():
+            service = current_app.extensions.get(key)
+            if service is not None:
+                response[name] = service.stats()
+        return jsonify(response), 200
+    except Exception as e:
+        current_app.logger.error(f"Error collecting metrics: {e}")
+        return jsonify({'error': 'An error occurred.'}), 500
@@ -0,0 +1,113 @@
+# app/routes/moderation_routes.py
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, abort
+# Importing Flask utilities for blueprint creation, template rendering, redirects, flashing messages,
+# handling requests, logging errors and aborting.
+
+from flask_login import login_required, current_user
+# Importing Flask-Login utilities for protecting routes and accessing the currently logged-in user.
+
+from app import db, moderation_queue, timeline, tags
+# Importing the database instance, the moderation review queue, and the timeline and tag helpers
+# needed when a flagged post is removed.
+
+from app.counters import adjust_post_counters
+# Importing the helper that keeps a post's cached comment counter up to date.
+
+from app.pagination import get_page_size
+# Importing the helper that reads and clamps the requested page size.
+
+moderation_bp = Blueprint('moderation', __name__, url_prefix='/moderation')
+# Creating a Blueprint for the reviewer queue, with a URL prefix of '/moderation'.
+
+
+def _get_flagged(kind, item_id):
+    """Return the flagged post or comment under review, or abort with 403/404."""
+    if not current_user.is_moderator:
+        abort(403)
+        # Only reviewers may see or act on the queue.
+    if kind not in moderation_queue.REVIEW_MODELS:
+        abort(404)
+    model = moderation_queue.REVIEW_MODELS[kind]
+    return model.query.filter(model.id == item_id, model.is_flagged).first_or_404()
+    # Items that are not (or no longer) flagged are not in the queue, so they cannot be approved or removed here.
+
+
+@moderation_bp.route('/queue')
+@login_required
+def review_queue():
+    """List flagged posts or comments, oldest first, one page at a time."""
+    if not current_user.is_moderator:
+        abort(403)
+        # Only reviewers may see the queue.
+
+    kind = request.args.get('kind', 'comments')
+    kind = kind if kind in moderation_queue.REVIEW_MODELS else 'comments'
+    # Read which queue to show, falling back to comments.
+
+    try:
+        items, next_cursor = moderation_queue.review_queue(
+            kind, after=request.args.get('after'), per_page=get_page_size()
+        )
+        # Fetch one page from the partial index on is_flagged, starting after the `?after=` cursor if given.
+
+        return render_template('moderation/queue.html', kind=kind, items=items, next_cursor=next_cursor)
+
+    except Exception as e:
+        current_app.logger.error(f"Error loading the moderation queue: {e}")
+        # Log any exceptions that occur while loading the queue.
+
+        return render_template('error.html', message="An error occurred while loading the moderation queue."), 500
+
+
+@moderation_bp.route('/<string:kind>/<int:item_id>/approve', methods=['POST'])
+@login_required
+def approve(kind, item_id):
+    """Clear the flag on a post or comment."""
+    item = _get_flagged(kind, item_id)
+    try:
+        moderation_queue.approve(item)
+        db.session.commit()
+        # The item leaves the partial index and the queue with it.
+
+        flash('Approved.', 'success')
+        return redirect(url_for('moderation.review_queue', kind=kind))
+
+    except Exception as e:
+        current_app.logger.error(f"Error approving {kind} {item_id}: {e}")
+        # Log any exceptions that occur while approving.
+
+        db.session.rollback()
+        # Roll back the database transaction in case of an error.
+
+        return render_template('error.html', message="An error occurred while approving the item."), 500
+
+
+@moderation_bp.route('/<string:kind>/<int:item_id>/remove', methods=['POST'])
+@login_required
+def remove(kind, item_id):
+    """Delete a flagged post or comment."""
+    item = _get_flagged(kind, item_id)
+    try:
+        if kind == 'posts':
+            timeline.remove_post(item.id)
+            tags.remove_post(item.id)
+            # Remove the post from timelines and untag it, as the author's own delete does.
+        else:
+            adjust_post_counters(item.post_id, comments=-1)
+            # Decrement the post's cached comment counter in the same transaction.
+
+        db.session.delete(item)
+        db.session.commit()
+
+        flash('Removed.', 'info')
+        return redirect(url_for('moderation.review_queue', kind=kind))
+
+    except Exception as e:
+        current_app.logger.error(f"Error removing {kind} {item_id}: {e}")
+        # Log any exceptions that occur while removing.
+
+        db.session.rollback()
+        # Roll back the database transaction in case of an error.
+
+        return render_template('error.html', message="An error occurred while removing the item."), 500
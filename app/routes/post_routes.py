@@ -10,11 +10,21 @@ from flask_login import login_required, current_user
 from app.forms import CreatePostForm, CommentForm
 # Importing form classes for creating posts and comments.
 
-from app.models import Post, Comment, CommentLike, PostLike, PostDislike
+from app.models import Post, Comment, Reaction
 # Importing database models for posts, comments, and related like/dislike functionalities.
 
-from app import db
-# Importing the database instance for database operations.
+from app import db, timeline, reactions, tags
+# Importing the database instance for database operations, the timeline fan-out helpers,
+# the reaction toggles and the tag index.
+
+from app.utils import get_reacted_ids
+# Importing the helper that finds which of a page's posts or comments the viewer has reacted to.
+
+from app.counters import adjust_post_counters
+# Importing the helper that keeps a post's cached like/dislike/comment counters up to date.
+
+from app.comment_tree import load_comment_page, iter_tree
+# Importing the loader that fetches a page of a post's comment thread in a fixed number of queries.
 
 post_bp = Blueprint('post', __name__, url_prefix='/posts')
 # Creating a Blueprint named 'post' with a URL prefix of '/posts' for managing post-related routes.
@@ -35,6 +45,12 @@ def create_post():
             db.session.add(post)
             # Add the post to the database session.
 
+            tags.set_post_tags(post, form.tags.data)
+            # Store the normalized tags; this also flushes, assigning the post an id before fanning it out.
+
+            timeline.fan_out_post(post)
+            # Copy the post into followers' timelines within the same transaction.
+
             db.session.commit()
             # Commit the transaction to save the post to the database.
 
@@ -65,15 +81,6 @@ def post_detail(post_id):
     reply_form = CommentForm()
     # Instantiate forms for adding comments and replies.
 
-    liked_post = PostLike.query.filter_by(user_id=current_user.id, post_id=post.id).first()
-    # Check if the current user has liked the post.
-
-    liked_comments = {
-        comment.id: CommentLike.query.filter_by(user_id=current_user.id, comment_id=comment.id).first() is not None
-        for comment in post.comments
-    }
-    # Track whether the current user has liked each comment on the post.
-
     if comment_form.validate_on_submit():
         # If a new comment is submitted and valid:
         new_comment = Comment(content=comment_form.content.data, author_id=current_user.id, post_id=post.id)
@@ -82,6 +89,9 @@ def post_detail(post_id):
         db.session.add(new_comment)
         # Add the comment to the database session.
 
+        adjust_post_counters(post.id, comments=1)
+        # Bump the post's cached comment counter in the same transaction.
+
         db.session.commit()
         # Commit the transaction to save the comment.
 
@@ -91,13 +101,25 @@ def post_detail(post_id):
         return redirect(url_for('post.post_detail', post_id=post.id))
         # Redirect back to the post detail page.
 
-    comments = Comment.query.filter_by(post_id=post.id).order_by(Comment.date_posted.desc()).all()
-    # Fetch all comments for the post, ordered by most recent.
+    comments, next_comments_cursor = load_comment_page(
+        post.id,
+        per_page=current_app.config.get('COMMENTS_PAGE_SIZE', 20),
+        max_depth=current_app.config.get('COMMENT_TREE_MAX_DEPTH'),
+        max_nodes=current_app.config.get('COMMENT_TREE_MAX_NODES')
+    )
+    # Fetch the first page of top-level comments and a bounded slice of their replies; the rest load on demand.
+
+    liked_post = post.id in get_reacted_ids(current_user.id, Post, [post.id])
+    # Check if the current user has liked the post.
+
+    liked_comments = get_reacted_ids(current_user.id, Comment, [comment.id for comment in iter_tree(comments)])
+    # Set of ids of the loaded comments that the current user has liked, fetched with a single IN query.
 
     return render_template(
         'post/post_detail.html',
         post=post,
         comments=comments,
+        next_comments_cursor=next_comments_cursor,
         comment_form=comment_form,
         reply_form=reply_form,
         liked_post=liked_post,
@@ -105,44 +127,110 @@ def post_detail(post_id):
     )
     # Render the post detail template with all necessary data.
 
+@post_bp.route('/post/<int:post_id>/comments', methods=['GET'])
+@login_required
+def post_comments(post_id):
+    """Return the next page of comments, or of one comment's replies, as JSON."""
+    post = Post.query.get_or_404(post_id)
+    # Retrieve the post by its ID or return a 404 error if it doesn't exist.
+
+    parent_id = request.args.get('parent', type=int)
+    # When given, page through the direct replies of this comment instead of the top-level comments.
+
+    comments, next_cursor = load_comment_page(
+        post.id,
+        parent_id=parent_id,
+        after=request.args.get('after'),
+        per_page=current_app.config.get('COMMENTS_PAGE_SIZE', 20),
+        max_depth=current_app.config.get('COMMENT_TREE_MAX_DEPTH'),
+        max_nodes=current_app.config.get('COMMENT_TREE_MAX_NODES')
+    )
+    # Fetch one page of comments and a bounded slice of their replies.
+
+    liked_comments = get_reacted_ids(current_user.id, Comment, [comment.id for comment in iter_tree(comments)])
+    # Set of ids of the returned comments that the current user has liked.
+
+    return jsonify({
+        'comments': [comment.to_dict(liked_comments) for comment in comments],
+        'next_cursor': next_cursor
+    })
+    # Return the serialized comment subtrees and the cursor for the following page.
+
 @post_bp.route('/post/<int:post_id>/<reaction>', methods=['POST'])
+@login_required
 def toggle_post_reaction(post_id, reaction):
     """Toggle like or dislike on a post."""
+    if reaction not in ('like', 'dislike'):
+        return jsonify({'error': 'Invalid reaction type'}), 400
+        # Return a JSON error response if the reaction type is invalid.
+
     post = Post.query.get_or_404(post_id)
     # Retrieve the post by its ID or return a 404 error.
 
-    user_id = current_user.id
-    # Get the current user's ID.
+    buffer = current_app.extensions.get('reaction_buffer')
+    if buffer is not None:
+        pending_likes, pending_dislikes = buffer.toggle(current_user.id, post.id, reaction)
+        # Write-behind mode: record the toggle in memory and answer from the stored counters plus pending changes.
+        return jsonify({
+            'likes': post.like_count + pending_likes,
+            'dislikes': post.dislike_count + pending_dislikes
+        })
 
-    if reaction == 'like':
-        # Handle like reaction:
-        existing_like = PostLike.query.filter_by(post_id=post.id, user_id=user_id).first()
-        if existing_like:
-            db.session.delete(existing_like)
-        else:
-            db.session.add(PostLike(post_id=post.id, user_id=user_id))
-        PostDislike.query.filter_by(post_id=post.id, user_id=user_id).delete()
-    elif reaction == 'dislike':
-        # Handle dislike reaction:
-        existing_dislike = PostDislike.query.filter_by(post_id=post.id, user_id=user_id).first()
-        if existing_dislike:
-            db.session.delete(existing_dislike)
-        else:
-            db.session.add(PostDislike(post_id=post.id, user_id=user_id))
-        PostLike.query.filter_by(post_id=post.id, user_id=user_id).delete()
-    else:
-        return jsonify({'error': 'Invalid reaction type'}), 400
-        # Return a JSON error response if the reaction type is invalid.
+    counts = reactions.toggle_post_reaction(post.id, current_user.id, reaction)
+    # Flip the reaction with single-statement upserts/deletes and update the cached counters.
 
     db.session.commit()
     # Commit the changes to the database.
 
+    likes, dislikes = (counts[0], counts[1]) if counts else (post.like_count, post.dislike_count)
+    # Use the totals returned by the counter UPDATE; if nothing changed, read back the stored ones.
+
     return jsonify({
-        'likes': post.likes.count(),
-        'dislikes': post.dislikes.count()
+        'likes': likes,
+        'dislikes': dislikes
     })
     # Return the updated count of likes and dislikes as JSON.
 
+@post_bp.route('/reactions', methods=['POST'])
+@login_required
+def batch_post_reactions():
+    """Apply several like/dislike toggles in one request and return the new counts of every affected post."""
+    payload = request.get_json(silent=True) or {}
+    items = payload.get('reactions')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty list of reactions'}), 400
+    if len(items) > current_app.config.get('REACTION_BATCH_MAX', 50):
+        return jsonify({'error': 'Too many reactions in one request'}), 400
+        # Bound the work a single request can trigger.
+
+    operations = []
+    for item in items:
+        post_id = item.get('post_id') if isinstance(item, dict) else None
+        reaction = item.get('reaction') if isinstance(item, dict) else None
+        if not isinstance(post_id, int) or isinstance(post_id, bool) or reaction not in ('like', 'dislike'):
+            return jsonify({'error': 'Invalid reaction'}), 400
+        operations.append((post_id, reaction))
+    # Validate the whole batch before touching the database.
+
+    try:
+        buffer = current_app.extensions.get('reaction_buffer')
+        if buffer is not None:
+            counts = buffer.apply(current_user.id, operations)
+            # Write-behind mode: buffer every toggle and answer from the stored counters plus pending changes.
+        else:
+            counts = reactions.apply_post_reactions(current_user.id, operations)
+            db.session.commit()
+            # Apply every toggle in one transaction, then commit once for the whole batch.
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error applying batch reactions: {e}")
+        return jsonify({'error': 'Failed to update reactions'}), 500
+
+    return jsonify({
+        'posts': {str(post_id): {'likes': likes, 'dislikes': dislikes} for post_id, (likes, dislikes) in counts.items()}
+    })
+    # Return the updated counts keyed by post id.
+
 @post_bp.route('/comment/<int:comment_id>/like', methods=['POST'])
 @login_required
 def toggle_comment_like(comment_id):
@@ -150,16 +238,8 @@ def toggle_comment_like(comment_id):
     comment = Comment.query.get_or_404(comment_id)
     # Retrieve the comment by its ID or return a 404 error.
 
-    like = CommentLike.query.filter_by(user_id=current_user.id, comment_id=comment_id).first()
-    # Check if the current user has already liked the comment.
-
-    if like:
-        db.session.delete(like)
-        # If already liked, remove the like.
-    else:
-        new_like = CommentLike(user_id=current_user.id, comment_id=comment_id)
-        db.session.add(new_like)
-        # If not liked, add a like.
+    reactions.toggle_reaction(Reaction.COMMENT, comment.id, current_user.id)
+    # Remove the like if it exists, otherwise insert it (ON CONFLICT DO NOTHING guards against double clicks).
 
     db.session.commit()
     # Commit the changes to the database.
@@ -184,6 +264,7 @@ def reply_comment(post_id, comment_id):
             author_id=current_user.id
         )
         db.session.add(reply)
+        adjust_post_counters(post_id, comments=1)
         db.session.commit()
         flash('Reply posted successfully!', 'success')
     return redirect(url_for('post.post_detail', post_id=post_id))
@@ -208,6 +289,8 @@ def update_post(post_id):
             # If the form is valid upon submission:
             post.title = form.title.data
             post.content = form.content.data
+            tags.set_post_tags(post, form.tags.data)
+            # Re-tag the post, writing only the tags that were added or removed.
             db.session.commit()
             flash('Your post has been updated!', 'success')
             return redirect(url_for('post.post_detail', post_id=post.id))
@@ -215,6 +298,7 @@ def update_post(post_id):
             # Pre-fill the form with the existing post data for GET requests.
             form.title.data = post.title
             form.content.data = post.content
+            form.tags.data = post.tags
 
         return render_template('create_post.html', form=form, legend='Update Post')
         # Render the post update form.
@@ -238,6 +322,12 @@ def delete_post(post_id):
             abort(403)
             # Return a 403 Forbidden error if the current user is not the post author.
 
+        timeline.remove_post(post.id)
+        # Remove the post from every timeline it was fanned out to.
+
+        tags.remove_post(post.id)
+        # Untag the post so the cached tag counts stay accurate.
+
         db.session.delete(post)
         # Mark the post for deletion.
 
@@ -1,8 +1,8 @@
 # app/routes/profile_routes.py
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, abort
 # Importing Flask utilities for creating blueprints, rendering templates, handling redirects,
-# generating URLs, flashing messages, handling requests, logging errors, and returning JSON responses.
+# generating URLs, flashing messages, handling requests, logging errors, returning JSON responses and aborting.
 
 from flask_login import login_required, current_user
 # Importing Flask-Login utilities to restrict access to authenticated users and retrieve the current user.
@@ -10,11 +10,18 @@ from flask_login import login_required, current_user
 from app.forms import UpdateAccountForm
 # Importing the form class for updating user account information.
 
-from app.models import User, Post, Follow
-# Importing the database models for users, posts, and follow relationships.
+from app.models import User, Post
+# Importing the database models for users and posts.
 
-from app import db
-# Importing the database instance for managing database operations.
+from app import db, timeline, follows, suggestions, autocomplete, avatars
+# Importing the database instance for managing database operations, the timeline helpers, the follow graph,
+# the follow suggestions, the username autocomplete cache and the profile picture pipeline.
+
+from app.pagination import get_page_size
+# Importing the helper that reads and clamps the requested page size.
+
+from app.feed import hydrate_posts
+# Importing the feed hydration layer that batches author and reaction lookups for a list of posts.
 
 profile_bp = Blueprint('profile', __name__, url_prefix='/users')
 # Creating a Blueprint named 'profile' with a URL prefix of '/users' for managing user profile-related routes.
@@ -30,13 +37,23 @@ def user_profile(username):
         posts = Post.query.filter_by(author=user).order_by(Post.date_posted.desc()).all()
         # Fetch all posts authored by the user, ordered by the most recent.
 
+        posts = hydrate_posts(posts, current_user.id)
+        # Load authors and the viewer's reactions for all of the posts in a fixed number of queries.
+
         if current_user.id != user.id:
             # Check if the profile being viewed belongs to another user:
-            return render_template('profile/public_profile.html', user=user, current_user=current_user, posts=posts)
+            is_following = follows.is_following(current_user.id, user.id)
+            # One indexed existence check instead of loading the whole following list.
+
+            return render_template('profile/public_profile.html', user=user, current_user=current_user, posts=posts,
+                                   is_following=is_following)
             # Render the public profile template for the other user.
         else:
             # If the current user is viewing their own profile:
-            return render_template('profile/profile.html', user=user, posts=posts)
+            people = suggestions.suggestions_for(current_user.id)
+            # Precomputed follow suggestions, read with one indexed range scan.
+
+            return render_template('profile/profile.html', user=user, posts=posts, suggestions=people)
             # Render the private profile template for the current user.
 
     except Exception as e:
@@ -46,6 +63,82 @@ def user_profile(username):
         return render_template('error.html', message="An error occurred while loading the profile."), 500
         # Render an error template with a 500 status code if an exception is caught.
 
+@profile_bp.route('/account', methods=['GET', 'POST'])
+@login_required
+def account():
+    """Update the current user's username, email and profile picture."""
+    try:
+        form = UpdateAccountForm()
+        # Instantiate the account form; its validators reject usernames and emails already taken.
+
+        if form.validate_on_submit():
+            # If the form is valid upon submission:
+            picture_key = None
+            if form.profile_picture.data:
+                try:
+                    picture_key = avatars.save_upload(form.profile_picture.data)
+                    # Stream the upload to disk under its content hash; only the image header is read here.
+                except avatars.AvatarRejected as e:
+                    form.profile_picture.errors.append(str(e))
+                    return render_template('profile/forms/update_account.html', form=form)
+
+            old_username = current_user.username
+            current_user.username = form.username.data
+            current_user.email = form.email.data
+            db.session.commit()
+            # Save the new account details.
+
+            autocomplete.on_username_changed(old_username, current_user.username)
+            # Swap the old username for the new one in this process's autocomplete cache.
+
+            if picture_key:
+                avatars.get_processor().submit(current_user.id, picture_key)
+                # Resize in the background; the new picture replaces the old one once its variants exist.
+                flash('Your account has been updated! Your new picture will appear shortly.', 'success')
+                return redirect(url_for('profile.user_profile', username=current_user.username))
+
+            flash('Your account has been updated!', 'success')
+            return redirect(url_for('profile.user_profile', username=current_user.username))
+
+        elif request.method == 'GET':
+            # Pre-fill the form with the current account details.
+            form.username.data = current_user.username
+            form.email.data = current_user.email
+
+        return render_template('profile/forms/update_account.html', form=form)
+        # Render the account form.
+
+    except Exception as e:
+        current_app.logger.error(f"Error updating account: {e}")
+        # Log any exceptions that occur while updating the account.
+
+        db.session.rollback()
+        # Roll back the database transaction in case of an error.
+
+        return render_template('error.html', message="An error occurred while updating your account."), 500
+        # Render an error template with a 500 status code if an exception is caught.
+
+@profile_bp.route('/autocomplete')
+@login_required
+def autocomplete_usernames():
+    """Return usernames starting with the typed prefix, for @-mentions and user search."""
+    try:
+        limit = request.args.get('limit', current_app.config.get('AUTOCOMPLETE_LIMIT', 10), type=int)
+        limit = max(1, min(limit, current_app.config.get('AUTOCOMPLETE_MAX_LIMIT', 25)))
+        # Read the requested number of suggestions, clamped to the configured bounds.
+
+        usernames = autocomplete.complete_usernames(request.args.get('q', ''), limit)
+        # Answered from the in-process sorted array, or one range scan on the lower(username) index.
+
+        return jsonify({'usernames': usernames}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error completing usernames: {e}")
+        # Log any exceptions that occur during the lookup.
+
+        return jsonify({'error': 'An error occurred.'}), 500
+        # Return a JSON error response with a 500 status code if an exception is caught.
+
 @profile_bp.route('/follow/<int:user_id>', methods=['POST'])
 @login_required
 def toggle_follow(user_id):
@@ -59,27 +152,33 @@ def toggle_follow(user_id):
             return jsonify({'error': 'You cannot follow yourself.'}), 400
             # Return a JSON error response with a 400 status code.
 
-        if user in current_user.following:
-            # If the user is already being followed by the current user:
-            current_user.following.remove(user)
-            # Remove the user from the current user's following list.
+        if follows.toggle_follow(current_user.id, user.id):
+            # The follow row was inserted and both users' cached counters incremented:
+            timeline.on_follow(current_user.id, user.id)
+            # Backfill the current user's timeline with the followed user's recent posts.
+
+            suggestions.on_follow(current_user.id, user.id)
+            # Drop the followed user from the suggestions and add the people they follow.
 
             db.session.commit()
             # Commit the changes to the database.
 
-            return jsonify({'status': 'unfollowed'}), 200
-            # Return a JSON response indicating the user has been unfollowed.
+            return jsonify({'status': 'followed'}), 200
+            # Return a JSON response indicating the user has been followed.
 
         else:
-            # If the user is not currently being followed by the current user:
-            current_user.following.append(user)
-            # Add the user to the current user's following list.
+            # The follow row was deleted and both users' cached counters decremented:
+            timeline.on_unfollow(current_user.id, user.id)
+            # Drop the unfollowed user's posts from the current user's timeline.
+
+            suggestions.on_unfollow(current_user.id, user.id)
+            # Take away the mutuals that came through the unfollowed user.
 
             db.session.commit()
             # Commit the changes to the database.
 
-            return jsonify({'status': 'followed'}), 200
-            # Return a JSON response indicating the user has been followed.
+            return jsonify({'status': 'unfollowed'}), 200
+            # Return a JSON response indicating the user has been unfollowed.
 
     except Exception as e:
         current_app.logger.error(f"Error toggling follow: {e}")
@@ -87,3 +186,47 @@ def toggle_follow(user_id):
 
         return jsonify({'error': 'An error occurred.'}), 500
         # Return a JSON error response with a 500 status code if an exception is caught.
+
+@profile_bp.route('/<string:username>/followers')
+@login_required
+def followers(username):
+    """List the users following a user, one page at a time."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        abort(404)
+        # Return a 404 error if no user has this username.
+
+    try:
+        people, next_cursor = follows.followers_page(user.id, after=request.args.get('after'), per_page=get_page_size())
+        # Fetch one page of followers, newest first, with a keyset cursor for the next page.
+
+        return render_template('profile/follow_list.html', user=user, title='Followers', people=people,
+                               total=user.follower_count, next_cursor=next_cursor)
+
+    except Exception as e:
+        current_app.logger.error(f"Error loading followers for {username}: {e}")
+        # Log any exceptions that occur while loading the list.
+
+        return render_template('error.html', message="An error occurred while loading followers."), 500
+
+@profile_bp.route('/<string:username>/following')
+@login_required
+def following(username):
+    """List the users a user follows, one page at a time."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        abort(404)
+        # Return a 404 error if no user has this username.
+
+    try:
+        people, next_cursor = follows.following_page(user.id, after=request.args.get('after'), per_page=get_page_size())
+        # Fetch one page of followed users, newest first, with a keyset cursor for the next page.
+
+        return render_template('profile/follow_list.html', user=user, title='Following', people=people,
+                               total=user.following_count, next_cursor=next_cursor)
+
+    except Exception as e:
+        current_app.logger.error(f"Error loading following list for {username}: {e}")
+        # Log any exceptions that occur while loading the list.
+
+        return render_template('error.html', message="An error occurred while loading the following list."), 500
@@ -0,0 +1,288 @@
+import re
+from dataclasses import dataclass
+# Importing regular expressions for query parsing and highlighting, and dataclass for the result view model.
+
+from markupsafe import Markup, escape
+# Importing HTML escaping so highlighted snippets are safe to render.
+
+from sqlalchemy import column, delete, event, exists, func, inspect, literal, literal_column, select, table, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+# Importing SQL expression helpers for the two full-text backends.
+
+from app import db
+from app.models import Comment, Post, SearchDocument
+from app.pagination import decode_cursor, encode_cursor
+
+
+# Importing the database instance, the indexed models and the cursor helpers used for ranked pagination.
+
+SEARCH_CONFIG = 'english'  # PostgreSQL text search configuration (stemming and stop words).
+MAX_TERMS = 10  # Words of a query that are used; the rest are ignored.
+SNIPPET_LENGTH = 160  # Characters of context shown around the first match.
+
+search_fts = table('search_fts', column('rowid'), column('title'), column('tags'), column('body'))
+# The SQLite FTS5 table created alongside search_documents (see app.models).
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """One ranked hit, ready for `search.html` to render."""
+    kind: str  # 'post' or 'comment'
+    post_id: int
+    comment_id: int | None
+    title: str
+    snippet: Markup
+
+
+def _doc_key(doc_type, doc_id):
+    """SearchDocument.id for a post or comment id."""
+    return doc_id * 2 + (0 if doc_type == SearchDocument.POST else 1)
+
+
+def _is_sqlite(bind):
+    return bind.dialect.name == 'sqlite'
+
+
+# -------------------------------
+# Indexing
+# -------------------------------
+def _post_row(post):
+    return {'doc_type': SearchDocument.POST, 'doc_id': post.id, 'post_id': post.id,
+            'title': post.title or '', 'tags': post.tags or '', 'body': post.content or ''}
+
+
+def _comment_row(comment):
+    return {'doc_type': SearchDocument.COMMENT, 'doc_id': comment.id, 'post_id': comment.post_id,
+            'title': '', 'tags': '', 'body': comment.content or ''}
+
+
+def _tsvector(row):
+    """Weighted tsvector expression for one document: title A, tags B, content C."""
+    config = literal(SEARCH_CONFIG, type_=REGCONFIG)
+    return (
+        func.setweight(func.to_tsvector(config, row['title']), literal_column("'A'"))
+        .op('||')(func.setweight(func.to_tsvector(config, row['tags']), literal_column("'B'")))
+        .op('||')(func.setweight(func.to_tsvector(config, row['body']), literal_column("'C'")))
+    )
+
+
+def write_documents(connection, rows, removed=()):
+    """
+    Replace the index entries for `rows` and drop those for `removed` ((doc_type, doc_id) pairs).
+
+    Runs on `connection` inside the caller's transaction: one DELETE and one multi-row
+    INSERT, plus the same again for the FTS5 table on SQLite.
+    """
+    keys = [_doc_key(row['doc_type'], row['doc_id']) for row in rows]
+    keys += [_doc_key(doc_type, doc_id) for doc_type, doc_id in removed]
+    if not keys:
+        return
+
+    sqlite = _is_sqlite(connection)
+    connection.execute(delete(SearchDocument.__table__).where(SearchDocument.id.in_(keys)))
+    if sqlite:
+        connection.execute(delete(search_fts).where(search_fts.c.rowid.in_(keys)))
+
+    if not rows:
+        return
+
+    documents = []
+    for key, row in zip(keys, rows):
+        document = {'id': key, 'doc_type': row['doc_type'], 'doc_id': row['doc_id'], 'post_id': row['post_id']}
+        if not sqlite:
+            document['document'] = _tsvector(row)
+        documents.append(document)
+    connection.execute(SearchDocument.__table__.insert().values(documents))
+
+    if sqlite:
+        connection.execute(search_fts.insert().values([
+            {'rowid': key, 'title': row['title'], 'tags': row['tags'], 'body': row['body']}
+            for key, row in zip(keys, rows)
+        ]))
+
+
+def _text_changed(obj, names):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+def _sync_after_flush(session, flush_context):
+    """Keep the index in step with every flushed post and comment, in the same transaction."""
+    rows, removed = [], []
+    for obj in session.new:
+        if isinstance(obj, Post):
+            rows.append(_post_row(obj))
+        elif isinstance(obj, Comment):
+            rows.append(_comment_row(obj))
+    for obj in session.dirty:
+        if isinstance(obj, Post) and _text_changed(obj, ('title', 'content', 'tags')):
+            rows.append(_post_row(obj))
+        elif isinstance(obj, Comment) and _text_changed(obj, ('content',)):
+            rows.append(_comment_row(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Post):
+            removed.append((SearchDocument.POST, obj.id))
+        elif isinstance(obj, Comment):
+            removed.append((SearchDocument.COMMENT, obj.id))
+
+    if rows or removed:
+        write_documents(session.connection(), rows, removed)
+    # Hooking the flush covers every route that creates, edits or deletes posts and comments.
+
+
+def init_app(app):
+    """Start keeping the search index in sync with the database session."""
+    if not event.contains(db.session, 'after_flush', _sync_after_flush):
+        event.listen(db.session, 'after_flush', _sync_after_flush)
+
+
+def reindex(batch_size=500):
+    """
+    Rebuild the whole index from the posts and comments tables. Returns the number of documents written.
+
+    Rows are read in id ranges of `batch_size`, each range written in its own transaction,
+    so search keeps working while it runs. Entries whose post or comment no longer exists
+    are removed at the end.
+    """
+    written = 0
+    for model, to_row in ((Post, _post_row), (Comment, _comment_row)):
+        last_id = 0
+        while True:
+            batch = model.query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not batch:
+                break
+            write_documents(db.session.connection(), [to_row(obj) for obj in batch])
+            db.session.commit()
+            written += len(batch)
+            last_id = batch[-1].id
+
+    connection = db.session.connection()
+    for doc_type, model in ((SearchDocument.POST, Post), (SearchDocument.COMMENT, Comment)):
+        orphans = select(SearchDocument.id).where(
+            SearchDocument.doc_type == doc_type,
+            ~exists().where(model.id == SearchDocument.doc_id)
+        )
+        orphan_ids = db.session.scalars(orphans).all()
+        if orphan_ids:
+            connection.execute(delete(SearchDocument.__table__).where(SearchDocument.id.in_(orphan_ids)))
+            if _is_sqlite(connection):
+                connection.execute(delete(search_fts).where(search_fts.c.rowid.in_(orphan_ids)))
+    db.session.commit()
+    return written
+
+
+# -------------------------------
+# Querying
+# -------------------------------
+def query_terms(query):
+    """Split a user's query into lower-case words, at most MAX_TERMS of them."""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def _ranked(terms):
+    """Select (id, doc_type, doc_id, post_id, rank) for documents matching every term, higher rank first."""
+    if _is_sqlite(db.session.get_bind()):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # Quoting each word keeps FTS5 query syntax in user input from being interpreted.
+        rank = literal_column('-bm25(search_fts, 10.0, 5.0, 1.0)')
+        # bm25 is lower-is-better; negate it so both backends rank descending. Title > tags > content.
+        return (
+            select(SearchDocument.id, SearchDocument.doc_type, SearchDocument.doc_id, SearchDocument.post_id,
+                   rank.label('rank'))
+            .join(search_fts, search_fts.c.rowid == SearchDocument.id)
+            .where(text('search_fts MATCH :match').bindparams(match=match))
+        )
+
+    config = literal(SEARCH_CONFIG, type_=REGCONFIG)
+    tsquery = func.to_tsquery(config, ' & '.join(f'{term}:*' for term in terms))
+    # Words are already reduced to \w+, so the prefix query cannot contain tsquery operators.
+    return (
+        select(SearchDocument.id, SearchDocument.doc_type, SearchDocument.doc_id, SearchDocument.post_id,
+               func.ts_rank_cd(SearchDocument.document, tsquery).label('rank'))
+        .where(SearchDocument.document.op('@@')(tsquery))
+    )
+    # The @@ match is answered by the GIN index; only matching rows are ranked.
+
+
+def search(query, after=None, per_page=20):
+    """
+    Return one page of posts and comments matching `query`, best match first, as (results, next_cursor).
+
+    Pages are keyed on (rank, document id), so following the cursor never repeats or skips a hit.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return [], None
+
+    ranked = _ranked(terms).subquery()
+    stmt = select(ranked)
+    position = decode_cursor(after, parse=float)
+    if position is not None:
+        rank, doc_key = position
+        stmt = stmt.where((ranked.c.rank < rank) | ((ranked.c.rank == rank) & (ranked.c.id < doc_key)))
+    rows = db.session.execute(
+        stmt.order_by(ranked.c.rank.desc(), ranked.c.id.desc()).limit(per_page + 1)
+    ).all()
+
+    page = rows[:per_page]
+    next_cursor = encode_cursor(page[-1].rank, page[-1].id) if len(rows) > per_page else None
+    return _hydrate(page, terms), next_cursor
+
+
+def _hydrate(rows, terms):
+    """Load the text for a page of hits with one query per table and build highlighted results."""
+    posts = {
+        row.id: row for row in db.session.execute(
+            select(Post.id, Post.title, Post.content, Post.tags).where(Post.id.in_({row.post_id for row in rows}))
+        )
+    }
+    comment_ids = {row.doc_id for row in rows if row.doc_type == SearchDocument.COMMENT}
+    comments = {
+        row.id: row for row in db.session.execute(
+            select(Comment.id, Comment.content).where(Comment.id.in_(comment_ids))
+        )
+    } if comment_ids else {}
+
+    results = []
+    for row in rows:
+        post = posts.get(row.post_id)
+        if post is None:
+            continue
+        if row.doc_type == SearchDocument.POST:
+            results.append(SearchResult('post', post.id, None, post.title, highlight(post.content, terms)))
+        elif row.doc_id in comments:
+            comment = comments[row.doc_id]
+            results.append(SearchResult('comment', post.id, comment.id, post.title,
+                                        highlight(comment.content, terms)))
+    return results
+
+
+def _stem(term):
+    """Crude suffix stripping so 'tomatoes' also highlights 'tomato', like the stemming backends match."""
+    for suffix in ('ing', 'es', 'ed', 's'):
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[:-len(suffix)]
+    return term
+
+
+def highlight(content, terms, length=SNIPPET_LENGTH):
+    """Return an escaped snippet of `content` around the first match, with matched words wrapped in <mark>."""
+    content = content or ''
+    pattern = re.compile(r'\b(?:' + '|'.join(re.escape(_stem(term)) for term in terms) + r')\w*', re.IGNORECASE)
+
+    first = pattern.search(content)
+    start = max(0, first.start() - length // 3) if first else 0
+    end = min(len(content), start + length)
+    snippet = content[start:end]
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(snippet):
+        parts.append(escape(snippet[last:match.start()]))
+        parts.append(Markup('<mark>%s</mark>') % match.group(0))
+        last = match.end()
+    parts.append(escape(snippet[last:]))
+
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if end < len(content) else ''
+    return Markup(prefix) + Markup('').join(parts) + Markup(suffix)
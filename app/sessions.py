@@ -0,0 +1,321 @@
+import secrets
+import threading
+import zlib
+from datetime import datetime, timezone
+# Importing helpers for random session ids, the in-memory store's lock, compression and expiry timestamps.
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+# Importing Flask's session extension points, its tagged JSON format (tuples, bytes, datetimes, Markup)
+# and the signer that keeps forged session ids from reaching the store.
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+# Importing SQL expression helpers and the dialect-specific INSERT constructs that support ON CONFLICT.
+
+from app import db
+from app.models import SessionRecord
+
+
+# Importing the database instance and the session table.
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+    # Stored naive, matching how the database columns hand timestamps back.
+
+
+# -------------------------------
+# Serialization
+# -------------------------------
+class SessionSerializer:
+    """
+    Compact session encoding: Flask's tagged JSON without whitespace, zlib-compressed once large.
+
+    The first byte records the format so compressed and plain payloads can be mixed.
+    """
+
+    def __init__(self, compress_threshold=512):
+        self.compress_threshold = compress_threshold
+        self._json = TaggedJSONSerializer()
+
+    def dumps(self, data):
+        raw = self._json.dumps(data).encode('utf-8')
+        if len(raw) >= self.compress_threshold:
+            return b'z' + zlib.compress(raw)
+        return b'j' + raw
+
+    def loads(self, payload):
+        kind, body = payload[:1], payload[1:]
+        if kind == b'z':
+            body = zlib.decompress(body)
+        return self._json.loads(body.decode('utf-8'))
+
+
+# -------------------------------
+# Stores
+# -------------------------------
+class SessionStore:
+    """Where serialized sessions live. Subclasses implement load/save/delete/cleanup."""
+
+    def load(self, sid):
+        """Return (payload, expires_at) for `sid`, or None if it is missing or expired."""
+        raise NotImplementedError
+
+    def save(self, sid, payload, expires_at):
+        raise NotImplementedError
+
+    def delete(self, sid):
+        raise NotImplementedError
+
+    def cleanup(self, batch_size=1000):
+        """Delete expired sessions in batches. Returns the number deleted."""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in a dict; per process, for tests and single-process development."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}  # sid -> (payload, expires_at)
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._sessions.get(sid)
+        if entry is None or entry[1] <= _utcnow():
+            return None
+        return entry
+
+    def save(self, sid, payload, expires_at):
+        with self._lock:
+            self._sessions[sid] = (payload, expires_at)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def cleanup(self, batch_size=1000):
+        now = _utcnow()
+        with self._lock:
+            expired = [sid for sid, (_, expires_at) in self._sessions.items() if expires_at <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        return len(expired)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SqlSessionStore(SessionStore):
+    """
+    Sessions in the `sessions` table, read and written through `db.session`, so a request
+    holds one pooled connection rather than a second one for its session.
+
+    Loads join the request's transaction. Writes happen in `save_session`, after the view
+    has returned: the request's transaction is ended first, exactly as teardown would end
+    it (committed work is kept, uncommitted work is discarded), and the session row is
+    then committed on its own. Saving the session therefore never commits a route's work.
+    """
+
+    def _insert(self):
+        return (sqlite if db.session.get_bind().dialect.name == 'sqlite' else postgresql).insert(SessionRecord)
+
+    def _write(self, statement):
+        db.session.rollback()
+        db.session.execute(statement)
+        db.session.commit()
+
+    def load(self, sid):
+        with db.session.no_autoflush:
+            row = db.session.execute(
+                select(SessionRecord.data, SessionRecord.expires_at)
+                .where(SessionRecord.sid == sid, SessionRecord.expires_at > _utcnow())
+            ).first()
+        return tuple(row) if row else None
+        # One primary key probe. The session may be read mid-view, so the route's pending changes are not flushed.
+
+    def save(self, sid, payload, expires_at):
+        self._write(
+            self._insert().values(sid=sid, data=payload, expires_at=expires_at)
+            .on_conflict_do_update(index_elements=['sid'], set_={'data': payload, 'expires_at': expires_at})
+        )
+
+    def delete(self, sid):
+        self._write(delete(SessionRecord).where(SessionRecord.sid == sid))
+
+    def cleanup(self, batch_size=1000):
+        deleted = 0
+        while True:
+            expired = select(SessionRecord.sid).where(SessionRecord.expires_at <= _utcnow()).limit(batch_size)
+            count = db.session.execute(delete(SessionRecord).where(SessionRecord.sid.in_(expired))).rowcount
+            db.session.commit()
+            deleted += count
+            if count < batch_size:
+                return deleted
+            # Short transactions keep the cleanup from holding locks that logins and saves wait on.
+
+
+# -------------------------------
+# Lazy Session
+# -------------------------------
+class ServerSession(SessionMixin):
+    """
+    A session whose data is fetched from the store the first time a route reads or writes it.
+
+    Requests that never touch `session` never hit the store or deserialize anything.
+    """
+
+    def __init__(self, sid=None, loader=None):
+        self.sid = sid
+        self._loader = loader
+        self._data = None if sid else {}
+        self.expires_at = None
+        self.modified = False
+        self.accessed = False
+        self.rotated_from = None
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def _load(self):
+        self.accessed = True
+        if self._data is None:
+            loaded = self._loader(self.sid) if self._loader else None
+            if loaded is None:
+                self._data = {}
+                self.sid = None
+                # Unknown or expired id: start afresh and issue a new id if anything gets stored.
+            else:
+                self._data, self.expires_at = loaded
+        return self._data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._load()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __contains__(self, key):
+        return key in self._load()
+
+    def clear(self):
+        self._load().clear()
+        self.modified = True
+
+    def regenerate(self):
+        """Move the data to a new session id on the next save (call on login and logout)."""
+        self._load()
+        if self.sid:
+            self.rotated_from = self.sid
+        self.sid = None
+        self.modified = True
+
+
+# -------------------------------
+# Session Interface
+# -------------------------------
+class ServerSessionInterface(SessionInterface):
+    """Keeps session data in a SessionStore; the cookie holds only a signed, random session id."""
+
+    def __init__(self, store, serializer=None):
+        self.store = store
+        self.serializer = serializer or SessionSerializer()
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='server-session')
+
+    def _load(self, sid):
+        entry = self.store.load(sid)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        return self.serializer.loads(payload), expires_at
+
+    def _needs_touch(self, app, session):
+        """True if a loaded session has used up half its lifetime, so an active user's session slides forward."""
+        if not session.loaded or not session.sid or session.expires_at is None:
+            return False
+        return session.expires_at - _utcnow() < app.permanent_session_lifetime / 2
+        # Rewriting only past the halfway mark keeps read-only requests from writing every time.
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return ServerSession()
+        try:
+            sid = self._signer(app).unsign(cookie).decode('ascii')
+        except BadSignature:
+            return ServerSession()
+        return ServerSession(sid, self._load)
+        # Nothing is read yet; the first access to the session fetches it.
+
+    def save_session(self, app, session, response):
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.rotated_from:
+            self.store.delete(session.rotated_from)
+            session.rotated_from = None
+
+        if not session.modified and not self._needs_touch(app, session):
+            return
+        # Untouched or read-only sessions cost nothing on the way out.
+
+        if not session:
+            if session.sid:
+                self.store.delete(session.sid)
+            response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.sid:
+            session.sid = secrets.token_urlsafe(32)
+        expires_at = _utcnow() + app.permanent_session_lifetime
+        self.store.save(session.sid, self.serializer.dumps(dict(session)), expires_at)
+
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode('ascii'),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def regenerate(session):
+    """Rotate the session id if the app uses server-side sessions (no-op for cookie sessions)."""
+    if isinstance(session, ServerSession):
+        session.regenerate()
+
+
+def init_app(app):
+    """Install the server-side session interface chosen by SESSION_BACKEND ('sql', 'memory' or 'cookie')."""
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    if backend == 'cookie':
+        return
+    stores = {'sql': SqlSessionStore, 'memory': MemorySessionStore}
+    if backend not in stores:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend!r}; expected 'sql', 'memory' or 'cookie'.")
+    app.session_interface = ServerSessionInterface(
+        stores[backend](),
+        SessionSerializer(compress_threshold=app.config.get('SESSION_COMPRESS_THRESHOLD', 512)),
+    )
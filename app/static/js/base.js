@@ -1,19 +1,59 @@
-async function toggleReaction(postId, reactionType) {
-    const likeCountElem = document.getElementById(`like-count-${postId}`);
-    const dislikeCountElem = document.getElementById(`dislike-count-${postId}`);
+// Reaction clicks are queued and sent together, so rapid clicks across the feed cost one request.
+const REACTION_BATCH_DELAY_MS = 300;
+const REACTION_BATCH_MAX = 50;
+let pendingReactions = [];
+let reactionTimer = null;
+
+function toggleReaction(postId, reactionType) {
+    pendingReactions.push({post_id: postId, reaction: reactionType});
+    toggleActiveButton(postId, reactionType);
+
+    if (pendingReactions.length >= REACTION_BATCH_MAX) {
+        flushReactions();
+    } else if (reactionTimer === null) {
+        reactionTimer = setTimeout(flushReactions, REACTION_BATCH_DELAY_MS);
+    }
+}
+
+function toggleActiveButton(postId, reactionType) {
+    // Reflect the click immediately; the counts are corrected when the batch response arrives.
+    const button = document.getElementById(`${reactionType}-btn-${postId}`);
+    const opposite = document.getElementById(`${reactionType === 'like' ? 'dislike' : 'like'}-btn-${postId}`);
+    if (!button) return;
+
+    const nowActive = !button.classList.contains('active');
+    button.classList.toggle('active', nowActive);
+    if (nowActive && opposite) {
+        opposite.classList.remove('active');
+    }
+}
+
+async function flushReactions(keepalive = false) {
+    clearTimeout(reactionTimer);
+    reactionTimer = null;
+    if (pendingReactions.length === 0) return;
+
+    const batch = pendingReactions;
+    pendingReactions = [];
 
     try {
-        const response = await fetch(`/posts/post/${postId}/${reactionType}`, {
+        const response = await fetch('/posts/reactions', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({reactions: batch}),
+            keepalive: keepalive,
         });
 
         if (response.ok) {
             const data = await response.json();
 
-            // Update counts dynamically
-            likeCountElem.textContent = data.likes;
-            dislikeCountElem.textContent = data.dislikes;
+            // Update counts dynamically for every post in the batch
+            for (const [postId, counts] of Object.entries(data.posts)) {
+                const likeCountElem = document.getElementById(`like-count-${postId}`);
+                const dislikeCountElem = document.getElementById(`dislike-count-${postId}`);
+                if (likeCountElem) likeCountElem.textContent = counts.likes;
+                if (dislikeCountElem) dislikeCountElem.textContent = counts.dislikes;
+            }
         } else {
             alert('Failed to update reaction. Please try again.');
         }
@@ -21,4 +61,7 @@ async function toggleReaction(postId, reactionType) {
         console.error('Error toggling reaction:', error);
         alert('An error occurred. Please try again later.');
     }
-}
\ No newline at end of file
+}
+
+// Send any queued clicks before the user leaves the page.
+window.addEventListener('pagehide', () => flushReactions(true));
@@ -0,0 +1,279 @@
+import heapq
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+# Importing helpers for picking the top candidates and the process pool used by the batch job.
+
+from flask import current_app
+# Importing the app context for reading the suggestion settings.
+
+from sqlalchemy import case, delete, func, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import aliased
+# Importing SQL expression helpers and the dialect-specific INSERT constructs that support ON CONFLICT.
+
+from app import db
+from app.models import Follow, FollowSuggestion, User
+
+
+# Importing the database instance and the models the suggestions are built from.
+
+MUTUAL_WEIGHT = 1.0  # Score added per followed user who also follows the candidate.
+GARDEN_TYPE_WEIGHT = 0.75  # Score added when the candidate shares the user's preferred garden type.
+PLANTING_ZONE_WEIGHT = 0.5  # Score added when the candidate shares the user's planting zone.
+
+
+def _normalize(value):
+    """Lower-case a free-text preference for matching; empty values never match."""
+    return value.strip().lower() if value and value.strip() else None
+
+
+def preference_bonus(user_prefs, candidate_prefs):
+    """Score bonus for shared (garden type, planting zone) preferences."""
+    bonus = 0.0
+    if user_prefs[0] and user_prefs[0] == candidate_prefs[0]:
+        bonus += GARDEN_TYPE_WEIGHT
+    if user_prefs[1] and user_prefs[1] == candidate_prefs[1]:
+        bonus += PLANTING_ZONE_WEIGHT
+    return bonus
+
+
+# -------------------------------
+# Batch Build
+# -------------------------------
+def _load_preferences(user_ids):
+    """Return {user_id: (garden_type, planting_zone)} with normalized values, in one IN query."""
+    rows = db.session.execute(
+        select(User.id, User.preferred_garden_type, User.preferred_planting_zone).where(User.id.in_(user_ids))
+    )
+    return {row.id: (_normalize(row.preferred_garden_type), _normalize(row.preferred_planting_zone)) for row in rows}
+
+
+def _preference_matches(column, values, limit):
+    """Return {normalized value: [user ids]} for the most-followed users with each preference value."""
+    matches = {}
+    for value in values:
+        matches[value] = db.session.scalars(
+            select(User.id)
+            .where(func.lower(func.trim(column)) == value)
+            .order_by(User.follower_count.desc(), User.id)
+            .limit(limit)
+        ).all()
+    return matches
+    # One query per distinct value in the shard; there are only a handful of garden types and zones.
+
+
+def compute_shard(first_id, last_id, top_k=20):
+    """
+    Rebuild the suggestions of users with ids in [first_id, last_id]. Returns the number of users processed.
+
+    Friends-of-friends and their mutual counts come from one grouped self-join on follows,
+    preference matches from a few capped queries; scoring and top-K selection happen in
+    Python. The shard's old rows are replaced in a single transaction.
+    """
+    user_ids = db.session.scalars(select(User.id).where(User.id.between(first_id, last_id))).all()
+    if not user_ids:
+        return 0
+
+    followed = defaultdict(set)
+    for follower_id, followed_id in db.session.execute(
+        select(Follow.follower_id, Follow.followed_id).where(Follow.follower_id.in_(user_ids))
+    ):
+        followed[follower_id].add(followed_id)
+
+    first_hop, second_hop = aliased(Follow), aliased(Follow)
+    mutuals = defaultdict(dict)
+    for row in db.session.execute(
+        select(first_hop.follower_id, second_hop.followed_id, func.count().label('mutuals'))
+        .join(second_hop, second_hop.follower_id == first_hop.followed_id)
+        .where(first_hop.follower_id.in_(user_ids))
+        .group_by(first_hop.follower_id, second_hop.followed_id)
+    ):
+        mutuals[row.follower_id][row.followed_id] = row.mutuals
+    # user -> {candidate: number of the user's followees who follow the candidate}.
+
+    prefs = _load_preferences(user_ids)
+    garden_matches = _preference_matches(
+        User.preferred_garden_type, {p[0] for p in prefs.values() if p[0]}, top_k
+    )
+    zone_matches = _preference_matches(
+        User.preferred_planting_zone, {p[1] for p in prefs.values() if p[1]}, top_k
+    )
+
+    candidates = {}
+    for user_id in user_ids:
+        found = set(mutuals[user_id])
+        garden_type, zone = prefs.get(user_id, (None, None))
+        found.update(garden_matches.get(garden_type, ()))
+        found.update(zone_matches.get(zone, ()))
+        found.discard(user_id)
+        candidates[user_id] = found - followed[user_id]
+
+    candidate_prefs = _load_preferences({c for found in candidates.values() for c in found})
+
+    rows = []
+    for user_id, found in candidates.items():
+        user_prefs = prefs.get(user_id, (None, None))
+        scored = (
+            (
+                mutuals[user_id].get(candidate, 0) * MUTUAL_WEIGHT
+                + preference_bonus(user_prefs, candidate_prefs.get(candidate, (None, None))),
+                candidate,
+            )
+            for candidate in found
+        )
+        for score, candidate in heapq.nlargest(top_k, scored):
+            rows.append({
+                'user_id': user_id,
+                'candidate_id': candidate,
+                'score': score,
+                'mutual_count': mutuals[user_id].get(candidate, 0),
+            })
+
+    db.session.execute(delete(FollowSuggestion).where(FollowSuggestion.user_id.in_(user_ids)))
+    if rows:
+        db.session.execute(insert(FollowSuggestion), rows)
+    db.session.commit()
+    # Readers see either the old or the new list for each user, never a half-written one.
+    return len(user_ids)
+
+
+def shard_ranges(shard_size=500):
+    """Split the user table into (first_id, last_id) ranges of at most `shard_size` users."""
+    ids = db.session.scalars(select(User.id).order_by(User.id)).all()
+    return [(chunk[0], chunk[-1]) for chunk in (ids[i:i + shard_size] for i in range(0, len(ids), shard_size))]
+
+
+_worker_app = None
+
+
+def _init_worker(config_name):
+    """Process pool initializer: give each worker its own app, engine and connections."""
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app(config_name)
+    _worker_app.app_context().push()
+
+
+def _run_shard(args):
+    first_id, last_id, top_k = args
+    return compute_shard(first_id, last_id, top_k)
+
+
+def build_suggestions(shard_size=500, workers=1, config_name='default'):
+    """
+    Rebuild every user's follow suggestions. Returns the number of users processed.
+
+    With `workers` > 1, shards are spread over a process pool; each worker opens its own
+    database connections. Schedule this periodically; `on_follow`/`on_unfollow` keep the
+    lists roughly current in between.
+    """
+    top_k = current_app.config.get('SUGGESTIONS_TOP_K', 20)
+    ranges = shard_ranges(shard_size)
+
+    if workers <= 1:
+        return sum(compute_shard(first_id, last_id, top_k) for first_id, last_id in ranges)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config_name,)) as pool:
+        return sum(pool.map(_run_shard, [(first_id, last_id, top_k) for first_id, last_id in ranges]))
+
+
+# -------------------------------
+# Incremental Updates
+# -------------------------------
+def _insert():
+    """Build an INSERT into follow_suggestions that supports ON CONFLICT (SQLite under tests, PostgreSQL otherwise)."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(FollowSuggestion)
+    return postgresql.insert(FollowSuggestion)
+
+
+def _bonus_expression(user_id):
+    """SQL expression for `preference_bonus` between `user_id` and the joined candidate User row."""
+    garden_type, zone = _load_preferences([user_id]).get(user_id, (None, None))
+    bonus = literal(0.0)
+    if garden_type:
+        bonus = bonus + case((func.lower(func.trim(User.preferred_garden_type)) == garden_type, GARDEN_TYPE_WEIGHT),
+                             else_=0.0)
+    if zone:
+        bonus = bonus + case((func.lower(func.trim(User.preferred_planting_zone)) == zone, PLANTING_ZONE_WEIGHT),
+                             else_=0.0)
+    return bonus
+
+
+def on_follow(follower_id, followed_id):
+    """
+    Update the follower's suggestions after they follow `followed_id`, in the caller's transaction.
+
+    The followed user drops out of the list, and everyone they follow gains one mutual
+    (or is added as a new candidate). Effects on other users' lists wait for the next build.
+    """
+    db.session.execute(delete(FollowSuggestion).where(
+        FollowSuggestion.user_id == follower_id, FollowSuggestion.candidate_id == followed_id
+    ))
+
+    already_followed = select(Follow.followed_id).where(Follow.follower_id == follower_id)
+    candidates = (
+        select(
+            literal(follower_id),
+            Follow.followed_id,
+            literal(1),
+            literal(MUTUAL_WEIGHT) + _bonus_expression(follower_id),
+        )
+        .join(User, User.id == Follow.followed_id)
+        .where(
+            Follow.follower_id == followed_id,
+            Follow.followed_id != follower_id,
+            Follow.followed_id.not_in(already_followed),
+        )
+        .limit(current_app.config.get('SUGGESTIONS_INCREMENTAL_LIMIT', 200))
+    )
+    # Capped so following someone who follows thousands of users stays a cheap write.
+
+    suggestion = FollowSuggestion.__table__
+    db.session.execute(
+        _insert().from_select(['user_id', 'candidate_id', 'mutual_count', 'score'], candidates)
+        .on_conflict_do_update(
+            index_elements=['user_id', 'candidate_id'],
+            set_={
+                'mutual_count': suggestion.c.mutual_count + 1,
+                'score': suggestion.c.score + MUTUAL_WEIGHT,
+            }
+        )
+    )
+
+
+def on_unfollow(follower_id, followed_id):
+    """Take one mutual away from the candidates reached through `followed_id`, in the caller's transaction."""
+    through = select(Follow.followed_id).where(Follow.follower_id == followed_id)
+    db.session.execute(
+        update(FollowSuggestion)
+        .where(
+            FollowSuggestion.user_id == follower_id,
+            FollowSuggestion.candidate_id.in_(through),
+            FollowSuggestion.mutual_count > 0,
+        )
+        .values(mutual_count=FollowSuggestion.mutual_count - 1, score=FollowSuggestion.score - MUTUAL_WEIGHT)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        delete(FollowSuggestion)
+        .where(FollowSuggestion.user_id == follower_id, FollowSuggestion.score <= 0)
+        .execution_options(synchronize_session=False)
+    )
+    # Candidates left with no mutuals and no shared preferences are dropped.
+
+
+# -------------------------------
+# Reading
+# -------------------------------
+def suggestions_for(user_id, limit=None):
+    """Return the best follow suggestions for `user_id` (id, username, profile_picture, mutual_count)."""
+    limit = limit or current_app.config.get('SUGGESTIONS_SHOWN', 5)
+    return db.session.execute(
+        select(User.id, User.username, User.profile_picture, FollowSuggestion.mutual_count)
+        .join(User, User.id == FollowSuggestion.candidate_id)
+        .where(FollowSuggestion.user_id == user_id)
+        .order_by(FollowSuggestion.score.desc(), FollowSuggestion.candidate_id)
+        .limit(limit)
+    ).all()
+    # One range scan on ix_follow_suggestions_user_score; nothing is computed at request time.
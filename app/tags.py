@@ -0,0 +1,172 @@
+import re
+# Importing regular expressions for splitting and cleaning free-form tag input.
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+# Importing SQL expression helpers and the dialect-specific INSERT constructs that support ON CONFLICT.
+
+from app import db
+from app.models import Post, PostTag, Tag
+from app.pagination import paginate_keyset
+
+
+# Importing the database instance, the tag models and the keyset pagination helper used by tag feeds.
+
+MAX_TAGS = 10  # Tags kept per post; extra ones are dropped.
+MAX_TAG_LENGTH = 50  # Matches `Tag.name`; longer words are dropped rather than truncated.
+
+
+def parse_tags(raw):
+    """
+    Turn free-form input like "#Tomatoes, raised-beds  herbs" into ['tomatoes', 'raised-beds', 'herbs'].
+
+    Tags are split on commas, whitespace and '#', lower-cased, stripped of anything but
+    letters, digits, '-' and '_', and de-duplicated in order.
+    """
+    names = []
+    for word in re.split(r'[\s,#]+', (raw or '').lower()):
+        name = re.sub(r'[^\w-]', '', word).strip('-_')
+        if name and len(name) <= MAX_TAG_LENGTH and name not in names:
+            names.append(name)
+    return names[:MAX_TAGS]
+
+
+def _insert(model):
+    """Build an INSERT that supports ON CONFLICT (SQLite under tests, PostgreSQL otherwise)."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def _adjust_counts(tag_ids, delta):
+    """Add `delta` to the cached post count of every tag in `tag_ids` with one UPDATE."""
+    if tag_ids:
+        db.session.execute(
+            update(Tag)
+            .where(Tag.id.in_(tag_ids))
+            .values(post_count=Tag.post_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _post_tag_ids(post_id):
+    return set(db.session.scalars(select(PostTag.tag_id).where(PostTag.post_id == post_id)))
+
+
+# -------------------------------
+# Writes
+# -------------------------------
+def set_post_tags(post, raw):
+    """
+    Parse `raw`, store the normalized tags on `post` and sync its post_tags rows. Returns the tag names.
+
+    Only the difference from the post's current tags is written, and the affected tag
+    counts are adjusted in the same transaction. Flushes the post (assigning its id if
+    new); the caller commits.
+    """
+    names = parse_tags(raw)
+    post.tags = ' '.join(names) or None
+    db.session.flush()
+
+    wanted = set()
+    if names:
+        db.session.execute(
+            _insert(Tag).values([{'name': name} for name in names]).on_conflict_do_nothing(index_elements=['name'])
+        )
+        wanted = set(db.session.scalars(select(Tag.id).where(Tag.name.in_(names))))
+        # Insert any new tag names, then read back the ids of all of them.
+
+    current = _post_tag_ids(post.id)
+    added, removed = wanted - current, current - wanted
+
+    if removed:
+        db.session.execute(delete(PostTag).where(PostTag.post_id == post.id, PostTag.tag_id.in_(removed)))
+    if added:
+        db.session.execute(_insert(PostTag).values([
+            {'tag_id': tag_id, 'post_id': post.id, 'date_posted': post.date_posted} for tag_id in added
+        ]).on_conflict_do_nothing(index_elements=['tag_id', 'post_id']))
+
+    _adjust_counts(added, 1)
+    _adjust_counts(removed, -1)
+    return names
+
+
+def remove_post(post_id):
+    """Untag a post that is about to be deleted, decrementing its tags' counts. The caller commits."""
+    tag_ids = db.session.scalars(
+        delete(PostTag).where(PostTag.post_id == post_id).returning(PostTag.tag_id)
+    ).all()
+    _adjust_counts(tag_ids, -1)
+
+
+# -------------------------------
+# Reads
+# -------------------------------
+def get_tag(name):
+    """Return the Tag for a (possibly un-normalized) name, or None."""
+    names = parse_tags(name)
+    if not names:
+        return None
+    return db.session.scalar(select(Tag).where(Tag.name == names[0]))
+
+
+def tag_feed(tag_id, after=None, per_page=20):
+    """
+    Return one page of posts carrying `tag_id`, newest first, as (posts, next_cursor).
+
+    The page is one range scan on ix_post_tags_tag_date plus one IN query for the posts.
+    """
+    entries, next_cursor = paginate_keyset(
+        PostTag.query.filter_by(tag_id=tag_id), PostTag.date_posted, PostTag.post_id,
+        after=after, per_page=per_page
+    )
+    ids = [entry.post_id for entry in entries]
+    posts_by_id = {post.id: post for post in Post.query.filter(Post.id.in_(ids))}
+    return [posts_by_id[post_id] for post_id in ids if post_id in posts_by_id], next_cursor
+
+
+def popular_tags(limit=10):
+    """Return the most used tags, read from the cached counts."""
+    return db.session.scalars(
+        select(Tag).where(Tag.post_count > 0).order_by(Tag.post_count.desc(), Tag.name).limit(limit)
+    ).all()
+
+
+# -------------------------------
+# Maintenance
+# -------------------------------
+def backfill_tags(batch_size=500):
+    """
+    Build post_tags from the free-form `Post.tags` strings of existing posts. Returns the number of posts tagged.
+
+    Posts are read in id ranges of `batch_size`, each range in its own transaction. Posts
+    that are already in sync write nothing, so the command can be re-run safely.
+    """
+    tagged = 0
+    last_id = 0
+    while True:
+        batch = (
+            Post.query.filter(Post.id > last_id, Post.tags.isnot(None))
+            .order_by(Post.id).limit(batch_size).all()
+        )
+        if not batch:
+            break
+        for post in batch:
+            if set_post_tags(post, post.tags):
+                tagged += 1
+        db.session.commit()
+        last_id = batch[-1].id
+    return tagged
+
+
+def repair_tag_counts():
+    """Recompute every cached tag count from post_tags with one UPDATE. Returns the number of tags."""
+    actual = (
+        select(func.count())
+        .where(PostTag.tag_id == Tag.id)
+        .correlate(Tag)
+        .scalar_subquery()
+    )
+    updated = db.session.execute(update(Tag).values(post_count=actual)).rowcount
+    db.session.commit()
+    return updated
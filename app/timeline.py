@@ -0,0 +1,140 @@
+from flask import current_app
+# Importing the app context for reading the fan-out settings.
+
+from sqlalchemy import insert, literal, select
+# Importing SQL expression helpers for the bulk INSERT ... SELECT statements.
+
+from app import db
+from app.models import Follow, Post, TimelineEntry, User
+from app.pagination import paginate_keyset, encode_cursor
+
+
+# Importing the database instance, the models involved and the keyset pagination helpers.
+
+# -------------------------------
+# Fan-out on Write
+# -------------------------------
+def follower_count(user_id):
+    """Return how many users follow `user_id`, from the cached counter maintained by `app.follows`."""
+    return db.session.scalar(select(User.follower_count).where(User.id == user_id)) or 0
+
+
+def uses_fanout_on_read(user_id):
+    """Return True if posts by `user_id` are too widely followed to be copied into every timeline."""
+    return follower_count(user_id) > current_app.config.get('TIMELINE_FANOUT_MAX_FOLLOWERS', 1000)
+
+
+def fan_out_post(post):
+    """
+    Copy a newly created post into its author's and followers' timelines.
+
+    Must be called after the post has been flushed (so it has an id) and before the
+    surrounding transaction commits. Authors above TIMELINE_FANOUT_MAX_FOLLOWERS are
+    skipped; their posts are merged into readers' feeds at read time instead.
+    """
+    db.session.add(TimelineEntry(
+        user_id=post.author_id, post_id=post.id, author_id=post.author_id, date_posted=post.date_posted
+    ))
+    # Authors always see their own posts in their following feed.
+
+    if uses_fanout_on_read(post.author_id):
+        return
+
+    db.session.execute(insert(TimelineEntry).from_select(
+        ['user_id', 'post_id', 'author_id', 'date_posted'],
+        select(
+            Follow.follower_id,
+            literal(post.id),
+            literal(post.author_id),
+            literal(post.date_posted, type_=db.DateTime),
+        ).where(Follow.followed_id == post.author_id)
+    ))
+    # One INSERT ... SELECT writes a row for every follower without loading them into Python.
+
+
+def remove_post(post_id):
+    """Remove a post from every timeline it was copied into."""
+    TimelineEntry.query.filter_by(post_id=post_id).delete(synchronize_session=False)
+
+
+def on_follow(follower_id, followed_id):
+    """Backfill the follower's timeline with the followed user's most recent posts."""
+    if uses_fanout_on_read(followed_id):
+        return
+        # Their posts are pulled in at read time, nothing to copy.
+
+    recent = (
+        select(
+            literal(follower_id),
+            Post.id,
+            Post.author_id,
+            Post.date_posted,
+        )
+        .where(Post.author_id == followed_id)
+        .order_by(Post.date_posted.desc(), Post.id.desc())
+        .limit(current_app.config.get('TIMELINE_BACKFILL_LIMIT', 50))
+    )
+    db.session.execute(insert(TimelineEntry).from_select(
+        ['user_id', 'post_id', 'author_id', 'date_posted'], recent
+    ))
+
+
+def on_unfollow(follower_id, followed_id):
+    """Drop the unfollowed user's posts from the follower's timeline."""
+    TimelineEntry.query.filter_by(user_id=follower_id, author_id=followed_id).delete(synchronize_session=False)
+
+
+# -------------------------------
+# Reading the Feed
+# -------------------------------
+def fanout_on_read_authors(user_id):
+    """Return the ids of users followed by `user_id` whose posts are not fanned out on write."""
+    return db.session.scalars(
+        select(Follow.followed_id)
+        .join(User, User.id == Follow.followed_id)
+        .where(
+            Follow.follower_id == user_id,
+            User.follower_count > current_app.config.get('TIMELINE_FANOUT_MAX_FOLLOWERS', 1000)
+        )
+    ).all()
+    # Reads the cached follower counters instead of counting every followed user's followers.
+
+
+def following_feed(user_id, after=None, per_page=20):
+    """
+    Return one page of posts from the users `user_id` follows, newest first.
+
+    The materialized timeline is read with one indexed range scan; posts by widely
+    followed authors are merged in from the posts table. Returns (posts, next_cursor).
+    """
+    entries, entries_cursor = paginate_keyset(
+        TimelineEntry.query.filter_by(user_id=user_id),
+        TimelineEntry.date_posted, TimelineEntry.post_id,
+        after=after, per_page=per_page
+    )
+    candidates = {entry.post_id: entry.date_posted for entry in entries}
+    has_more = entries_cursor is not None
+
+    authors = fanout_on_read_authors(user_id)
+    if authors:
+        pulled, pulled_cursor = paginate_keyset(
+            Post.query.filter(Post.author_id.in_(authors)), Post.date_posted, Post.id,
+            after=after, per_page=per_page
+        )
+        candidates.update({post.id: post.date_posted for post in pulled})
+        # A post may appear in both sources if its author crossed the threshold; the dict de-duplicates it.
+        has_more = has_more or pulled_cursor is not None
+
+    ordered = sorted(candidates.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    has_more = has_more or len(ordered) > per_page
+    page = ordered[:per_page]
+
+    posts_by_id = {post.id: post for post in Post.query.filter(Post.id.in_([post_id for post_id, _ in page]))}
+    posts = [posts_by_id[post_id] for post_id, _ in page if post_id in posts_by_id]
+
+    next_cursor = None
+    if has_more and page:
+        post_id, date_posted = page[-1]
+        next_cursor = encode_cursor(date_posted, post_id)
+
+    return posts, next_cursor
@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+# Importing the lock, clock and ordered dict behind the bounded TTL+LRU cache.
+
+from flask import current_app, has_app_context
+# Importing the app context for reaching the per-process cache.
+
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+# Importing session events for invalidation and helpers for rebuilding a User from cached column values.
+
+from app import db
+from app.models import User
+
+
+# Importing the database instance and the cached model.
+
+PENDING_KEY = 'user_cache_changed'  # session.info key collecting user ids changed in the current transaction.
+
+
+# -------------------------------
+# TTL + LRU Cache
+# -------------------------------
+class UserCache:
+    """
+    Column values of recently loaded users, keyed by id, for the Flask-Login user loader.
+
+    Holds at most `maxsize` users, evicting the least recently used, and treats entries
+    older than `ttl` seconds as missing so changes made by other processes show up within
+    that window. Changes made through this process are invalidated when they commit.
+    Use `stats()` to read hit/miss counters.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (stored_at, {column: value})
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, user_id):
+        """Return the cached column values for `user_id`, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            stored_at, values = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[user_id]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._stats['hits'] += 1
+            return values
+
+    def put(self, user_id, values):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                if self._entries.pop(user_id, None) is not None:
+                    self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # -------------------------------
+    # Metrics
+    # -------------------------------
+    def stats(self):
+        """Return hit/miss counters, the hit rate and the current size for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+def get_cache():
+    """Return this process's UserCache, or None if the cache is disabled."""
+    return current_app.extensions.get('user_cache')
+
+
+# -------------------------------
+# User Loader
+# -------------------------------
+def _snapshot(user):
+    return {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+
+
+def _restore(values):
+    """Attach a User rebuilt from cached column values to the current session, without a query."""
+    user = User.__mapper__.class_manager.new_instance()
+    for key, value in values.items():
+        setattr(user, key, value)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+    # The merged copy is a normal persistent instance: relationships lazy-load and edits are flushed.
+
+
+def load_user(user_id):
+    """Return the User for a session's user id, from the cache when possible."""
+    cache = get_cache()
+    if cache is None:
+        return db.session.get(User, user_id)
+
+    existing = db.session.identity_map.get(identity_key(User, user_id))
+    if existing is not None:
+        return existing
+    # Already loaded in this request's session (which may hold newer, uncommitted values).
+
+    values = cache.get(user_id)
+    if values is not None:
+        return _restore(values)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        cache.put(user_id, _snapshot(user))
+    return user
+
+
+# -------------------------------
+# Invalidation
+# -------------------------------
+def mark_changed(user_ids):
+    """
+    Drop `user_ids` from the cache once the current transaction commits.
+
+    ORM changes to User rows are picked up automatically; call this after changing
+    user rows with Core UPDATE statements (e.g. the cached follow counters).
+    """
+    db.session.info.setdefault(PENDING_KEY, set()).update(user_ids)
+
+
+def _collect_changed_users(session, flush_context):
+    changed = {obj.id for obj in session.dirty if isinstance(obj, User) and session.is_modified(obj)}
+    changed.update(obj.id for obj in session.deleted if isinstance(obj, User))
+    if changed:
+        session.info.setdefault(PENDING_KEY, set()).update(changed)
+
+
+def _invalidate_on_commit(session):
+    changed = session.info.pop(PENDING_KEY, None)
+    cache = get_cache() if has_app_context() else None
+    if changed and cache is not None:
+        cache.invalidate(changed)
+
+
+def _discard_on_rollback(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def init_app(app):
+    """Create this process's user cache and hook invalidation into the database session."""
+    if app.config.get('USER_CACHE_ENABLED'):
+        app.extensions['user_cache'] = UserCache(
+            maxsize=app.config.get('USER_CACHE_SIZE', 10000),
+            ttl=app.config.get('USER_CACHE_TTL', 60),
+        )
+    for name, listener in (('after_flush', _collect_changed_users),
+                           ('after_commit', _invalidate_on_commit),
+                           ('after_rollback', _discard_on_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
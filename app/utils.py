@@ -1,40 +1,55 @@
 from flask import current_app
+from sqlalchemy import select
 from app import db
+from app.models import Reaction
+from app.reactions import TARGET_TYPES, add_reaction, remove_reaction
 
 
 # Helper functions to handle adding and removing likes
-def add_like(user, model, like_model, model_id):
+def add_like(user, model, model_id):
     """Helper function to add a like to a model (Post or Comment)."""
     try:
-        # Check if the like already exists
-        existing_like = like_model.query.filter_by(user_id=user.id,
-                                                   **{f"{model.__name__.lower()}_id": model_id}).first()
-        if existing_like:
-            return False  # Already liked
-
-        # Add a new like entry
-        like = like_model(user_id=user.id, **{f"{model.__name__.lower()}_id": model_id})
-        db.session.add(like)
+        # Insert the like (or turn a dislike into one) in a single statement
+        added = add_reaction(TARGET_TYPES[model], model_id, user.id)
         db.session.commit()
-        return True
+        return added  # False if already liked
 
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error(f"Error adding like to {model.__name__} {model_id}: {e}")
         return False
 
 
-def remove_like(user, like_model, model_id):
+def remove_like(user, model, model_id):
     """Helper function to remove a like from a model (Post or Comment)."""
     try:
-        # Find the like entry to delete
-        like = like_model.query.filter_by(user_id=user.id,
-                                          **{f"{like_model.__name__.replace('Like', '').lower()}_id": model_id}).first()
-        if like:
-            db.session.delete(like)
-            db.session.commit()
-            return True
-        return False
+        # Delete the like entry if it exists, in a single statement
+        removed = remove_reaction(TARGET_TYPES[model], model_id, user.id)
+        db.session.commit()
+        return removed  # False if there was nothing to remove
 
     except Exception as e:
-        current_app.logger.error(f"Error removing like from {like_model.__name__} {model_id}: {e}")
+        db.session.rollback()
+        current_app.logger.error(f"Error removing like from {model.__name__} {model_id}: {e}")
         return False
+
+
+def get_user_reactions(user_id, model, model_ids):
+    """Return {model_id: kind} for the `model_ids` the user has reacted to, in one IN query."""
+    if user_id is None or not model_ids:
+        return {}
+
+    rows = db.session.execute(
+        select(Reaction.target_id, Reaction.kind).where(
+            Reaction.user_id == user_id,
+            Reaction.target_type == TARGET_TYPES[model],
+            Reaction.target_id.in_(set(model_ids))
+        )
+    )
+    # A single range probe on ix_reactions_user_target returns both likes and dislikes.
+    return {row.target_id: row.kind for row in rows}
+
+
+def get_reacted_ids(user_id, model, model_ids, kind=Reaction.LIKE):
+    """Return the subset of `model_ids` that the user has reacted to with `kind`."""
+    return {model_id for model_id, reacted in get_user_reactions(user_id, model, model_ids).items() if reacted == kind}
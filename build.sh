@@ -10,3 +10,6 @@ flask db migrate -m "init"
 
 # Run migrations
 flask db upgrade
+
+# Fingerprint and precompress static files
+flask assets build
@@ -14,6 +14,71 @@ class Config:
     TEMPLATES_AUTO_RELOAD = True  # Ensures templates are auto-reloaded during development.
     FLASK_DEBUG = 1  # Enables Flask's debugging mode (useful for development).
     DEBUG = True  # Enables general debug mode in the application.
+    FEED_PAGE_SIZE = int(os.environ.get('FEED_PAGE_SIZE', 20))  # Number of posts shown per feed page.
+    FEED_MAX_PAGE_SIZE = 100  # Upper bound for the `?per_page=` query argument.
+    TIMELINE_FANOUT_MAX_FOLLOWERS = 1000  # Authors with more followers are merged into feeds at read time.
+    TIMELINE_BACKFILL_LIMIT = 50  # Recent posts copied into a timeline when following someone.
+    COMMENTS_PAGE_SIZE = 20  # Top-level comments (or replies) loaded per page on the post detail page.
+    COMMENT_TREE_MAX_DEPTH = 3  # Reply levels loaded under each page of comments.
+    COMMENT_TREE_MAX_NODES = 200  # Total comments loaded per page, including replies.
+    REACTION_WRITE_BEHIND = os.environ.get('REACTION_WRITE_BEHIND', '0') == '1'  # Buffer post like/dislike toggles in memory and write them in batches.
+    REACTION_FLUSH_INTERVAL_MS = 200  # How often the reaction buffer is flushed, in milliseconds.
+    REACTION_FLUSH_MAX_EVENTS = 500  # Flush early once this many toggles are buffered.
+    REACTION_BATCH_MAX = 50  # Most reaction toggles accepted in one batch request.
+    SUGGESTIONS_TOP_K = 20  # Follow suggestions stored per user.
+    SUGGESTIONS_SHOWN = 5  # Follow suggestions shown on the profile and explore pages.
+    SUGGESTIONS_INCREMENTAL_LIMIT = 200  # Followed user's follows scanned when updating suggestions on follow.
+    USERNAME_CACHE_ENABLED = os.environ.get('USERNAME_CACHE_ENABLED', '1') == '1'  # Answer username autocomplete from an in-process sorted array.
+    USERNAME_CACHE_TTL = 300  # Seconds before the in-process username array is reloaded (picks up other workers' changes).
+    AUTOCOMPLETE_LIMIT = 10  # Usernames returned per autocomplete request by default.
+    AUTOCOMPLETE_MAX_LIMIT = 25  # Upper bound for the `?limit=` query argument.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))  # bcrypt cost factor; hashes made at another cost are upgraded on login.
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # Processes hashing passwords off the request threads; 0 hashes inline.
+    PASSWORD_HASH_MAX_PENDING = 32  # Hash/check operations queued or running at once per app process.
+    PASSWORD_HASH_WAIT_SECONDS = 5.0  # How long a request waits for a hashing slot before giving up.
+    USER_CACHE_ENABLED = True  # Serve the Flask-Login user loader from an in-process TTL+LRU cache.
+    USER_CACHE_SIZE = 10000  # Users kept in the cache per process; the least recently used are evicted.
+    USER_CACHE_TTL = 60  # Seconds a cached user is trusted; bounds staleness from other processes' writes.
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'sql')  # Where session data lives: 'sql', 'memory' or 'cookie' (Flask's signed cookie).
+    SESSION_COMPRESS_THRESHOLD = 512  # Serialized sessions at least this many bytes are stored zlib-compressed.
+    MODERATION_BASE_TERMS = ['spam', 'advertisement', 'clickbait']  # Always blocked, on top of the blocked_terms table.
+    MODERATION_VERSION_CHECK_SECONDS = 10  # How often each process checks whether the blocked term list changed.
+    MODERATION_WORKERS = int(os.environ.get('MODERATION_WORKERS', 0))  # In-process moderation worker threads; 0 leaves it to `flask moderation work`.
+    MODERATION_CLASSIFIER = 'app.moderation_queue.HeuristicClassifier'  # Dotted path of the Classifier that scores queued posts and comments.
+    MODERATION_FLAG_THRESHOLD = 0.5  # Classifier scores at or above this flag the item for review.
+    MODERATION_MAX_LINKS = 3  # Posts or comments with this many links are flagged by the heuristic classifier.
+    MODERATION_BATCH_SIZE = 50  # Moderation jobs claimed per worker batch.
+    MODERATION_POLL_SECONDS = 2.0  # How often an idle moderation worker looks for new jobs.
+    MODERATION_LEASE_SECONDS = 60  # How long a claimed job stays with its worker before another may retry it.
+    MODERATION_MAX_ATTEMPTS = 5  # Classification attempts before a job is marked failed.
+    MODERATION_RETRY_SECONDS = 30  # First retry delay after a failed classification; doubles with each attempt.
+    AVATAR_DIR = os.environ.get('AVATAR_DIR')  # Where resized pictures are written and served from (/avatars/...); defaults to the instance folder.
+    AVATAR_UPLOAD_DIR = os.environ.get('AVATAR_UPLOAD_DIR')  # Where original uploads are kept; defaults to the instance folder.
+    AVATAR_WORKERS = 2  # Threads resizing uploaded profile pictures in the background; 0 processes them inline.
+    AVATAR_SIZES = [48, 96, 256]  # Square profile picture variants, in pixels; templates pick the smallest that fits.
+    AVATAR_MAX_UPLOAD_BYTES = 5 * 1024 * 1024  # Largest accepted profile picture; also re-checked while streaming.
+    MAX_CONTENT_LENGTH = AVATAR_MAX_UPLOAD_BYTES + 64 * 1024  # Larger request bodies are refused with 413 before they are read (the picture plus the other form fields).
+    AVATAR_MAX_PIXELS = 40_000_000  # Larger images are rejected from their header, before anything is decoded.
+    ASSET_FINGERPRINTS = os.environ.get('ASSET_FINGERPRINTS', '1') == '1'  # Serve `flask assets build` output (hashed names, precompressed, immutable) when a build exists.
+    ASSET_OUTPUT_DIR = 'dist'  # Folder under app/static that `flask assets build` writes to.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Bearer token for /metrics; the endpoint is disabled without one.
+
+# Configuration class for deployments (selected with create_app('production') or FLASK_CONFIG=production).
+class ProductionConfig(Config):
+    SECRET_KEY = os.environ.get('SECRET_KEY')  # Required; create_app refuses to start production without one.
+    TEMPLATES_AUTO_RELOAD = False  # Templates are compiled once per worker instead of being checked on every render.
+    FLASK_DEBUG = 0  # Disables Flask's debugging mode.
+    DEBUG = False  # Disables the debugger and reloader.
+    SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', '1') == '1'  # Only send the session cookie over HTTPS.
+    REMEMBER_COOKIE_SECURE = SESSION_COOKIE_SECURE  # Same for Flask-Login's remember-me cookie.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))  # Connections kept open per worker process; size against gunicorn threads.
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))  # Extra connections opened under bursts, closed when returned.
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # Seconds a request waits for a free connection before failing.
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Reconnect connections older than this many seconds.
+    DB_POOL_PRE_PING = True  # Check a connection is alive before handing it out (survives database restarts).
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))  # PostgreSQL cancels statements running longer than this; 0 disables.
+    DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', '0') == '1'  # Behind PgBouncer (transaction pooling): no app-side pool, per-transaction timeout.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Bearer token for /metrics; the endpoint is disabled without one.
 
 # Configuration class specifically for testing environments.
 class TestingConfig:
@@ -22,3 +87,60 @@ class TestingConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # Disables SQLAlchemy's event system (not needed for testing).
     WTF_CSRF_ENABLED = False  # Disables CSRF protection for testing forms (simplifies testing).
     SECRET_KEY = 'test_secret_key'  # Static secret key used during testing (not fetched from environment variables).
+    FEED_PAGE_SIZE = 20  # Number of posts shown per feed page.
+    FEED_MAX_PAGE_SIZE = 100  # Upper bound for the `?per_page=` query argument.
+    TIMELINE_FANOUT_MAX_FOLLOWERS = 1000  # Authors with more followers are merged into feeds at read time.
+    TIMELINE_BACKFILL_LIMIT = 50  # Recent posts copied into a timeline when following someone.
+    COMMENTS_PAGE_SIZE = 20  # Top-level comments (or replies) loaded per page on the post detail page.
+    COMMENT_TREE_MAX_DEPTH = 3  # Reply levels loaded under each page of comments.
+    COMMENT_TREE_MAX_NODES = 200  # Total comments loaded per page, including replies.
+    REACTION_WRITE_BEHIND = False  # Buffer post like/dislike toggles in memory and write them in batches.
+    REACTION_FLUSH_INTERVAL_MS = 200  # How often the reaction buffer is flushed, in milliseconds.
+    REACTION_FLUSH_MAX_EVENTS = 500  # Flush early once this many toggles are buffered.
+    REACTION_BATCH_MAX = 50  # Most reaction toggles accepted in one batch request.
+    SUGGESTIONS_TOP_K = 20  # Follow suggestions stored per user.
+    SUGGESTIONS_SHOWN = 5  # Follow suggestions shown on the profile and explore pages.
+    SUGGESTIONS_INCREMENTAL_LIMIT = 200  # Followed user's follows scanned when updating suggestions on follow.
+    USERNAME_CACHE_ENABLED = True  # Answer username autocomplete from an in-process sorted array.
+    USERNAME_CACHE_TTL = 300  # Seconds before the in-process username array is reloaded (picks up other workers' changes).
+    AUTOCOMPLETE_LIMIT = 10  # Usernames returned per autocomplete request by default.
+    AUTOCOMPLETE_MAX_LIMIT = 25  # Upper bound for the `?limit=` query argument.
+    BCRYPT_LOG_ROUNDS = 4  # bcrypt cost factor; hashes made at another cost are upgraded on login.
+    PASSWORD_HASH_WORKERS = 0  # Processes hashing passwords off the request threads; 0 hashes inline.
+    PASSWORD_HASH_MAX_PENDING = 32  # Hash/check operations queued or running at once per app process.
+    PASSWORD_HASH_WAIT_SECONDS = 5.0  # How long a request waits for a hashing slot before giving up.
+    USER_CACHE_ENABLED = True  # Serve the Flask-Login user loader from an in-process TTL+LRU cache.
+    USER_CACHE_SIZE = 10000  # Users kept in the cache per process; the least recently used are evicted.
+    USER_CACHE_TTL = 60  # Seconds a cached user is trusted; bounds staleness from other processes' writes.
+    SESSION_BACKEND = 'memory'  # Where session data lives: 'sql', 'memory' or 'cookie' (Flask's signed cookie).
+    SESSION_COMPRESS_THRESHOLD = 512  # Serialized sessions at least this many bytes are stored zlib-compressed.
+    MODERATION_BASE_TERMS = ['spam', 'advertisement', 'clickbait']  # Always blocked, on top of the blocked_terms table.
+    MODERATION_VERSION_CHECK_SECONDS = 0  # How often each process checks whether the blocked term list changed.
+    MODERATION_WORKERS = 0  # In-process moderation worker threads; 0 leaves it to `flask moderation work`.
+    MODERATION_CLASSIFIER = 'app.moderation_queue.HeuristicClassifier'  # Dotted path of the Classifier that scores queued posts and comments.
+    MODERATION_FLAG_THRESHOLD = 0.5  # Classifier scores at or above this flag the item for review.
+    MODERATION_MAX_LINKS = 3  # Posts or comments with this many links are flagged by the heuristic classifier.
+    MODERATION_BATCH_SIZE = 50  # Moderation jobs claimed per worker batch.
+    MODERATION_POLL_SECONDS = 2.0  # How often an idle moderation worker looks for new jobs.
+    MODERATION_LEASE_SECONDS = 60  # How long a claimed job stays with its worker before another may retry it.
+    MODERATION_MAX_ATTEMPTS = 5  # Classification attempts before a job is marked failed.
+    MODERATION_RETRY_SECONDS = 30  # First retry delay after a failed classification; doubles with each attempt.
+    AVATAR_DIR = None  # Where resized pictures are written and served from (/avatars/...); defaults to the instance folder.
+    AVATAR_UPLOAD_DIR = None  # Where original uploads are kept; defaults to the instance folder.
+    AVATAR_WORKERS = 0  # Threads resizing uploaded profile pictures in the background; 0 processes them inline.
+    AVATAR_SIZES = [48, 96, 256]  # Square profile picture variants, in pixels; templates pick the smallest that fits.
+    AVATAR_MAX_UPLOAD_BYTES = 5 * 1024 * 1024  # Largest accepted profile picture; also re-checked while streaming.
+    MAX_CONTENT_LENGTH = AVATAR_MAX_UPLOAD_BYTES + 64 * 1024  # Larger request bodies are refused with 413 before they are read (the picture plus the other form fields).
+    AVATAR_MAX_PIXELS = 40_000_000  # Larger images are rejected from their header, before anything is decoded.
+    ASSET_FINGERPRINTS = False  # Serve `flask assets build` output (hashed names, precompressed, immutable) when a build exists.
+    ASSET_OUTPUT_DIR = 'dist'  # Folder under app/static that `flask assets build` writes to.
+    METRICS_TOKEN = None  # Bearer token for /metrics; the endpoint is disabled without one.
+
+
+# Configurations selectable by name through create_app(config_name).
+config_by_name = {
+    'default': Config,
+    'development': Config,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
@@ -1,8 +1,9 @@
+import os
+
 from app import create_app
-from config import Config
 
 
-app = create_app(Config)
+app = create_app(os.environ.get('FLASK_CONFIG', 'default'))  # e.g. FLASK_CONFIG=production
 
 
 if __name__ == "__main__":
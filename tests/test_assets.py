@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from flask import url_for
+from app import create_app, assets
+
+
+class AssetsTestCase(unittest.TestCase):
+    """Test cases for the fingerprinted, precompressed static asset pipeline."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Build a small static folder and an app that serves it."""
+        cls.static = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.static, 'css'))
+        os.makedirs(os.path.join(cls.static, 'img'))
+        cls.css = ('body { color: #2e7d32; }\n' * 200).encode('utf-8')
+        with open(os.path.join(cls.static, 'css', 'base.css'), 'wb') as handle:
+            handle.write(cls.css)
+        with open(os.path.join(cls.static, 'img', 'logo.webp'), 'wb') as handle:
+            handle.write(os.urandom(2048))
+
+        cls.stats = assets.build(cls.static)
+
+        cls.app = create_app('testing')
+        cls.app.static_folder = cls.static
+        cls.app.config['ASSET_FINGERPRINTS'] = True
+        assets.init_app(cls.app)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.static)
+
+    def manifest(self):
+        with open(os.path.join(self.static, 'dist', assets.MANIFEST_NAME)) as handle:
+            return json.load(handle)
+
+    def static_url(self, filename):
+        with self.app.test_request_context():
+            return url_for('static', filename=filename)
+
+    def test_build_fingerprints_and_compresses_text_files(self):
+        """Test that files are copied under hashed names and only text files get compressed variants."""
+        manifest = self.manifest()
+        self.assertEqual(sorted(manifest), ['css/base.css', 'img/logo.webp'])
+
+        css = manifest['css/base.css']
+        self.assertRegex(css['path'], r'^dist/css/base\.[0-9a-f]{12}\.css$')
+        self.assertIn('gzip', css['encodings'])
+        with open(os.path.join(self.static, css['path'] + '.gz'), 'rb') as handle:
+            self.assertEqual(gzip.decompress(handle.read()), self.css)
+        if assets.brotli is not None:
+            self.assertEqual(css['encodings'], ['br', 'gzip'])
+
+        self.assertEqual(manifest['img/logo.webp']['encodings'], [])
+        self.assertEqual(self.stats['files'], 2)
+        self.assertLess(self.stats['smallest_bytes'], self.stats['bytes'])
+
+    def test_rebuild_is_stable(self):
+        """Test that rebuilding unchanged files produces the same names."""
+        before = self.manifest()
+        assets.build(self.static)
+        self.assertEqual(self.manifest(), before)
+
+    def test_url_for_resolves_fingerprinted_names(self):
+        """Test that url_for('static') points at the built copy, and unknown files are left alone."""
+        self.assertEqual(self.static_url('css/base.css'), '/static/' + self.manifest()['css/base.css']['path'])
+        self.assertEqual(self.static_url('js/missing.js'), '/static/js/missing.js')
+
+    def test_negotiates_encoding(self):
+        """Test that the best accepted encoding is served with immutable caching."""
+        url = self.static_url('css/base.css')
+
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'text/css')
+        self.assertEqual(gzip.decompress(response.data), self.css)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn(f'max-age={assets.IMMUTABLE_MAX_AGE}', response.headers['Cache-Control'])
+        response.close()
+
+        if assets.brotli is not None:
+            response = self.client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+            self.assertEqual(response.headers['Content-Encoding'], 'br')
+            self.assertEqual(assets.brotli.decompress(response.data), self.css)
+            response.close()
+
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip;q=0'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, self.css)
+        response.close()
+
+    def test_plain_files_keep_default_caching(self):
+        """Test that unbuilt files are served as before."""
+        response = self.client.get('/static/css/base.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response.headers.get('Cache-Control', ''))
+        response.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
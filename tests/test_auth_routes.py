@@ -1,6 +1,7 @@
 import unittest
-from app import create_app, db, bcrypt
+from app import create_app, db
 from app.models import User
+from app.passwords import get_hasher
 from flask import url_for
 
 
@@ -29,7 +30,7 @@ class AuthTestCase(unittest.TestCase):
         self.user = User(
             username='testuser',
             email='testuser@example.com',
-            password_hash=bcrypt.generate_password_hash(self.user_password).decode('utf-8')
+            password_hash=get_hasher().hash_password(self.user_password)
         )
         db.session.add(self.user)
         db.session.commit()
@@ -72,6 +73,19 @@ class AuthTestCase(unittest.TestCase):
         self.assertIn(b'This field is required.', response.data)  # Validation error
         self.assertIsNone(User.query.filter_by(email='invalidemail').first())
 
+    def test_register_rejects_reserved_username(self):
+        """Test that names taken by fixed /users/ pages cannot be registered."""
+        with self.app.test_request_context():
+            response = self.client.post(url_for('auth.register'), data={
+                'username': 'Account',
+                'email': 'account@example.com',
+                'password': 'password123',
+                'confirm_password': 'password123'
+            }, follow_redirects=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'This username is reserved.', response.data)
+        self.assertIsNone(User.query.filter_by(email='account@example.com').first())
+
     def test_login_get(self):
         with self.app.test_request_context():
             """Test the GET request for the login route."""
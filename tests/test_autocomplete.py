@@ -0,0 +1,103 @@
+import unittest
+from flask import g, url_for
+from app import create_app, db, autocomplete
+from app.models import User
+
+
+class AutocompleteTestCase(unittest.TestCase):
+    """Test cases for username autocomplete."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create users with overlapping prefixes
+        password_hash = 'hashed_password'
+        names = ['Rosa', 'rosemary', 'Roots_and_Shoots', 'rootsy', 'basil']
+        cls.users = [User(username=name, email=f'{name.lower()}@example.com', password_hash=password_hash)
+                     for name in names]
+        db.session.add_all(cls.users)
+        db.session.commit()
+
+        # Log in as the first user
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.users[0].id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def tearDown(self):
+        """Reset the cache and settings after each test."""
+        self.app.config['USERNAME_CACHE_ENABLED'] = True
+        self.app.extensions.pop('username_index', None)
+
+    def login_as(self, client, user):
+        """Log `client` in as `user` (or out), dropping the user Flask-Login cached on the shared app context."""
+        with client.session_transaction() as session:
+            session.pop('_user_id', None)
+            if user is not None:
+                session['_user_id'] = user.id
+        g.pop('_login_user', None)
+
+    def test_cache_and_database_agree(self):
+        """Test that the sorted array and the indexed query return the same matches."""
+        for prefix in ['ro', 'ROS', '@root', 'roots_', 'b', 'x']:
+            self.assertEqual(autocomplete.complete_usernames(prefix, 10),
+                             autocomplete.query_usernames(autocomplete.normalize_prefix(prefix), 10), prefix)
+        self.assertEqual(autocomplete.complete_usernames('ro', 10), ['Roots_and_Shoots', 'rootsy', 'Rosa', 'rosemary'])
+
+    def test_limit_and_empty_prefix(self):
+        """Test that results are capped and an empty prefix returns nothing."""
+        self.assertEqual(autocomplete.complete_usernames('ro', 2), ['Roots_and_Shoots', 'rootsy'])
+        self.assertEqual(autocomplete.complete_usernames('  @ ', 5), [])
+
+    def test_like_wildcards_are_literal(self):
+        """Test that '_' and '%' in a prefix match literally in the database query."""
+        self.assertEqual(autocomplete.query_usernames('roots_', 10), ['Roots_and_Shoots'])
+        self.assertEqual(autocomplete.query_usernames('%', 10), [])
+
+    def test_cache_updates_on_registration_and_rename(self):
+        """Test that registering and renaming update the cached array without a reload."""
+        index = autocomplete.get_index()
+        index.refresh()
+        client = self.app.test_client()
+        self.login_as(client, None)
+        with self.app.test_request_context():
+            client.post(url_for('auth.register'), data={
+                'username': 'Rhubarb', 'email': 'rhubarb@example.com',
+                'password': 'password', 'confirm_password': 'password'
+            })
+        self.assertEqual(index.complete('rh'), ['Rhubarb'])
+
+        user = User.query.filter_by(username='Rhubarb').one()
+        self.login_as(client, user)
+        with self.app.test_request_context():
+            client.post(url_for('profile.account'), data={'username': 'Radish', 'email': 'rhubarb@example.com'})
+        self.assertEqual(index.complete('rh'), [])
+        self.assertEqual(index.complete('rad'), ['Radish'])
+
+        self.login_as(self.client, self.users[0])
+        db.session.delete(user)
+        db.session.commit()
+
+    def test_autocomplete_endpoint(self):
+        """Test the JSON endpoint with the cache on and off."""
+        for enabled in (True, False):
+            self.app.config['USERNAME_CACHE_ENABLED'] = enabled
+            with self.app.test_request_context():
+                response = self.client.get(url_for('profile.autocomplete_usernames', q='@Ros', limit=1))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json(), {'usernames': ['Rosa']})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from flask import url_for, g
+from werkzeug.datastructures import FileStorage
+from app import create_app, db, avatars
+from app.models import User
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def make_image(fmt='PNG', size=(600, 400), color=(40, 160, 60)):
+    """Return the bytes of a solid-colour test image."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def upload(data, filename='me.png'):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+
+@unittest.skipIf(Image is None, 'Pillow is not installed')
+class AvatarsTestCase(unittest.TestCase):
+    """Test cases for the profile picture pipeline."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.storage = tempfile.mkdtemp()
+        cls.app.config['AVATAR_DIR'] = os.path.join(cls.storage, 'avatars')
+        cls.app.config['AVATAR_UPLOAD_DIR'] = os.path.join(cls.storage, 'uploads')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a test user
+        cls.user = User(username='pictured', email='pictured@example.com', password_hash='hashed_password')
+        db.session.add(cls.user)
+        db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+        shutil.rmtree(cls.storage)
+
+    def setUp(self):
+        g.pop('_login_user', None)
+        with self.client.session_transaction() as session:
+            session['_user_id'] = self.user.id
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(User).filter_by(id=self.user.id).update({'profile_picture': None, 'username': 'pictured'})
+        db.session.commit()
+        shutil.rmtree(self.storage)
+        os.makedirs(self.storage)
+
+    def variant_files(self):
+        return sorted(os.listdir(self.app.config['AVATAR_DIR']))
+
+    def test_upload_is_stored_under_its_content_hash(self):
+        """Test that identical uploads share one original named by their hash."""
+        data = make_image()
+        key = avatars.save_upload(upload(data))
+        self.assertEqual(len(key), avatars.KEY_LENGTH)
+        self.assertEqual(avatars.save_upload(upload(data)), key)
+        self.assertEqual(os.listdir(self.app.config['AVATAR_UPLOAD_DIR']), [key])
+
+    def test_upload_is_read_in_chunks(self):
+        """Test that the upload stream is consumed piece by piece rather than all at once."""
+        data = make_image(size=(1500, 1500))
+        reads = []
+        stream = io.BytesIO(data)
+        original_read = stream.read
+
+        def read(size=-1):
+            reads.append(size)
+            return original_read(size)
+
+        stream.read = read
+        avatars.save_upload(FileStorage(stream=stream, filename='big.png'))
+        self.assertTrue(all(size == avatars.CHUNK_SIZE for size in reads))
+
+    def test_bad_uploads_are_rejected(self):
+        """Test that non-images, oversized files and pixel bombs are refused and leave nothing behind."""
+        with self.assertRaises(avatars.AvatarRejected):
+            avatars.save_upload(upload(b'GIF89a not allowed'))
+
+        self.app.config['AVATAR_MAX_UPLOAD_BYTES'] = 1024
+        try:
+            with self.assertRaises(avatars.AvatarRejected):
+                avatars.save_upload(upload(make_image(size=(800, 800)) + b'\0' * 4096))
+        finally:
+            self.app.config['AVATAR_MAX_UPLOAD_BYTES'] = 5 * 1024 * 1024
+
+        self.app.config['AVATAR_MAX_PIXELS'] = 100
+        try:
+            with self.assertRaises(avatars.AvatarRejected):
+                avatars.save_upload(upload(make_image()))
+        finally:
+            self.app.config['AVATAR_MAX_PIXELS'] = 40_000_000
+
+        self.assertEqual(os.listdir(self.app.config['AVATAR_UPLOAD_DIR']), [])
+
+    def test_variants_are_square_in_every_size_and_format(self):
+        """Test that processing writes each configured size as WebP and JPEG."""
+        key = avatars.save_upload(upload(make_image('JPEG', size=(1200, 800)), 'me.jpg'))
+        self.assertEqual(avatars.render_variants(key), 6)
+        self.assertEqual(self.variant_files(),
+                         sorted(f'{key}-{size}.{ext}' for size in (48, 96, 256) for ext in ('webp', 'jpeg')))
+        with Image.open(os.path.join(self.app.config['AVATAR_DIR'], f'{key}-96.webp')) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (96, 96)))
+        self.assertEqual(avatars.render_variants(key), 0)
+        # Already rendered: nothing is rewritten.
+
+    def test_processor_assigns_only_the_latest_upload(self):
+        """Test that the processor points the user at their picture and skips superseded uploads."""
+        processor = avatars.get_processor()
+        first = avatars.save_upload(upload(make_image(color=(200, 0, 0))))
+        second = avatars.save_upload(upload(make_image(color=(0, 0, 200))))
+
+        processor._latest[self.user.id] = second
+        processor._process(self.user.id, first)
+        db.session.expire_all()
+        self.assertIsNone(db.session.get(User, self.user.id).profile_picture)
+        # A newer upload is pending, so the older one is rendered but not assigned.
+
+        processor.submit(self.user.id, second)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(User, self.user.id).profile_picture, second)
+        self.assertEqual(processor.stats()['pending'], 0)
+
+    def test_account_route_uploads_and_processes(self):
+        """Test that uploading through the account form ends with a processed picture."""
+        with self.app.test_request_context():
+            url = url_for('profile.account')
+        response = self.client.post(url, data={
+            'username': 'pictured', 'email': 'pictured@example.com',
+            'profile_picture': (io.BytesIO(make_image()), 'me.png'),
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 302)
+
+        db.session.expire_all()
+        key = db.session.get(User, self.user.id).profile_picture
+        self.assertEqual(len(self.variant_files()), 6)
+        self.assertTrue(all(name.startswith(key) for name in self.variant_files()))
+
+    def test_account_route_reports_rejected_upload(self):
+        """Test that a bad upload is reported on the form and nothing changes."""
+        with self.app.test_request_context():
+            url = url_for('profile.account')
+        response = self.client.post(url, data={
+            'username': 'renamed', 'email': 'pictured@example.com',
+            'profile_picture': (io.BytesIO(b'not an image at all'), 'me.png'),
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Only JPEG and PNG images', response.data)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(User, self.user.id).username, 'pictured')
+
+    def test_account_route_refuses_oversized_body(self):
+        """Test that a body over MAX_CONTENT_LENGTH is refused with 413 before the upload is stored."""
+        with self.app.test_request_context():
+            url = url_for('profile.account')
+        self.app.config['MAX_CONTENT_LENGTH'] = 4096
+        try:
+            response = self.client.post(url, data={
+                'username': 'renamed', 'email': 'pictured@example.com',
+                'profile_picture': (io.BytesIO(make_image(size=(800, 800)) + b'\0' * 8192), 'me.png'),
+            }, content_type='multipart/form-data')
+        finally:
+            self.app.config['MAX_CONTENT_LENGTH'] = self.app.config['AVATAR_MAX_UPLOAD_BYTES'] + 64 * 1024
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(os.path.exists(self.app.config['AVATAR_UPLOAD_DIR']))
+        db.session.expire_all()
+        self.assertEqual(db.session.get(User, self.user.id).username, 'pictured')
+
+    def test_variants_are_served_from_avatar_dir(self):
+        """Test that processed pictures are served from AVATAR_DIR with immutable caching."""
+        key = avatars.save_upload(upload(make_image()))
+        avatars.render_variants(key)
+        with self.app.test_request_context():
+            url = avatars.avatar_url(key, 96)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/webp')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        response.close()
+        self.assertEqual(self.client.get('/avatars/missing-96.webp').status_code, 404)
+
+    def test_avatar_url_picks_the_smallest_variant_that_fits(self):
+        """Test the template helper for processed, legacy and missing pictures."""
+        key = 'a' * avatars.KEY_LENGTH
+        with self.app.test_request_context():
+            self.assertEqual(avatars.avatar_url(key, 40), f'/avatars/{key}-48.webp')
+            self.assertEqual(avatars.avatar_url(key, 80), f'/avatars/{key}-96.webp')
+            self.assertEqual(avatars.avatar_url(key, 1000, 'jpeg'), f'/avatars/{key}-256.jpeg')
+            self.assertEqual(avatars.avatar_url('https://cdn.example/me.png'), 'https://cdn.example/me.png')
+            self.assertEqual(avatars.avatar_url(None), '/static/img/default_profile.webp')
+
+
+if __name__ == '__main__':
+    unittest.main()
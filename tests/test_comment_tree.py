@@ -0,0 +1,148 @@
+import unittest
+from flask import url_for
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Post, Comment
+from app.comment_tree import load_comment_tree, load_comment_page, iter_tree
+
+
+class CommentTreeTestCase(unittest.TestCase):
+    """Test cases for the recursive CTE comment tree loader."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a test user
+        password_hash = 'hashed_password'
+        cls.user = User(username='threader', email='threader@example.com', password_hash=password_hash)
+        db.session.add(cls.user)
+        db.session.commit()
+
+        # Log in the test user
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.user.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Create a thread: two roots, a reply chain three levels deep under the first."""
+        self.post = Post(title='Threaded Post', content='Discuss', author_id=self.user.id)
+        db.session.add(self.post)
+        db.session.flush()
+
+        def add(content, parent=None):
+            comment = Comment(content=content, author_id=self.user.id, post_id=self.post.id,
+                              parent_comment_id=parent.id if parent else None)
+            db.session.add(comment)
+            db.session.flush()
+            return comment
+
+        self.root = add('Root one')
+        self.reply = add('Reply', self.root)
+        self.nested = add('Nested reply', self.reply)
+        add('Root two')
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(Comment).delete()
+        db.session.query(Post).delete()
+        db.session.commit()
+
+    def test_tree_is_nested(self):
+        """Test that replies are attached under their parents."""
+        roots = load_comment_tree(self.post.id)
+        self.assertEqual([node.content for node in roots], ['Root one', 'Root two'])
+        self.assertEqual(roots[0].replies[0].content, 'Reply')
+        self.assertEqual(roots[0].replies[0].replies[0].content, 'Nested reply')
+        self.assertEqual(roots[0].replies[0].replies[0].author_username, 'threader')
+
+    def test_depth_and_size_limits(self):
+        """Test that max_depth and max_nodes bound the slice."""
+        shallow = load_comment_tree(self.post.id, max_depth=1)
+        self.assertEqual(len(list(iter_tree(shallow))), 3)
+        self.assertEqual(shallow[0].replies[0].replies, [])
+
+        small = load_comment_tree(self.post.id, max_nodes=3)
+        self.assertEqual(len(list(iter_tree(small))), 3)
+
+    def test_subtree_from_root_ids(self):
+        """Test loading only the replies under a given comment."""
+        subtree = load_comment_tree(self.post.id, root_ids=[self.reply.id])
+        self.assertEqual([node.content for node in iter_tree(subtree)], ['Reply', 'Nested reply'])
+
+    def test_reply_counts_flag_truncated_branches(self):
+        """Test that nodes cut off by the depth limit report their missing replies."""
+        roots = load_comment_tree(self.post.id, max_depth=0)
+        self.assertEqual(roots[0].reply_count, 1)
+        self.assertTrue(roots[0].has_more_replies)
+        self.assertFalse(roots[1].has_more_replies)
+
+    def test_load_comment_page_walks_top_level_comments(self):
+        """Test keyset pagination over top-level comments, oldest first."""
+        first, cursor = load_comment_page(self.post.id, per_page=1)
+        self.assertEqual([node.content for node in first], ['Root one'])
+        self.assertEqual(first[0].replies[0].content, 'Reply')
+        second, cursor = load_comment_page(self.post.id, after=cursor, per_page=1)
+        self.assertEqual([node.content for node in second], ['Root two'])
+        self.assertIsNone(cursor)
+
+    def test_comments_json_endpoint(self):
+        """Test the JSON endpoint for the next page and for a comment's replies."""
+        with self.app.test_request_context():
+            response = self.client.get(url_for('post.post_comments', post_id=self.post.id, parent=self.root.id))
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([c['content'] for c in data['comments']], ['Reply'])
+        self.assertEqual(data['comments'][0]['replies'][0]['content'], 'Nested reply')
+        self.assertIsNone(data['next_cursor'])
+
+    def test_post_detail_paginates_comments(self):
+        """Test that only the first page of comments is rendered server-side."""
+        self.app.config['COMMENTS_PAGE_SIZE'] = 1
+        try:
+            with self.app.test_request_context():
+                response = self.client.get(url_for('post.post_detail', post_id=self.post.id))
+        finally:
+            self.app.config['COMMENTS_PAGE_SIZE'] = 20
+        self.assertIn(b'Root one', response.data)
+        self.assertNotIn(b'Root two', response.data)
+        self.assertIn(b'Load more comments', response.data)
+
+    def test_tree_loads_in_one_query(self):
+        """Test that the whole thread is fetched with a single statement."""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        post_id = self.post.id
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            list(iter_tree(load_comment_tree(post_id)))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(len(statements), 1)
+
+    def test_post_detail_renders_nested_replies(self):
+        """Test that the post detail page shows replies."""
+        with self.app.test_request_context():
+            response = self.client.get(url_for('post.post_detail', post_id=self.post.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Nested reply', response.data)
+        self.assertIn(b'comment-replies', response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from app import create_app, db
+from app.models import User, Post, Comment, Reaction
+from app.counters import repair_post_counters
+
+
+class CountersTestCase(unittest.TestCase):
+    """Test cases for the cached post counters and their repair command."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.create_all()
+
+        # Create test users
+        password_hash = 'hashed_password'
+        cls.user1 = User(username='counter1', email='counter1@example.com', password_hash=password_hash)
+        cls.user2 = User(username='counter2', email='counter2@example.com', password_hash=password_hash)
+        db.session.add_all([cls.user1, cls.user2])
+        db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Create posts whose cached counters are out of date."""
+        self.posts = [Post(title=f'Post {i}', content='Counted', author_id=self.user1.id) for i in range(3)]
+        db.session.add_all(self.posts)
+        db.session.flush()
+        first = self.posts[0]
+        db.session.add_all([
+            Reaction(target_type=Reaction.POST, target_id=first.id, user_id=self.user1.id, kind=Reaction.LIKE),
+            Reaction(target_type=Reaction.POST, target_id=first.id, user_id=self.user2.id, kind=Reaction.LIKE),
+            Reaction(target_type=Reaction.POST, target_id=self.posts[1].id, user_id=self.user1.id, kind=Reaction.DISLIKE),
+            Comment(content='One', author_id=self.user2.id, post_id=first.id),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(Comment).delete()
+        db.session.query(Reaction).delete()
+        db.session.query(Post).delete()
+        db.session.commit()
+
+    def assert_counts(self):
+        counts = [(p.like_count, p.dislike_count, p.comment_count)
+                  for p in Post.query.order_by(Post.id)]
+        self.assertEqual(counts, [(2, 0, 1), (0, 1, 0), (0, 0, 0)])
+
+    def test_repair_recomputes_in_batches(self):
+        """Test that repair recomputes every post even with a tiny batch size."""
+        processed = repair_post_counters(batch_size=2)
+        self.assertEqual(processed, 3)
+        self.assert_counts()
+
+    def test_repair_cli_command(self):
+        """Test the `flask counters repair` command."""
+        result = self.app.test_cli_runner().invoke(args=['counters', 'repair', '--batch-size', '1'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Recomputed counters for 3 posts.', result.output)
+        self.assert_counts()
+
+
+if __name__ == '__main__':
+    unittest.main()
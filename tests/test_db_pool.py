@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from sqlalchemy import create_engine, exc, text
+from app import create_app, db, db_pool
+from config import ProductionConfig
+
+
+class DbPoolTestCase(unittest.TestCase):
+    """Test cases for the production profile, connection pool settings and pool metrics."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def production_config(self, **overrides):
+        """Return a ProductionConfig subclass pointed at a throwaway SQLite file."""
+        settings = {
+            'SECRET_KEY': 'production_secret',
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(self.directory, 'production.db')}",
+            'METRICS_TOKEN': 'metrics-token',
+            'AVATAR_WORKERS': 0,
+            'MODERATION_WORKERS': 0,
+            'DB_POOL_SIZE': 3,
+            'DB_MAX_OVERFLOW': 1,
+        }
+        settings.update(overrides)
+        return type('ProductionTestConfig', (ProductionConfig,), settings)
+
+    def test_engine_options_from_settings(self):
+        """Test the pooled and PgBouncer engine options built from the DB_* settings."""
+        self.assertIsNone(db_pool.engine_options({}))
+
+        config = {'SQLALCHEMY_DATABASE_URI': 'postgresql://garden@localhost/garden', 'DB_POOL_SIZE': 5,
+                  'DB_MAX_OVERFLOW': 2, 'DB_POOL_TIMEOUT': 3, 'DB_POOL_RECYCLE': 600, 'DB_POOL_PRE_PING': True,
+                  'DB_STATEMENT_TIMEOUT_MS': 5000}
+        options = db_pool.engine_options(config)
+        self.assertIs(options['poolclass'], db_pool.TimedQueuePool)
+        self.assertEqual((options['pool_size'], options['max_overflow'], options['pool_timeout'],
+                          options['pool_recycle']), (5, 2, 3, 600))
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertEqual(options['connect_args'], {'options': '-c statement_timeout=5000'})
+
+        config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///garden.db'
+        self.assertNotIn('connect_args', db_pool.engine_options(config))
+        # Statement timeouts only apply to PostgreSQL.
+
+        config['DB_PGBOUNCER'] = True
+        self.assertEqual(db_pool.engine_options(config), {'poolclass': db_pool.TimedNullPool})
+        # PgBouncer does the pooling and rejects startup options.
+
+    def test_pool_records_waits_overflow_and_timeouts(self):
+        """Test that checkouts, waits for a busy pool and timeouts are counted."""
+        engine = create_engine(f"sqlite:///{os.path.join(self.directory, 'pool.db')}",
+                               poolclass=db_pool.TimedQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.05)
+        stats = engine.pool.stats = db_pool.PoolStats()
+        try:
+            first = engine.connect()
+            second = engine.connect()
+            # The second connection is overflow.
+            self.assertEqual(stats.snapshot(engine.pool)['max_overflow_used'], 1)
+
+            with self.assertRaises(exc.TimeoutError):
+                engine.connect()
+
+            released = threading.Timer(0.01, second.close)
+            released.start()
+            engine.pool._timeout = 1
+            third = engine.connect()
+            # Waits until the overflow connection is returned.
+            released.join()
+
+            snapshot = stats.snapshot(engine.pool)
+            self.assertEqual(snapshot['checkouts'], 3)
+            self.assertEqual(snapshot['timeouts'], 1)
+            self.assertEqual((snapshot['pool_size'], snapshot['checked_out'], snapshot['max_checked_out']), (1, 2, 2))
+            self.assertGreaterEqual(snapshot['max_wait_ms'], 5)
+            self.assertEqual(snapshot['pool_class'], 'TimedQueuePool')
+            first.close()
+            third.close()
+        finally:
+            engine.dispose()
+
+    def test_production_profile(self):
+        """Test that the production profile turns off debugging and builds the tuned pool."""
+        app = create_app(self.production_config())
+        self.assertFalse(app.debug)
+        self.assertFalse(app.config['TEMPLATES_AUTO_RELOAD'])
+        self.assertTrue(app.config['SESSION_COOKIE_SECURE'])
+        with app.app_context():
+            pool = db.engine.pool
+            self.assertIsInstance(pool, db_pool.TimedQueuePool)
+            self.assertEqual((pool.size(), pool._max_overflow), (3, 1))
+
+            db.session.execute(text('SELECT 1'))
+            db.session.remove()
+            stats = db_pool.stats()
+            self.assertGreaterEqual(stats['checkouts'], 1)
+            self.assertEqual(stats['checked_out'], 0)
+            db.engine.dispose()
+
+    def test_production_requires_secret_key(self):
+        """Test that the production profile refuses to start without a secret key."""
+        with self.assertRaises(RuntimeError):
+            create_app(self.production_config(SECRET_KEY=None))
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics is hidden without a token, refuses a wrong one and reports the pool with the right one."""
+        app = create_app('testing')
+        self.assertEqual(app.test_client().get('/metrics').status_code, 404)
+
+        app = create_app(self.production_config())
+        client = app.test_client()
+        self.assertEqual(client.get('/metrics').status_code, 401)
+        self.assertEqual(client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 401)
+
+        response = client.get('/metrics', headers={'Authorization': 'Bearer metrics-token'})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['pid'], os.getpid())
+        self.assertEqual(data['db_pool']['pool_class'], 'TimedQueuePool')
+        self.assertIn('wait_p95_ms', data['db_pool'])
+        self.assertIn('passwords', data)
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from flask import url_for
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Post, Reaction
+from app.feed import hydrate_posts
+
+
+class FeedHydrationTestCase(unittest.TestCase):
+    """Test cases for the batched feed hydration layer."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a viewer and an author
+        password_hash = 'hashed_password'
+        cls.viewer = User(username='viewer', email='viewer@example.com', password_hash=password_hash)
+        cls.author = User(username='feedauthor', email='feedauthor@example.com', password_hash=password_hash)
+        db.session.add_all([cls.viewer, cls.author])
+        db.session.commit()
+
+        # Log in as the viewer
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.viewer.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Create a feed with a mix of authors and reactions."""
+        for i in range(10):
+            author = self.author if i % 2 else self.viewer
+            db.session.add(Post(title=f'Feed Post {i}', content='Feed content', author_id=author.id))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(Reaction).delete()
+        db.session.query(Post).delete()
+        db.session.commit()
+
+    def count_queries(self, func):
+        """Run `func` and return how many SQL statements it executed."""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return len(statements)
+
+    def test_hydrate_posts_reports_authors_and_reactions(self):
+        """Test that view models carry author names and the viewer's own reactions."""
+        posts = Post.query.order_by(Post.id).all()
+        db.session.add(Reaction(target_type=Reaction.POST, target_id=posts[0].id, user_id=self.viewer.id, kind=Reaction.LIKE))
+        db.session.add(Reaction(target_type=Reaction.POST, target_id=posts[1].id, user_id=self.viewer.id, kind=Reaction.DISLIKE))
+        db.session.commit()
+
+        views = hydrate_posts(Post.query.order_by(Post.id).all(), self.viewer.id)
+        self.assertEqual(views[0].author_username, 'viewer')
+        self.assertEqual(views[1].author_username, 'feedauthor')
+        self.assertTrue(views[0].liked)
+        self.assertFalse(views[0].disliked)
+        self.assertTrue(views[1].disliked)
+
+    def test_hydrate_posts_query_count_is_constant(self):
+        """Test that hydrating 2 or 10 posts costs the same number of queries."""
+        viewer_id = self.viewer.id
+        small = Post.query.limit(2).all()
+        large = Post.query.limit(10).all()
+        self.assertEqual(
+            self.count_queries(lambda: hydrate_posts(small, viewer_id)),
+            self.count_queries(lambda: hydrate_posts(large, viewer_id))
+        )
+
+    def test_explore_page_query_count_is_constant(self):
+        """Test that rendering a bigger explore page does not add queries."""
+        def render(per_page):
+            with self.app.test_request_context():
+                url = url_for('main.explore', per_page=per_page)
+            db.session.expire_all()
+            return lambda: self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(self.count_queries(render(2)), self.count_queries(render(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from app import create_app, db, follows
+from app.models import User, Follow
+
+
+class FollowsTestCase(unittest.TestCase):
+    """Test cases for the follow graph helpers."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.create_all()
+
+        # Create a user with several potential followers
+        password_hash = 'hashed_password'
+        cls.users = [User(username=f'gardener{i}', email=f'gardener{i}@example.com', password_hash=password_hash)
+                     for i in range(5)]
+        db.session.add_all(cls.users)
+        db.session.commit()
+        cls.ids = [user.id for user in cls.users]
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.rollback()
+        db.session.query(Follow).delete()
+        db.session.query(User).update({'follower_count': 0, 'following_count': 0})
+        db.session.commit()
+
+    def counts(self, user_id):
+        db.session.expire_all()
+        user = db.session.get(User, user_id)
+        return user.follower_count, user.following_count
+
+    def test_follow_is_idempotent_and_counted(self):
+        """Test that following twice creates one row and bumps each counter once."""
+        star, fan = self.ids[0], self.ids[1]
+        self.assertTrue(follows.follow(fan, star))
+        self.assertFalse(follows.follow(fan, star))
+        db.session.commit()
+
+        self.assertTrue(follows.is_following(fan, star))
+        self.assertFalse(follows.is_following(star, fan))
+        self.assertEqual(self.counts(star), (1, 0))
+        self.assertEqual(self.counts(fan), (0, 1))
+
+    def test_toggle_follow_unfollows(self):
+        """Test that toggling twice leaves no follow and zeroed counters."""
+        star, fan = self.ids[0], self.ids[1]
+        self.assertTrue(follows.toggle_follow(fan, star))
+        self.assertFalse(follows.toggle_follow(fan, star))
+        db.session.commit()
+
+        self.assertFalse(follows.is_following(fan, star))
+        self.assertEqual(self.counts(star), (0, 0))
+        self.assertFalse(follows.unfollow(fan, star))
+
+    def test_followers_page_walks_every_follower(self):
+        """Test that following the cursor lists every follower exactly once."""
+        star = self.ids[0]
+        for fan in self.ids[1:]:
+            follows.follow(fan, star)
+        db.session.commit()
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = follows.followers_page(star, after=cursor, per_page=2)
+            seen.extend(row.id for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), sorted(self.ids[1:]))
+
+        rows, _ = follows.following_page(self.ids[1])
+        self.assertEqual([row.username for row in rows], ['gardener0'])
+
+    def test_repair_follow_counts(self):
+        """Test that repair recomputes counters from the follows table."""
+        db.session.add(Follow(follower_id=self.ids[1], followed_id=self.ids[0]))
+        db.session.commit()
+        self.assertEqual(self.counts(self.ids[0]), (0, 0))
+
+        self.assertEqual(follows.repair_follow_counts(batch_size=2), len(self.ids))
+        self.assertEqual(self.counts(self.ids[0]), (1, 0))
+        self.assertEqual(self.counts(self.ids[1]), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from app import create_app, db
 from app.models import User, Post
+from app.pagination import paginate_keyset, decode_cursor
 from flask import url_for
 
 
@@ -59,6 +60,43 @@ class MainRoutesTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Test Post', response.data)  # Check if post title appears on the explore page
 
+    def test_home_page_paginates_with_cursor(self):
+        """Test the home page only renders one page and links to the next one."""
+        for i in range(4):
+            db.session.add(Post(title=f'Paged Post {i}', content='Paged content', author_id=self.user.id))
+        db.session.commit()
+
+        with self.app.test_request_context():
+            response = self.client.get(url_for('main.home', per_page=2))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Paged Post 3', response.data)
+        self.assertIn(b'Paged Post 2', response.data)
+        self.assertNotIn(b'Paged Post 1', response.data)
+        self.assertIn(b'Load more', response.data)
+
+    def test_paginate_keyset_walks_every_post_once(self):
+        """Test that following cursors visits every post exactly once."""
+        for i in range(4):
+            db.session.add(Post(title=f'Walk Post {i}', content='Walk content', author_id=self.user.id))
+        db.session.commit()
+
+        seen, cursor = [], None
+        while True:
+            items, cursor = paginate_keyset(Post.query, Post.date_posted, Post.id, after=cursor, per_page=2)
+            seen.extend(post.id for post in items)
+            if cursor is None:
+                break
+        expected = [post.id for post in Post.query.order_by(Post.date_posted.desc(), Post.id.desc())]
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_restarts_feed(self):
+        """Test that a malformed cursor falls back to the first page."""
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        with self.app.test_request_context():
+            response = self.client.get(url_for('main.home', after='not-a-cursor'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Test Post', response.data)
+
     def test_create_post_success(self):
         with self.app.test_request_context():
             """Test creating a new post successfully."""
@@ -0,0 +1,169 @@
+import unittest
+from flask import url_for
+from sqlalchemy import event
+from app import create_app, db, moderation
+from app.forms import CommentForm, CreatePostForm
+from app.models import User, Post, Comment, BlockedTerm, BlockedTermVersion
+
+
+class ModerationTestCase(unittest.TestCase):
+    """Test cases for the compiled blocked-term filter."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a test user
+        cls.user = User(username='moderated', email='moderated@example.com', password_hash='hashed_password')
+        db.session.add(cls.user)
+        db.session.commit()
+
+        # Log in as the test user
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.user.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(Comment).delete()
+        db.session.query(Post).delete()
+        db.session.query(BlockedTerm).delete()
+        db.session.query(BlockedTermVersion).delete()
+        db.session.commit()
+        moderation.get_filter().expire()
+
+    def count_queries(self, fn):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return result, statements
+
+    def test_normalize_folds_case_accents_and_look_alikes(self):
+        """Test that text is folded to lower-case words without accents or look-alike characters."""
+        self.assertEqual(moderation.normalize('  Frée   $EEDS!!  '), 'free seeds')
+        self.assertEqual(moderation.normalize('Cl1ckb@it_now'), 'clickbait now')
+        self.assertEqual(moderation.normalize('Plant 10 rows'), 'plant 10 rows')
+
+    def test_automaton_respects_word_boundaries(self):
+        """Test that whole-word terms skip longer words and substring terms do not."""
+        automaton = moderation.Automaton([('ass', True), ('scam', False), ('free money', True)])
+        self.assertEqual(automaton.find('grass and bass'), [])
+        self.assertEqual(automaton.find('an ass here'), ['ass'])
+        self.assertEqual(automaton.find('scammers get free money'), ['scam', 'free money'])
+        self.assertEqual(automaton.find('free moneyball'), [])
+
+    def test_automaton_finds_overlapping_terms(self):
+        """Test that terms sharing prefixes and suffixes are all found in one pass."""
+        automaton = moderation.Automaton([('he', False), ('she', False), ('his', False), ('hers', False)])
+        self.assertEqual(automaton.find('ushers'), ['she', 'he', 'hers'])
+        self.assertEqual(automaton.find('ushers', first=True), ['she'])
+
+    def test_base_terms_are_blocked_as_whole_words(self):
+        """Test that the configured base terms keep the old comment filter's words blocked."""
+        self.assertEqual(moderation.find_blocked_terms('Pure SPAM, pure clickbait'), ['spam', 'clickbait'])
+        self.assertFalse(moderation.is_blocked('Spamalot tickets'))
+
+    def test_added_terms_rebuild_the_automaton_once(self):
+        """Test that adding terms bumps the version and the next lookup recompiles."""
+        moderation_filter = moderation.get_filter()
+        moderation_filter.check_interval = 3600
+        try:
+            self.assertFalse(moderation.is_blocked('Buy cheap pills'))
+            rebuilds = moderation_filter.stats()['rebuilds']
+
+            self.assertEqual(moderation.add_terms(['Cheap  PILLS', 'cheap pills']), 1)
+            db.session.commit()
+            self.assertEqual(BlockedTerm.query.one().term, 'cheap pills')
+            self.assertEqual(db.session.get(BlockedTermVersion, 1).version, 1)
+
+            self.assertTrue(moderation.is_blocked('Buy CHEAP pills'))
+            self.assertEqual(moderation_filter.stats()['rebuilds'], rebuilds + 1)
+
+            # Within the check interval, lookups run no queries at all.
+            _, statements = self.count_queries(lambda: moderation.is_blocked('cheap pills again'))
+            self.assertEqual(statements, [])
+            self.assertEqual(moderation_filter.stats()['rebuilds'], rebuilds + 1)
+
+            self.assertEqual(moderation.remove_terms(['cheap pills']), 1)
+            db.session.commit()
+            self.assertEqual(db.session.get(BlockedTermVersion, 1).version, 2)
+            self.assertFalse(moderation.is_blocked('Buy cheap pills'))
+        finally:
+            moderation_filter.check_interval = 0
+
+    def test_unchanged_version_does_not_rebuild(self):
+        """Test that a version check which finds no change keeps the compiled automaton."""
+        moderation_filter = moderation.get_filter()
+        moderation.is_blocked('warm up')
+        rebuilds = moderation_filter.stats()['rebuilds']
+        moderation.is_blocked('still nothing to see')
+        self.assertEqual(moderation_filter.stats()['rebuilds'], rebuilds)
+
+    def test_forms_reject_blocked_terms(self):
+        """Test that post and comment forms share the filter."""
+        moderation.add_terms(['weed killer'])
+        db.session.commit()
+
+        with self.app.test_request_context(method='POST', data={'content': 'Try this W33D  killer!'}):
+            form = CommentForm()
+            self.assertFalse(form.validate())
+            self.assertIn("Your comment contains prohibited words. Please remove them.", form.content.errors)
+
+        with self.app.test_request_context(method='POST', data={'title': 'Weed-killer tips', 'content': 'Fine'}):
+            form = CreatePostForm()
+            self.assertFalse(form.validate())
+            self.assertIn("Your post contains prohibited words. Please remove them.", form.title.errors)
+            self.assertEqual(form.content.errors, [])
+
+        with self.app.test_request_context(method='POST', data={'title': 'Weeding', 'content': 'Pull by hand.'}):
+            self.assertTrue(CreatePostForm().validate())
+
+    def test_create_post_route_rejects_blocked_content(self):
+        """Test that a post containing a blocked term is not saved."""
+        with self.app.test_request_context():
+            url = url_for('main.explore')
+        self.client.post(url, data={'title': 'Great deal', 'content': 'Total clickbait', 'tags': ''})
+        self.assertEqual(Post.query.count(), 0)
+
+    def test_rescan_flags_existing_content(self):
+        """Test that the re-scan flags matching posts and comments in batches."""
+        posts = [Post(title=f'Post {i}', content='Compost notes', author_id=self.user.id) for i in range(5)]
+        posts[1].content = 'Cheap fertilizer here'
+        posts[3].tags = 'fertilizer-deals'
+        db.session.add_all(posts)
+        db.session.flush()
+        comments = [Comment(content='Nice beds', author_id=self.user.id, post_id=posts[0].id),
+                    Comment(content='Spam spam spam', author_id=self.user.id, post_id=posts[0].id)]
+        db.session.add_all(comments)
+        db.session.commit()
+
+        moderation.add_terms(['cheap fertilizer'])
+        moderation.add_terms(['deals'], whole_word=False)
+        db.session.commit()
+
+        result = moderation.rescan(batch_size=2)
+        self.assertEqual(result, {'posts': (5, 2), 'comments': (2, 1)})
+        self.assertEqual({post.id for post in Post.query.filter_by(is_flagged=True)}, {posts[1].id, posts[3].id})
+        self.assertEqual([comment.id for comment in Comment.query.filter_by(is_flagged=True)], [comments[1].id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+import unittest
+from datetime import timedelta
+from flask import url_for, g
+from sqlalchemy import text
+from app import create_app, db, moderation_queue
+from app.models import User, Post, Comment, ModerationJob
+
+
+class FailingClassifier(moderation_queue.Classifier):
+    """A classifier whose backend is down."""
+
+    def classify(self, text):
+        raise RuntimeError('classifier unavailable')
+
+
+class ModerationQueueTestCase(unittest.TestCase):
+    """Test cases for the background moderation queue and the review queue."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create an author and a reviewer
+        cls.user = User(username='queued', email='queued@example.com', password_hash='hashed_password')
+        cls.reviewer = User(username='reviewer', email='reviewer@example.com', password_hash='hashed_password',
+                            is_moderator=True)
+        db.session.add_all([cls.user, cls.reviewer])
+        db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        self.login_as(self.user)
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(Comment).delete()
+        db.session.query(Post).delete()
+        db.session.query(ModerationJob).delete()
+        db.session.commit()
+
+    def login_as(self, user):
+        g.pop('_login_user', None)
+        with self.client.session_transaction() as session:
+            session['_user_id'] = user.id
+
+    def create_post(self, title='Seedlings', content='Potting on the tomatoes.'):
+        post = Post(title=title, content=content, author_id=self.user.id)
+        db.session.add(post)
+        db.session.commit()
+        return post
+
+    def jobs(self):
+        return [(job.target_type, job.target_id) for job in ModerationJob.query.order_by(ModerationJob.id)]
+
+    def test_new_posts_and_comments_are_enqueued_not_scored(self):
+        """Test that the request path only queues a job; nothing is flagged until a worker runs."""
+        post = self.create_post()
+        with self.app.test_request_context():
+            url = url_for('comment.create_comment', post_id=post.id)
+        self.client.post(url, data={'content': 'See http://a.example http://b.example http://c.example'})
+
+        comment = Comment.query.one()
+        self.assertFalse(comment.is_flagged)
+        self.assertEqual(self.jobs(), [(ModerationJob.POST, post.id), (ModerationJob.COMMENT, comment.id)])
+
+        self.assertEqual(moderation_queue.run_once(), (2, 1))
+        db.session.expire_all()
+        self.assertTrue(db.session.get(Comment, comment.id).is_flagged)
+        self.assertEqual(db.session.get(Comment, comment.id).flag_reason, '3 links')
+        self.assertFalse(db.session.get(Post, post.id).is_flagged)
+        self.assertEqual(self.jobs(), [])
+
+    def test_only_text_edits_are_requeued(self):
+        """Test that editing text queues the item again and other updates do not."""
+        post = self.create_post()
+        moderation_queue.run_once()
+
+        post.is_public = False
+        db.session.commit()
+        self.assertEqual(self.jobs(), [])
+
+        post.content = 'THIS IS NOW A VERY LOUD POST ABOUT SEEDS'
+        db.session.commit()
+        self.assertEqual(self.jobs(), [(ModerationJob.POST, post.id)])
+        moderation_queue.run_once()
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Post, post.id).flag_reason, 'Mostly capital letters')
+
+    def test_claimed_jobs_are_leased(self):
+        """Test that a claimed job is not handed out again until its lease runs out."""
+        self.create_post()
+        self.create_post()
+        claimed = moderation_queue.claim_jobs(1, lease_seconds=60)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claimed[0].attempts, 1)
+
+        others = moderation_queue.claim_jobs(10, lease_seconds=60)
+        self.assertEqual([job.id for job in others], [ModerationJob.query.order_by(ModerationJob.id.desc()).first().id])
+        self.assertEqual(moderation_queue.claim_jobs(10), [])
+
+        job = db.session.get(ModerationJob, claimed[0].id)
+        job.locked_until = job.locked_until - timedelta(seconds=120)
+        db.session.commit()
+        self.assertEqual([job.id for job in moderation_queue.claim_jobs(10)], [claimed[0].id])
+
+    def test_classifier_errors_are_retried_then_failed(self):
+        """Test that a failing classifier backs off and finally marks the job failed."""
+        post = self.create_post()
+        classifier = FailingClassifier(self.app.config)
+
+        jobs = moderation_queue.claim_jobs(10)
+        self.assertEqual(moderation_queue.process_jobs(jobs, classifier, max_attempts=2, retry_seconds=30), (0, 0))
+        job = ModerationJob.query.one()
+        self.assertEqual((job.attempts, job.failed, job.locked_until), (1, False, None))
+        self.assertEqual(job.last_error, 'classifier unavailable')
+        self.assertEqual(moderation_queue.claim_jobs(10), [])
+        # Not due again until the backoff has passed.
+
+        job.run_after = job.run_after - timedelta(minutes=5)
+        db.session.commit()
+        jobs = moderation_queue.claim_jobs(10)
+        moderation_queue.process_jobs(jobs, classifier, max_attempts=2)
+        db.session.expire_all()
+        job = ModerationJob.query.one()
+        self.assertTrue(job.failed)
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(db.session.get(Post, post.id).is_flagged)
+
+    def test_jobs_for_deleted_content_are_dropped(self):
+        """Test that a job whose post was deleted before scoring is simply finished."""
+        post = self.create_post()
+        db.session.delete(post)
+        db.session.commit()
+        self.assertEqual(moderation_queue.run_once(), (1, 0))
+        self.assertEqual(self.jobs(), [])
+
+    def test_classifier_is_pluggable(self):
+        """Test that MODERATION_CLASSIFIER names the class to load."""
+        self.app.config['MODERATION_CLASSIFIER'] = f'{FailingClassifier.__module__}.FailingClassifier'
+        try:
+            self.assertIsInstance(moderation_queue.load_classifier(self.app), FailingClassifier)
+        finally:
+            self.app.config['MODERATION_CLASSIFIER'] = 'app.moderation_queue.HeuristicClassifier'
+
+    def test_worker_pool_drains_the_queue(self):
+        """Test that a worker batch processes jobs and records stats."""
+        self.create_post(content='Visit www.a.example, www.b.example and www.c.example')
+        pool = moderation_queue.ModerationWorkerPool(self.app, workers=1, batch_size=10)
+        self.assertEqual(pool.run_batch(), 1)
+        self.assertEqual(pool.run_batch(), 0)
+        self.assertEqual(pool.stats()['flagged'], 1)
+
+    def test_review_queue_uses_partial_index(self):
+        """Test that the review queue pages through flagged comments via the partial index."""
+        post = self.create_post()
+        comments = [Comment(content=f'Comment {i}', author_id=self.user.id, post_id=post.id, is_flagged=i % 2 == 0)
+                    for i in range(5)]
+        db.session.add_all(comments)
+        db.session.commit()
+
+        items, cursor = moderation_queue.review_queue('comments', per_page=2)
+        self.assertEqual([c.id for c in items], [comments[0].id, comments[2].id])
+        items, cursor = moderation_queue.review_queue('comments', after=cursor, per_page=2)
+        self.assertEqual([c.id for c in items], [comments[4].id])
+        self.assertIsNone(cursor)
+
+        query = Comment.query.filter(Comment.is_flagged).order_by(Comment.id).limit(2)
+        compiled = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' '.join(str(row) for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')))
+        self.assertIn('ix_comment_flagged', plan)
+
+    def test_review_routes_require_a_moderator(self):
+        """Test that only reviewers can open the queue or act on it."""
+        post = self.create_post()
+        comment = Comment(content='Hmm', author_id=self.user.id, post_id=post.id, is_flagged=True)
+        db.session.add(comment)
+        db.session.commit()
+        with self.app.test_request_context():
+            queue_url = url_for('moderation.review_queue')
+            approve_url = url_for('moderation.approve', kind='comments', item_id=comment.id)
+
+        self.assertEqual(self.client.get(queue_url).status_code, 403)
+        self.assertEqual(self.client.post(approve_url).status_code, 403)
+
+        self.login_as(self.reviewer)
+        response = self.client.get(queue_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Hmm', response.data)
+
+    def test_reviewer_can_approve_and_remove(self):
+        """Test that approving clears the flag and removing deletes the comment and fixes the counter."""
+        post = self.create_post()
+        keep = Comment(content='Fine really', author_id=self.user.id, post_id=post.id, is_flagged=True,
+                       flag_reason='Mostly capital letters')
+        drop = Comment(content='Junk', author_id=self.user.id, post_id=post.id, is_flagged=True)
+        db.session.add_all([keep, drop])
+        post.comment_count = 2
+        db.session.commit()
+
+        self.login_as(self.reviewer)
+        with self.app.test_request_context():
+            approve_url = url_for('moderation.approve', kind='comments', item_id=keep.id)
+            remove_url = url_for('moderation.remove', kind='comments', item_id=drop.id)
+        self.assertEqual(self.client.post(approve_url).status_code, 302)
+        self.assertEqual(self.client.post(remove_url).status_code, 302)
+
+        db.session.expire_all()
+        kept = db.session.get(Comment, keep.id)
+        self.assertFalse(kept.is_flagged)
+        self.assertIsNone(kept.flag_reason)
+        self.assertIsNone(db.session.get(Comment, drop.id))
+        self.assertEqual(db.session.get(Post, post.id).comment_count, 1)
+
+    def test_reviewer_cannot_act_on_unflagged_items(self):
+        """Test that posts and comments outside the queue cannot be removed or approved through it."""
+        post = self.create_post()
+        comment = Comment(content='Lovely roses', author_id=self.user.id, post_id=post.id)
+        db.session.add(comment)
+        db.session.commit()
+
+        self.login_as(self.reviewer)
+        with self.app.test_request_context():
+            urls = [url_for('moderation.remove', kind='posts', item_id=post.id),
+                    url_for('moderation.remove', kind='comments', item_id=comment.id),
+                    url_for('moderation.approve', kind='comments', item_id=comment.id)]
+        for url in urls:
+            self.assertEqual(self.client.post(url).status_code, 404)
+
+        db.session.expire_all()
+        self.assertIsNotNone(db.session.get(Post, post.id))
+        self.assertIsNotNone(db.session.get(Comment, comment.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
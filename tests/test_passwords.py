@@ -0,0 +1,93 @@
+import unittest
+from flask import url_for
+import bcrypt
+from app import create_app, db
+from app.models import User
+from app.passwords import PasswordHasher, PasswordHasherBusy, get_hasher, hash_cost
+
+
+class PasswordHasherTestCase(unittest.TestCase):
+    """Test cases for the password hashing service."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(User).delete()
+        db.session.commit()
+
+    def test_hash_and_check(self):
+        """Test that hashes use the configured cost and verify, including Flask-Bcrypt hashes."""
+        hasher = get_hasher()
+        password_hash = hasher.hash_password('secret')
+        self.assertEqual(hash_cost(password_hash), self.app.config['BCRYPT_LOG_ROUNDS'])
+        self.assertTrue(hasher.check_password(password_hash, 'secret'))
+        self.assertFalse(hasher.check_password(password_hash, 'wrong'))
+        self.assertFalse(hasher.check_password('not-a-hash', 'secret'))
+
+        legacy = bcrypt.hashpw(b'secret', bcrypt.gensalt(rounds=5)).decode('utf-8')
+        # Made the way Flask-Bcrypt made them.
+        self.assertTrue(hasher.check_password(legacy, 'secret'))
+        self.assertTrue(hasher.needs_rehash(legacy))
+
+    def test_long_passwords_are_truncated_consistently(self):
+        """Test that passwords past bcrypt's 72-byte limit hash and verify instead of raising."""
+        hasher = get_hasher()
+        password_hash = hasher.hash_password('x' * 100)
+        self.assertTrue(hasher.check_password(password_hash, 'x' * 100))
+
+    def test_login_rehashes_outdated_cost(self):
+        """Test that logging in upgrades a hash made with a different cost factor."""
+        user = User(username='oldhash', email='oldhash@example.com',
+                    password_hash=get_hasher().hash_password('password', rounds=5))
+        db.session.add(user)
+        db.session.commit()
+
+        with self.app.test_request_context():
+            response = self.client.post(url_for('auth.login'),
+                                        data={'email': 'oldhash@example.com', 'password': 'password'})
+            self.client.get(url_for('auth.logout'))
+        self.assertEqual(response.status_code, 302)
+        db.session.refresh(user)
+        self.assertEqual(hash_cost(user.password_hash), self.app.config['BCRYPT_LOG_ROUNDS'])
+        self.assertGreaterEqual(get_hasher().stats()['rehashes'], 1)
+
+    def test_saturated_hasher_rejects_after_timeout(self):
+        """Test that callers give up with PasswordHasherBusy once every slot stays taken."""
+        hasher = PasswordHasher(rounds=4, workers=0, max_pending=1, wait_timeout=0.01)
+        hasher._slots.acquire()
+        with self.assertRaises(PasswordHasherBusy):
+            hasher.hash_password('secret')
+        hasher._slots.release()
+        self.assertEqual(hasher.stats()['rejected'], 1)
+
+    def test_process_pool_and_stats(self):
+        """Test that hashing runs in worker processes and latency metrics are recorded."""
+        hasher = PasswordHasher(rounds=4, workers=1)
+        try:
+            password_hash = hasher.hash_password('secret')
+            self.assertTrue(hasher.check_password(password_hash, 'secret'))
+        finally:
+            hasher.shutdown()
+        stats = hasher.stats()
+        self.assertEqual((stats['hashes'], stats['checks']), (1, 1))
+        self.assertGreater(stats['hash_p50_ms'], 0)
+        self.assertGreater(stats['check_p99_ms'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
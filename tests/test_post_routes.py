@@ -1,7 +1,8 @@
 import unittest
 from flask import url_for, jsonify
+from sqlalchemy import event
 from app import create_app, db
-from app.models import User, Post, Comment, PostLike, PostDislike, CommentLike
+from app.models import User, Post, Comment, Reaction
 
 
 class PostRoutesTestCase(unittest.TestCase):
@@ -43,8 +44,7 @@ class PostRoutesTestCase(unittest.TestCase):
     def tearDown(self):
         """Clean up test data after each test."""
         db.session.query(Comment).delete()
-        db.session.query(PostLike).delete()
-        db.session.query(PostDislike).delete()
+        db.session.query(Reaction).delete()
         db.session.query(Post).delete()
         db.session.commit()
 
@@ -59,6 +59,17 @@ class PostRoutesTestCase(unittest.TestCase):
         self.assertIn(b'Your post has been created!', response.data)
         self.assertEqual(Post.query.count(), 2)  # Original post + new post
 
+    def test_create_post_refuses_oversized_body(self):
+        """Test that a body over MAX_CONTENT_LENGTH is a 413, not an error page from the route."""
+        with self.app.test_request_context():
+            url = url_for('post.create_post')
+        response = self.client.post(url, data={
+            'title': 'Huge Post',
+            'content': 'x' * (self.app.config['MAX_CONTENT_LENGTH'] + 1024)
+        })
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(Post.query.count(), 1)
+
     def test_post_detail_success(self):
         with self.app.test_request_context():
             """Test the post detail page loads successfully with comments."""
@@ -67,31 +78,115 @@ class PostRoutesTestCase(unittest.TestCase):
         self.assertIn(b'Test Post', response.data)  # Post title
         self.assertIn(b'Test content', response.data)  # Post content
 
+    def test_post_detail_renders_comment_controls(self):
+        """Test that each comment gets like/reply controls reflecting the viewer's like, plus a template for lazy ones."""
+        liked = Comment(content='Liked comment', post_id=self.post.id, author_id=self.user.id)
+        other = Comment(content='Other comment', post_id=self.post.id, author_id=self.user.id)
+        db.session.add_all([liked, other])
+        db.session.flush()
+        db.session.add(Reaction(target_type=Reaction.COMMENT, target_id=liked.id, user_id=self.user.id, kind=Reaction.LIKE))
+        db.session.commit()
+        with self.app.test_request_context():
+            response = self.client.get(url_for('post.post_detail', post_id=self.post.id))
+            reply_url = url_for('post.reply_comment', post_id=self.post.id, comment_id=other.id)
+        html = response.get_data(as_text=True)
+        self.assertRegex(html, rf'data-comment-id="{liked.id}"\s+data-liked="true"')
+        self.assertRegex(html, rf'data-comment-id="{other.id}"\s+data-liked="false"')
+        self.assertIn(f'action="{reply_url}"', html)
+        self.assertIn('id="comment-controls-template"', html)
+
+    def test_post_detail_query_count_is_constant(self):
+        """Test that the number of queries does not grow with the number of liked comments."""
+        def render_with_comments(count):
+            for i in range(count):
+                comment = Comment(content=f'Comment {i}', post_id=self.post.id, author_id=self.user.id)
+                db.session.add(comment)
+                db.session.flush()
+                db.session.add(Reaction(target_type=Reaction.COMMENT, target_id=comment.id, user_id=self.user.id, kind=Reaction.LIKE))
+            db.session.commit()
+            with self.app.test_request_context():
+                url = url_for('post.post_detail', post_id=self.post.id)
+
+            statements = []
+
+            def record(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+            return len(statements)
+
+        few = render_with_comments(2)
+        many = render_with_comments(20)
+        db.session.query(Reaction).delete()
+        db.session.commit()
+        self.assertEqual(few, many)
+
     def test_toggle_post_like(self):
         with self.app.test_request_context():
             """Test toggling a like on a post."""
             response = self.client.post(url_for('post.toggle_post_reaction', post_id=self.post.id, reaction='like'))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(PostLike.query.count(), 1)
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.LIKE).count(), 1)
 
         # Toggle off
         with self.app.test_request_context():
             response = self.client.post(url_for('post.toggle_post_reaction', post_id=self.post.id, reaction='like'))
             self.assertEqual(response.status_code, 200)
-        self.assertEqual(PostLike.query.count(), 0)
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.LIKE).count(), 0)
+
+    def test_toggle_post_reaction_updates_cached_counts(self):
+        """Test that toggling reactions keeps the cached counters in step."""
+        with self.app.test_request_context():
+            response = self.client.post(url_for('post.toggle_post_reaction', post_id=self.post.id, reaction='like'))
+        self.assertEqual(response.get_json(), {'likes': 1, 'dislikes': 0})
+
+        # Switching to a dislike removes the like
+        with self.app.test_request_context():
+            response = self.client.post(url_for('post.toggle_post_reaction', post_id=self.post.id, reaction='dislike'))
+        self.assertEqual(response.get_json(), {'likes': 0, 'dislikes': 1})
+        post = db.session.get(Post, self.post.id)
+        self.assertEqual((post.like_count, post.dislike_count), (0, 1))
+
+    def test_batch_post_reactions(self):
+        """Test that a batch of toggles is applied in order and returns counts per post."""
+        with self.app.test_request_context():
+            response = self.client.post(url_for('post.batch_post_reactions'), json={'reactions': [
+                {'post_id': self.post.id, 'reaction': 'like'},
+                {'post_id': self.post.id, 'reaction': 'dislike'},
+                {'post_id': self.post.id + 1000, 'reaction': 'like'},
+            ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'posts': {str(self.post.id): {'likes': 0, 'dislikes': 1}}})
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.DISLIKE).count(), 1)
+        db.session.query(Reaction).delete()
+        db.session.commit()
+
+    def test_batch_post_reactions_rejects_invalid_items(self):
+        """Test that a malformed batch is refused without applying anything."""
+        with self.app.test_request_context():
+            response = self.client.post(url_for('post.batch_post_reactions'), json={'reactions': [
+                {'post_id': self.post.id, 'reaction': 'like'},
+                {'post_id': self.post.id, 'reaction': 'love'},
+            ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.LIKE).count(), 0)
 
     def test_toggle_post_dislike(self):
         with self.app.test_request_context():
             """Test toggling a dislike on a post."""
             response = self.client.post(url_for('post.toggle_post_reaction', post_id=self.post.id, reaction='dislike'))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(PostDislike.query.count(), 1)
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.DISLIKE).count(), 1)
 
         with self.app.test_request_context():
             # Toggle off
             response = self.client.post(url_for('post.toggle_post_reaction', post_id=self.post.id, reaction='dislike'))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(PostDislike.query.count(), 0)
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.DISLIKE).count(), 0)
 
     def test_toggle_comment_like(self):
         """Test toggling a like on a comment."""
@@ -101,13 +196,13 @@ class PostRoutesTestCase(unittest.TestCase):
         with self.app.test_request_context():
             response = self.client.post(url_for('post.toggle_comment_like', comment_id=comment.id))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(CommentLike.query.count(), 1)
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.COMMENT).count(), 1)
 
         with self.app.test_request_context():
             # Toggle off
             response = self.client.post(url_for('post.toggle_comment_like', comment_id=comment.id))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(CommentLike.query.count(), 0)
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.COMMENT).count(), 0)
 
     def test_update_post_success(self):
         with self.app.test_request_context():
@@ -142,3 +237,4 @@ class PostRoutesTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Reply posted successfully!', response.data)
         self.assertEqual(Comment.query.count(), 2)  # Original comment + reply
+        self.assertEqual(db.session.get(Post, self.post.id).comment_count, 1)  # Only the reply went through a route
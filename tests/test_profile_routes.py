@@ -1,6 +1,7 @@
+import re
 import unittest
 from flask import url_for, jsonify
-from app import create_app, db
+from app import create_app, db, follows
 from app.models import User, Post, Follow
 
 
@@ -49,7 +50,10 @@ class ProfileRoutesTestCase(unittest.TestCase):
         """Clean up test data after each test."""
         db.session.query(Post).delete()
         db.session.query(Follow).delete()
+        db.session.query(User).update({'follower_count': 0, 'following_count': 0})
         db.session.commit()
+        for post in [obj for obj in db.session if isinstance(obj, Post)]:
+            db.session.expunge(post)  # SQLite reuses the deleted ids; drop stale identities before the next setUp.
 
     def test_user_profile_own_profile(self):
         with self.app.test_request_context():
@@ -78,11 +82,13 @@ class ProfileRoutesTestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(Follow.query.count(), 1)
         self.assertEqual(response.get_json()['status'], 'followed')
+        db.session.expire_all()
+        self.assertEqual((self.user1.following_count, self.user2.follower_count), (1, 1))
 
     def test_unfollow_user(self):
         """Test unfollowing another user."""
         # Pre-condition: User1 follows User2
-        self.user1.following.append(self.user2)
+        follows.follow(self.user1.id, self.user2.id)
         db.session.commit()
         with self.app.test_request_context():
             response = self.client.post(url_for('profile.toggle_follow', user_id=self.user2.id))
@@ -98,5 +104,53 @@ class ProfileRoutesTestCase(unittest.TestCase):
         self.assertIn('You cannot follow yourself.', response.get_json()['error'])
 
 
+    def test_public_profile_shows_follow_state_and_counts(self):
+        """Test that another user's profile reports the cached counts and the follow state."""
+        follows.follow(self.user1.id, self.user2.id)
+        db.session.commit()
+        with self.app.test_request_context():
+            response = self.client.get(url_for('profile.user_profile', username=self.user2.username))
+        self.assertIn(b'data-following="true"', response.data)
+        self.assertIn(b'Unfollow', response.data)
+
+    def listed(self, response):
+        """Return the usernames in a follow list page."""
+        return re.findall(r'<li class="follow-list-item">.*?>([^<>]+)</a>', response.get_data(as_text=True), re.S)
+
+    def test_followers_list_paginates(self):
+        """Test that the followers page lists one page of followers and links to the next page."""
+        user3 = User(username='testuser3', email='testuser3@example.com', password_hash='hashed_password')
+        db.session.add(user3)
+        db.session.commit()
+        try:
+            follows.follow(self.user1.id, self.user2.id)
+            follows.follow(user3.id, self.user2.id)
+            db.session.commit()
+            with self.app.test_request_context():
+                url = url_for('profile.followers', username=self.user2.username, per_page=1)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'Load more', response.data)
+            first = self.listed(response)
+            self.assertEqual(len(first), 1)
+
+            cursor = re.search(r'after=([^"&]+)', response.get_data(as_text=True)).group(1)
+            response = self.client.get(f'{url}&after={cursor}')
+            self.assertEqual(response.status_code, 200)
+            second = self.listed(response)
+            self.assertEqual(sorted(first + second), ['testuser1', 'testuser3'])
+            self.assertNotIn(b'Load more', response.data)
+        finally:
+            db.session.query(Follow).delete()
+            db.session.query(User).filter_by(id=user3.id).delete()
+            db.session.commit()
+
+    def test_follow_lists_404_for_unknown_users(self):
+        """Test that the follower and following pages of a missing user are 404s."""
+        with self.app.test_request_context():
+            urls = [url_for('profile.followers', username='nobody'), url_for('profile.following', username='nobody')]
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 404)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from flask import url_for
+from app import create_app, db
+from app.models import User, Post
+from app.counters import adjust_post_counters
+from app.ranking import hot_score, refresh_scores, ranked_posts
+
+
+class RankingTestCase(unittest.TestCase):
+    """Test cases for the precomputed explore rankings."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a test user
+        password_hash = 'hashed_password'
+        cls.user = User(username='ranker', email='ranker@example.com', password_hash=password_hash)
+        db.session.add(cls.user)
+        db.session.commit()
+
+        # Log in the test user
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.user.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Create an old popular post, a new quiet post and an old unpopular one."""
+        now = datetime.now(timezone.utc)
+        self.popular = Post(title='Popular Post', content='Loved', author_id=self.user.id,
+                            date_posted=now - timedelta(days=3), like_count=500)
+        self.fresh = Post(title='Fresh Post', content='New', author_id=self.user.id, date_posted=now)
+        self.disliked = Post(title='Disliked Post', content='Meh', author_id=self.user.id,
+                             date_posted=now - timedelta(days=3), dislike_count=5)
+        db.session.add_all([self.popular, self.fresh, self.disliked])
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(Post).delete()
+        db.session.commit()
+        for post in [obj for obj in db.session if isinstance(obj, Post)]:
+            db.session.expunge(post)  # SQLite reuses the deleted ids; drop stale identities before the next setUp.
+
+    def test_hot_score_prefers_newer_posts_with_equal_votes(self):
+        """Test that the time term favours newer posts."""
+        now = datetime.now(timezone.utc)
+        self.assertGreater(hot_score(10, 0, 0, now), hot_score(10, 0, 0, now - timedelta(days=1)))
+        self.assertGreater(hot_score(10, 0, 0, now), hot_score(0, 10, 0, now))
+
+    def test_refresh_only_rescores_dirty_posts(self):
+        """Test that refresh clears the dirty flag and picks up later reactions only."""
+        self.assertEqual(refresh_scores(), 3)
+        self.assertEqual(refresh_scores(), 0)
+
+        adjust_post_counters(self.fresh.id, likes=1)
+        db.session.commit()
+        self.assertEqual(refresh_scores(batch_size=1), 1)
+        self.assertEqual(db.session.get(Post, self.fresh.id).top_score, 1)
+
+    def test_ranked_posts_orders(self):
+        """Test hot, top and windowed rankings."""
+        refresh_scores()
+        top, _ = ranked_posts('top')
+        self.assertEqual([post.title for post in top], ['Popular Post', 'Fresh Post', 'Disliked Post'])
+
+        hot, _ = ranked_posts('hot')
+        self.assertEqual(hot[-1].title, 'Disliked Post')
+
+        today, _ = ranked_posts('top', window='day')
+        self.assertEqual([post.title for post in today], ['Fresh Post'])
+
+    def test_new_posts_are_scored_on_insert(self):
+        """Test that new posts rank by their post time before the ranking job has run."""
+        fresh = db.session.get(Post, self.fresh.id)
+        self.assertEqual(fresh.hot_score, hot_score(0, 0, 0, fresh.date_posted))
+        hot, _ = ranked_posts('hot')
+        self.assertEqual(hot[0].title, 'Fresh Post')
+
+        scores = {post.id: post.hot_score for post in hot}
+        refresh_scores()
+        db.session.expire_all()
+        self.assertEqual({post.id: post.hot_score for post in ranked_posts('hot')[0]}, scores)
+        # The insert-time score is the one the ranking job would compute.
+
+    def test_ranked_posts_pagination(self):
+        """Test that cursors over float scores walk every post once."""
+        refresh_scores()
+        first, cursor = ranked_posts('hot', per_page=2)
+        second, cursor = ranked_posts('hot', after=cursor, per_page=2)
+        self.assertIsNone(cursor)
+        self.assertEqual(len({post.id for post in first + second}), 3)
+
+    def test_explore_sort_query_arguments(self):
+        """Test that the explore page accepts sort and window arguments."""
+        refresh_scores()
+        with self.app.test_request_context():
+            response = self.client.get(url_for('main.explore', sort='top', window='week'))
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(response.data.index(b'Popular Post'), response.data.index(b'Disliked Post'))
+
+    def test_refresh_cli_command(self):
+        """Test the `flask ranking refresh` command."""
+        result = self.app.test_cli_runner().invoke(args=['ranking', 'refresh'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Rescored 3 posts.', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
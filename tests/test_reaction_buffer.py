@@ -0,0 +1,99 @@
+import unittest
+from app import create_app, db
+from app.models import User, Post, Reaction
+from app.reaction_buffer import ReactionBuffer
+
+
+class ReactionBufferTestCase(unittest.TestCase):
+    """Test cases for the write-behind reaction buffer."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.create_all()
+
+        # Create two test users and a post
+        cls.user = User(username='buffered', email='buffered@example.com', password_hash='hashed_password')
+        cls.other = User(username='buffered2', email='buffered2@example.com', password_hash='hashed_password')
+        db.session.add_all([cls.user, cls.other])
+        db.session.commit()
+        cls.post = Post(title='Buffered Post', content='React to me', author_id=cls.user.id)
+        db.session.add(cls.post)
+        db.session.commit()
+        cls.user_id, cls.other_id, cls.post_id = cls.user.id, cls.other.id, cls.post.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Create a buffer that is flushed by hand."""
+        self.buffer = ReactionBuffer(self.app, interval_ms=50, max_events=1000)
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.rollback()
+        db.session.query(Reaction).delete()
+        db.session.query(Post).update({'like_count': 0, 'dislike_count': 0})
+        db.session.commit()
+
+    def stored_counts(self):
+        db.session.expire_all()
+        post = db.session.get(Post, self.post_id)
+        return post.like_count, post.dislike_count
+
+    def test_toggles_are_answered_from_the_buffer(self):
+        """Test that toggles report pending deltas without touching the database."""
+        self.assertEqual(self.buffer.toggle(self.user_id, self.post_id, 'like'), (1, 0))
+        self.assertEqual(self.buffer.toggle(self.other_id, self.post_id, 'like'), (2, 0))
+        self.assertEqual(self.buffer.toggle(self.user_id, self.post_id, 'dislike'), (1, 1))
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.LIKE).count(), 0)
+        self.assertEqual(self.buffer.stats()['depth'], 2)
+
+    def test_flush_writes_rows_and_counters(self):
+        """Test that a flush applies the coalesced changes and clears the buffer."""
+        self.buffer.toggle(self.user_id, self.post_id, 'like')
+        self.buffer.toggle(self.other_id, self.post_id, 'dislike')
+        self.assertEqual(self.buffer.flush(), 2)
+
+        self.assertEqual(self.stored_counts(), (1, 1))
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.LIKE).filter_by(user_id=self.user_id).count(), 1)
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.DISLIKE).filter_by(user_id=self.other_id).count(), 1)
+        self.assertEqual(self.buffer.pending_deltas(self.post_id), (0, 0))
+
+        stats = self.buffer.stats()
+        self.assertEqual((stats['depth'], stats['flushes'], stats['flushed_reactions']), (0, 1, 2))
+
+    def test_toggling_back_cancels_out(self):
+        """Test that a like followed by an unlike leaves nothing to write."""
+        self.buffer.toggle(self.user_id, self.post_id, 'like')
+        self.assertEqual(self.buffer.toggle(self.user_id, self.post_id, 'like'), (0, 0))
+        self.assertEqual(self.buffer.stats()['depth'], 0)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_buffer_starts_from_stored_reaction(self):
+        """Test that toggling an existing like removes it when flushed."""
+        self.buffer.toggle(self.user_id, self.post_id, 'like')
+        self.buffer.flush()
+
+        self.assertEqual(self.buffer.toggle(self.user_id, self.post_id, 'dislike'), (-1, 1))
+        self.buffer.flush()
+        self.assertEqual(self.stored_counts(), (0, 1))
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.LIKE).count(), 0)
+
+    def test_stop_flushes_pending_work(self):
+        """Test that stopping the background thread writes what is still buffered."""
+        self.buffer.start()
+        self.buffer.toggle(self.user_id, self.post_id, 'like')
+        self.buffer.stop()
+        self.assertEqual(self.stored_counts(), (1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
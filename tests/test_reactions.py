@@ -0,0 +1,138 @@
+import unittest
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from app import create_app, db
+from app.models import User, Post, Reaction
+from app import reactions
+
+
+class ReactionsTestCase(unittest.TestCase):
+    """Test cases for the single-statement reaction writes."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.create_all()
+
+        # Create a test user and post
+        cls.user = User(username='reactor', email='reactor@example.com', password_hash='hashed_password')
+        db.session.add(cls.user)
+        db.session.commit()
+        cls.post = Post(title='Reacted Post', content='React to me', author_id=cls.user.id)
+        db.session.add(cls.post)
+        db.session.commit()
+        cls.user_id, cls.post_id = cls.user.id, cls.post.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.rollback()
+        db.session.query(Reaction).delete()
+        db.session.query(Post).update({'like_count': 0, 'dislike_count': 0})
+        db.session.commit()
+
+    def count_statements(self, func):
+        """Run `func` and return the number of SQL statements it executed."""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return len(statements)
+
+    def test_primary_key_rejects_second_reaction(self):
+        """Test that the database refuses a second reaction from the same user on the same post."""
+        db.session.add(Reaction(target_type=Reaction.POST, target_id=self.post_id, user_id=self.user_id,
+                                kind=Reaction.LIKE))
+        db.session.commit()
+        db.session.expunge_all()
+        db.session.add(Reaction(target_type=Reaction.POST, target_id=self.post_id, user_id=self.user_id,
+                                kind=Reaction.DISLIKE))
+        with self.assertRaises(IntegrityError):
+            db.session.commit()
+
+    def test_add_reaction_is_idempotent(self):
+        """Test that a repeated insert is a no-op instead of an error."""
+        self.assertTrue(reactions.add_reaction(Reaction.POST, self.post_id, self.user_id))
+        self.assertFalse(reactions.add_reaction(Reaction.POST, self.post_id, self.user_id))
+        db.session.commit()
+        self.assertEqual(Reaction.query.filter_by(target_type=Reaction.POST, kind=Reaction.LIKE).count(), 1)
+        self.assertEqual(db.session.get(Post, self.post_id).like_count, 1)
+        reactions.remove_reaction(Reaction.POST, self.post_id, self.user_id)
+        db.session.commit()
+
+    def test_toggle_post_reaction_switches_sides(self):
+        """Test that liking then disliking moves the reaction and returns fresh totals."""
+        self.assertEqual(tuple(reactions.toggle_post_reaction(self.post_id, self.user_id, 'like'))[:2], (1, 0))
+        self.assertEqual(tuple(reactions.toggle_post_reaction(self.post_id, self.user_id, 'dislike'))[:2], (0, 1))
+        self.assertEqual(tuple(reactions.toggle_post_reaction(self.post_id, self.user_id, 'dislike'))[:2], (0, 0))
+        db.session.commit()
+
+    def test_toggle_off_uses_two_statements(self):
+        """Test that removing a reaction is one DELETE plus one counter UPDATE."""
+        reactions.toggle_post_reaction(self.post_id, self.user_id, 'like')
+        db.session.commit()
+        count = self.count_statements(lambda: reactions.toggle_post_reaction(self.post_id, self.user_id, 'like'))
+        db.session.commit()
+        self.assertEqual(count, 2)
+
+
+    def test_switching_sides_updates_one_row(self):
+        """Test that turning a like into a dislike rewrites the row in place."""
+        reactions.toggle_post_reaction(self.post_id, self.user_id, 'like')
+        db.session.commit()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.split()[0].upper())
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            counts = reactions.toggle_post_reaction(self.post_id, self.user_id, 'dislike')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        db.session.commit()
+
+        self.assertEqual(tuple(counts)[:2], (0, 1))
+        self.assertNotIn('INSERT', statements)
+        self.assertEqual(Reaction.query.one().kind, Reaction.DISLIKE)
+
+    def test_migrate_legacy_reactions(self):
+        """Test that rows from the old per-type tables are copied over and the tables dropped."""
+        db.session.execute(text(
+            'CREATE TABLE post_likes (id INTEGER PRIMARY KEY, user_id INTEGER, post_id INTEGER, timestamp DATETIME)'
+        ))
+        db.session.execute(text(
+            'CREATE TABLE post_dislikes (id INTEGER PRIMARY KEY, user_id INTEGER, post_id INTEGER, timestamp DATETIME)'
+        ))
+        db.session.execute(text('INSERT INTO post_likes (user_id, post_id) VALUES (:u, :p), (:u, :p)'),
+                           {'u': self.user_id, 'p': self.post_id})
+        db.session.execute(text('INSERT INTO post_dislikes (user_id, post_id) VALUES (:u, :p)'),
+                           {'u': self.user_id + 1, 'p': self.post_id})
+        db.session.commit()
+
+        copied = reactions.migrate_legacy_reactions(batch_size=1, drop=True)
+        self.assertEqual(copied, 2)
+        # The duplicate legacy like collapses onto the primary key.
+        kinds = dict(db.session.execute(select(Reaction.user_id, Reaction.kind)).all())
+        self.assertEqual(kinds, {self.user_id: Reaction.LIKE, self.user_id + 1: Reaction.DISLIKE})
+        self.assertFalse(inspect(db.engine).has_table('post_likes'))
+        self.assertEqual(reactions.migrate_legacy_reactions(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
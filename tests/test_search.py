@@ -0,0 +1,127 @@
+import unittest
+from flask import url_for
+from sqlalchemy import text
+from app import create_app, db, search
+from app.models import User, Post, Comment, SearchDocument
+
+
+class SearchTestCase(unittest.TestCase):
+    """Test cases for full-text search over posts and comments."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a test user
+        cls.user = User(username='searcher', email='searcher@example.com', password_hash='hashed_password')
+        db.session.add(cls.user)
+        db.session.commit()
+
+        # Log in as the test user
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.user.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(Comment).delete()
+        db.session.query(Post).delete()
+        db.session.query(SearchDocument).delete()
+        db.session.execute(text('DELETE FROM search_fts'))
+        db.session.commit()
+
+    def create_post(self, title, content='Some content', tags=None):
+        """Create and commit a post."""
+        post = Post(title=title, content=content, tags=tags, author_id=self.user.id)
+        db.session.add(post)
+        db.session.commit()
+        return post
+
+    def test_new_posts_and_comments_are_searchable(self):
+        """Test that posts and comments are indexed when they are created."""
+        post = self.create_post('Tomato Trellis', 'How I stake my tomatoes.')
+        comment = Comment(content='Try cucumber netting too.', post_id=post.id, author_id=self.user.id)
+        db.session.add(comment)
+        db.session.commit()
+
+        results, _ = search.search('tomato')
+        self.assertEqual([(r.kind, r.post_id) for r in results], [('post', post.id)])
+        results, _ = search.search('cucumber')
+        self.assertEqual([(r.kind, r.comment_id) for r in results], [('comment', comment.id)])
+
+    def test_title_ranks_above_content(self):
+        """Test that a match in the title outranks a match in the body."""
+        body = self.create_post('Spring planting', 'Notes about basil and other herbs.')
+        title = self.create_post('Basil', 'Notes about spring planting.')
+        results, _ = search.search('basil')
+        self.assertEqual([r.post_id for r in results], [title.id, body.id])
+
+    def test_updates_and_deletes_keep_index_in_sync(self):
+        """Test that edited text is reindexed and deleted posts drop out of results."""
+        post = self.create_post('Old title', 'Mulch everywhere.')
+        post.content = 'Compost everywhere.'
+        db.session.commit()
+        self.assertEqual(search.search('mulch')[0], [])
+        self.assertEqual(len(search.search('compost')[0]), 1)
+
+        db.session.delete(post)
+        db.session.commit()
+        self.assertEqual(search.search('compost')[0], [])
+        self.assertEqual(SearchDocument.query.count(), 0)
+
+    def test_pagination_walks_all_results(self):
+        """Test that following the cursor returns every hit exactly once."""
+        posts = [self.create_post(f'Pepper {i}', 'Growing peppers.') for i in range(5)]
+        seen, cursor = [], None
+        while True:
+            results, cursor = search.search('pepper', after=cursor, per_page=2)
+            seen.extend(r.post_id for r in results)
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), sorted(p.id for p in posts))
+
+    def test_highlight_escapes_and_marks_terms(self):
+        """Test that snippets escape HTML and wrap matched words in <mark>."""
+        snippet = search.highlight('<b>Tomatoes</b> love sun', ['tomatoes'])
+        self.assertEqual(str(snippet), '&lt;b&gt;<mark>Tomatoes</mark>&lt;/b&gt; love sun')
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Test that FTS operators in user input are treated as plain words."""
+        self.create_post('Weeds', 'Pulling weeds by hand.')
+        results, _ = search.search('weeds" OR NEAR(')
+        self.assertEqual(results, [])
+        self.assertEqual(search.search('')[0], [])
+
+    def test_reindex_rebuilds_missing_documents(self):
+        """Test that `reindex` restores the index from the posts table."""
+        post = self.create_post('Garlic', 'Plant garlic in autumn.')
+        db.session.query(SearchDocument).delete()
+        db.session.execute(text('DELETE FROM search_fts'))
+        db.session.commit()
+        self.assertEqual(search.search('garlic')[0], [])
+
+        self.assertEqual(search.reindex(batch_size=1), 1)
+        self.assertEqual([r.post_id for r in search.search('garlic')[0]], [post.id])
+
+    def test_search_page_renders(self):
+        """Test the search page shows highlighted results."""
+        self.create_post('Squash Bugs', 'Dealing with squash bugs.')
+        with self.app.test_request_context():
+            response = self.client.get(url_for('main.search_posts', q='squash'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'<mark>squash</mark>', response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from flask import session, url_for
+from sqlalchemy import event, select
+from app import create_app, db
+from app.models import SessionRecord, User
+from app.passwords import get_hasher
+from app.sessions import MemorySessionStore, ServerSessionInterface, SessionSerializer, SqlSessionStore, _utcnow
+
+
+class ServerSessionTestCase(unittest.TestCase):
+    """Test cases for the server-side session interface."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a user who can log in
+        cls.user = User(username='sessions', email='sessions@example.com',
+                        password_hash=get_hasher().hash_password('password'))
+        db.session.add(cls.user)
+        db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(SessionRecord).delete()
+        db.session.commit()
+
+    @property
+    def interface(self):
+        return self.app.session_interface
+
+    def cookie(self, client):
+        cookie = client.get_cookie(self.app.config['SESSION_COOKIE_NAME'])
+        return cookie.value if cookie else None
+
+    def test_serializer_round_trips_and_compresses(self):
+        """Test that tagged values survive and large payloads are compressed."""
+        serializer = SessionSerializer(compress_threshold=256)
+        now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+        small = {'_flashes': [('info', 'Hi')], 'at': now}
+        self.assertEqual(serializer.loads(serializer.dumps(small)), small)
+        self.assertTrue(serializer.dumps(small).startswith(b'j'))
+
+        large = {'note': 'x' * 500}
+        payload = serializer.dumps(large)
+        self.assertTrue(payload.startswith(b'z'))
+        self.assertLess(len(payload), 100)
+        self.assertEqual(serializer.loads(payload), large)
+
+    def test_cookie_holds_only_signed_id(self):
+        """Test that session data stays on the server and survives across requests."""
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['note'] = 'x' * 1000
+        cookie = self.cookie(client)
+        self.assertLess(len(cookie), 100)
+        with client.session_transaction() as sess:
+            self.assertEqual(sess['note'], 'x' * 1000)
+
+    def test_session_is_loaded_lazily(self):
+        """Test that the store is only read when the session is touched, and forged ids never reach it."""
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['note'] = 'lazy'
+        cookie = self.cookie(client)
+
+        with mock.patch.object(self.interface.store, 'load', wraps=self.interface.store.load) as load:
+            with self.app.test_request_context(headers={'Cookie': f'session={cookie}'}):
+                self.assertEqual(load.call_count, 0)
+                self.assertEqual(session['note'], 'lazy')
+                self.assertEqual(load.call_count, 1)
+            with self.app.test_request_context(headers={'Cookie': 'session=forged.id'}):
+                self.assertNotIn('note', session)
+            self.assertEqual(load.call_count, 1)
+
+    def test_untouched_session_is_not_rewritten(self):
+        """Test that read-only requests skip the save unless the session is past half its lifetime."""
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['note'] = 'read-only'
+        with mock.patch.object(self.interface.store, 'save', wraps=self.interface.store.save) as save:
+            with client.session_transaction() as sess:
+                self.assertEqual(sess['note'], 'read-only')
+            self.assertEqual(save.call_count, 0)
+
+            later = _utcnow() + self.app.permanent_session_lifetime * 0.75
+            with mock.patch('app.sessions._utcnow', return_value=later):
+                with client.session_transaction() as sess:
+                    self.assertEqual(sess['note'], 'read-only')
+            self.assertEqual(save.call_count, 1)
+
+    def test_login_rotates_session_id_and_flash_survives(self):
+        """Test that logging in issues a new id, drops the old one and keeps flashed messages."""
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['note'] = 'before login'
+        before = self.cookie(client)
+        stored = len(self.interface.store)
+
+        with self.app.test_request_context():
+            response = client.post(url_for('auth.login'),
+                                   data={'email': 'sessions@example.com', 'password': 'password'},
+                                   follow_redirects=True)
+        self.assertIn(b'You have been logged in!', response.data)
+        self.assertNotEqual(self.cookie(client), before)
+        self.assertEqual(len(self.interface.store), stored)
+        # The old id was deleted when the new one was stored.
+        with client.session_transaction() as sess:
+            self.assertEqual(sess['note'], 'before login')
+            self.assertEqual(sess['_user_id'], str(self.user.id))
+
+    def test_sql_store_saves_loads_and_cleans_up_in_batches(self):
+        """Test the SQL backend, including batched deletion of expired sessions."""
+        store = SqlSessionStore()
+        future = _utcnow() + timedelta(days=1)
+        past = _utcnow() - timedelta(minutes=1)
+        store.save('live', b'jlive', future)
+        store.save('live', b'jupdated', future)
+        for i in range(5):
+            store.save(f'old-{i}', b'jold', past)
+
+        self.assertEqual(store.load('live')[0], b'jupdated')
+        self.assertIsNone(store.load('old-0'))
+        self.assertEqual(store.cleanup(batch_size=2), 5)
+        self.assertEqual(SessionRecord.query.count(), 1)
+
+        store.delete('live')
+        self.assertIsNone(store.load('live'))
+
+    def test_sql_backend_end_to_end(self):
+        """Test a request cycle with the SQL backend installed."""
+        original = self.app.session_interface
+        self.app.session_interface = ServerSessionInterface(SqlSessionStore())
+        try:
+            client = self.app.test_client()
+            with client.session_transaction() as sess:
+                sess['note'] = 'in sql'
+            self.assertEqual(SessionRecord.query.count(), 1)
+            with client.session_transaction() as sess:
+                self.assertEqual(sess['note'], 'in sql')
+                sess.clear()
+            self.assertEqual(SessionRecord.query.count(), 0)
+        finally:
+            self.app.session_interface = original
+
+    def test_sql_store_shares_the_request_connection(self):
+        """Test that the SQL store never checks out a second connection while the request holds one."""
+        store = SqlSessionStore()
+        checked_out = [0, 0]  # current, peak
+
+        def checkout(dbapi_connection, record, proxy):
+            checked_out[0] += 1
+            checked_out[1] = max(checked_out)
+
+        def checkin(dbapi_connection, record):
+            checked_out[0] -= 1
+
+        pool = db.engine.pool
+        event.listen(pool, 'checkout', checkout)
+        event.listen(pool, 'checkin', checkin)
+        try:
+            with self.app.test_request_context():
+                db.session.execute(select(User.id)).all()
+                # The request's ORM session now holds a connection, as it does mid-view.
+                self.assertIsNone(store.load('missing'))
+                store.save('shared', b'jshared', _utcnow() + timedelta(days=1))
+                self.assertEqual(store.load('shared')[0], b'jshared')
+                store.delete('shared')
+            self.assertEqual(checked_out[1], 1)
+        finally:
+            event.remove(pool, 'checkout', checkout)
+            event.remove(pool, 'checkin', checkin)
+
+    def test_memory_store_cleanup(self):
+        """Test that the in-memory store drops expired sessions."""
+        store = MemorySessionStore()
+        store.save('old', b'j{}', _utcnow() - timedelta(seconds=1))
+        store.save('live', b'j{}', _utcnow() + timedelta(days=1))
+        self.assertEqual(store.cleanup(), 1)
+        self.assertEqual(len(store), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
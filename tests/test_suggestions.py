@@ -0,0 +1,98 @@
+import unittest
+from flask import url_for
+from app import create_app, db, follows, suggestions
+from app.models import User, Follow, FollowSuggestion
+
+
+class SuggestionsTestCase(unittest.TestCase):
+    """Test cases for the precomputed follow suggestions."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a small follow graph: me -> friend -> {fof, other}, plus a stranger who shares my zone
+        password_hash = 'hashed_password'
+        cls.me = User(username='me', email='me@example.com', password_hash=password_hash,
+                      preferred_garden_type='Vegetable', preferred_planting_zone='7b')
+        cls.friend = User(username='friend', email='friend@example.com', password_hash=password_hash)
+        cls.fof = User(username='fof', email='fof@example.com', password_hash=password_hash,
+                       preferred_garden_type='vegetable ')
+        cls.other = User(username='other', email='other@example.com', password_hash=password_hash)
+        cls.neighbour = User(username='neighbour', email='neighbour@example.com', password_hash=password_hash,
+                             preferred_planting_zone='7B')
+        db.session.add_all([cls.me, cls.friend, cls.fof, cls.other, cls.neighbour])
+        db.session.commit()
+        cls.ids = {user.username: user.id for user in (cls.me, cls.friend, cls.fof, cls.other, cls.neighbour)}
+
+        # Log in as me
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.me.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Build the follow graph before each test."""
+        follows.follow(self.ids['me'], self.ids['friend'])
+        follows.follow(self.ids['friend'], self.ids['fof'])
+        follows.follow(self.ids['friend'], self.ids['other'])
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.rollback()
+        db.session.query(FollowSuggestion).delete()
+        db.session.query(Follow).delete()
+        db.session.query(User).update({'follower_count': 0, 'following_count': 0})
+        db.session.commit()
+
+    def suggested(self):
+        return [row.username for row in suggestions.suggestions_for(self.ids['me'], limit=10)]
+
+    def test_build_scores_mutuals_and_preferences(self):
+        """Test that the batch build ranks friends-of-friends with shared preferences first."""
+        self.assertEqual(suggestions.build_suggestions(shard_size=2), len(self.ids))
+        self.assertEqual(self.suggested(), ['fof', 'other', 'neighbour'])
+        # fof: 1 mutual + garden type; other: 1 mutual; neighbour: zone only. friend is already followed.
+
+    def test_follow_updates_suggestions_incrementally(self):
+        """Test that following someone adds the people they follow and removes them from the list."""
+        suggestions.build_suggestions()
+        follows.follow(self.ids['neighbour'], self.ids['fof'])
+        follows.follow(self.ids['me'], self.ids['neighbour'])
+        suggestions.on_follow(self.ids['me'], self.ids['neighbour'])
+        db.session.commit()
+
+        self.assertNotIn('neighbour', self.suggested())
+        row = db.session.get(FollowSuggestion, (self.ids['me'], self.ids['fof']))
+        self.assertEqual(row.mutual_count, 2)
+
+        follows.unfollow(self.ids['me'], self.ids['friend'])
+        suggestions.on_unfollow(self.ids['me'], self.ids['friend'])
+        db.session.commit()
+        db.session.expire_all()
+        self.assertEqual(db.session.get(FollowSuggestion, (self.ids['me'], self.ids['fof'])).mutual_count, 1)
+        self.assertNotIn('other', self.suggested())
+
+    def test_explore_shows_suggestions(self):
+        """Test that the explore page lists precomputed suggestions."""
+        suggestions.build_suggestions()
+        with self.app.test_request_context():
+            response = self.client.get(url_for('main.explore'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'People You May Know', response.data)
+        self.assertIn(b'fof', response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
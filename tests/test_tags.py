@@ -0,0 +1,135 @@
+import unittest
+from flask import url_for
+from app import create_app, db, tags
+from app.models import User, Post, Tag, PostTag
+
+
+class TagsTestCase(unittest.TestCase):
+    """Test cases for the normalized tag index and tag feeds."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a test user
+        cls.user = User(username='tagger', email='tagger@example.com', password_hash='hashed_password')
+        db.session.add(cls.user)
+        db.session.commit()
+
+        # Log in as the test user
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.user.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.query(PostTag).delete()
+        db.session.query(Tag).delete()
+        db.session.query(Post).delete()
+        db.session.commit()
+
+    def create_post(self, title, raw_tags):
+        """Create a tagged post the same way the routes do."""
+        post = Post(title=title, content='Tagged content', author_id=self.user.id)
+        db.session.add(post)
+        tags.set_post_tags(post, raw_tags)
+        db.session.commit()
+        return post
+
+    def counts(self):
+        return {tag.name: tag.post_count for tag in Tag.query}
+
+    def test_parse_tags_normalizes_input(self):
+        """Test that tags are split, lower-cased, cleaned and de-duplicated."""
+        self.assertEqual(tags.parse_tags('#Tomatoes, raised-beds  herbs,#tomatoes, !!'),
+                         ['tomatoes', 'raised-beds', 'herbs'])
+        self.assertEqual(tags.parse_tags(None), [])
+
+    def test_set_post_tags_writes_rows_and_counts(self):
+        """Test that tagging a post stores the normalized string, links and counts."""
+        post = self.create_post('Tomatoes', '#Tomatoes, Herbs')
+        self.assertEqual(post.tags, 'tomatoes herbs')
+        self.assertEqual(PostTag.query.filter_by(post_id=post.id).count(), 2)
+        self.assertEqual(self.counts(), {'tomatoes': 1, 'herbs': 1})
+
+    def test_retagging_only_adjusts_changed_tags(self):
+        """Test that updating tags adds and removes only the difference."""
+        post = self.create_post('Beds', 'herbs, soil')
+        self.create_post('Other', 'herbs')
+        tags.set_post_tags(post, 'soil compost')
+        db.session.commit()
+        self.assertEqual(self.counts(), {'herbs': 1, 'soil': 1, 'compost': 1})
+
+    def test_remove_post_decrements_counts(self):
+        """Test that deleting a post through the route untags it."""
+        post = self.create_post('Doomed', 'weeds')
+        with self.app.test_request_context():
+            self.client.post(url_for('post.delete_post', post_id=post.id))
+        self.assertEqual(self.counts(), {'weeds': 0})
+        self.assertEqual(PostTag.query.count(), 0)
+        self.assertEqual(tags.popular_tags(), [])
+
+    def test_tag_feed_pagination(self):
+        """Test that following the cursor walks the whole tag feed newest first."""
+        for i in range(5):
+            self.create_post(f'Bean {i}', 'beans')
+        self.create_post('Untagged', '')
+        tag = tags.get_tag('#Beans')
+        seen, cursor = [], None
+        while True:
+            posts, cursor = tags.tag_feed(tag.id, after=cursor, per_page=2)
+            seen.extend(post.title for post in posts)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f'Bean {i}' for i in reversed(range(5))])
+
+    def test_backfill_migrates_existing_strings(self):
+        """Test that the backfill builds post_tags from legacy tag strings and can be re-run."""
+        post = Post(title='Legacy', content='Old post', author_id=self.user.id, tags='Roses,  Pruning')
+        db.session.add(post)
+        db.session.commit()
+
+        self.assertEqual(tags.backfill_tags(batch_size=1), 1)
+        tags.backfill_tags(batch_size=1)
+        self.assertEqual(self.counts(), {'roses': 1, 'pruning': 1})
+        self.assertEqual(post.tags, 'roses pruning')
+
+        Tag.query.update({'post_count': 7})
+        db.session.commit()
+        tags.repair_tag_counts()
+        self.assertEqual(self.counts(), {'roses': 1, 'pruning': 1})
+
+    def test_create_post_route_tags_post(self):
+        """Test that the explore form parses tags on create."""
+        with self.app.test_request_context():
+            self.client.post(url_for('main.explore'),
+                             data={'title': 'Form Post', 'content': 'Body', 'tags': '#Seeds'})
+        post = Post.query.filter_by(title='Form Post').one()
+        self.assertEqual(post.tags, 'seeds')
+        self.assertEqual(self.counts(), {'seeds': 1})
+
+    def test_tag_page_renders_and_404s(self):
+        """Test the tag page shows tagged posts and unknown tags return 404."""
+        self.create_post('Rendered Tag Post', 'peppers')
+        with self.app.test_request_context():
+            response = self.client.get(url_for('main.tag_feed', name='peppers'))
+            missing = self.client.get(url_for('main.tag_feed', name='nothing'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Rendered Tag Post', response.data)
+        self.assertIn(b'#peppers', response.data)
+        self.assertEqual(missing.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
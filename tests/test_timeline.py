@@ -0,0 +1,123 @@
+import unittest
+from flask import url_for
+from app import create_app, db, timeline, follows
+from app.models import User, Post, Follow, TimelineEntry
+
+
+class TimelineTestCase(unittest.TestCase):
+    """Test cases for the fan-out-on-write following feed."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        cls.client = cls.app.test_client()
+        db.create_all()
+
+        # Create a reader and two authors
+        password_hash = 'hashed_password'
+        cls.reader = User(username='reader', email='reader@example.com', password_hash=password_hash)
+        cls.author = User(username='author', email='author@example.com', password_hash=password_hash)
+        cls.stranger = User(username='stranger', email='stranger@example.com', password_hash=password_hash)
+        db.session.add_all([cls.reader, cls.author, cls.stranger])
+        db.session.commit()
+
+        # Log in as the reader
+        with cls.client.session_transaction() as session:
+            session['_user_id'] = cls.reader.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Reader follows author before each test."""
+        follows.follow(self.reader.id, self.author.id)
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        self.app.config['TIMELINE_FANOUT_MAX_FOLLOWERS'] = 1000
+        db.session.query(TimelineEntry).delete()
+        db.session.query(Post).delete()
+        db.session.query(Follow).delete()
+        db.session.query(User).update({'follower_count': 0, 'following_count': 0})
+        db.session.commit()
+
+    def create_post(self, author, title):
+        """Create a post and fan it out the same way the routes do."""
+        post = Post(title=title, content='Timeline content', author_id=author.id)
+        db.session.add(post)
+        db.session.flush()
+        timeline.fan_out_post(post)
+        db.session.commit()
+        return post
+
+    def test_fan_out_writes_author_and_follower_entries(self):
+        """Test that a new post lands in the author's and each follower's timeline."""
+        post = self.create_post(self.author, 'Fanned Post')
+        owners = {entry.user_id for entry in TimelineEntry.query.filter_by(post_id=post.id)}
+        self.assertEqual(owners, {self.author.id, self.reader.id})
+
+    def test_following_feed_excludes_strangers(self):
+        """Test that the feed only contains posts from followed users."""
+        self.create_post(self.author, 'Followed Post')
+        self.create_post(self.stranger, 'Stranger Post')
+        posts, next_cursor = timeline.following_feed(self.reader.id)
+        self.assertEqual([post.title for post in posts], ['Followed Post'])
+        self.assertIsNone(next_cursor)
+
+    def test_fanout_on_read_for_popular_authors(self):
+        """Test that posts by authors above the threshold are merged in at read time."""
+        self.app.config['TIMELINE_FANOUT_MAX_FOLLOWERS'] = 0
+        post = self.create_post(self.author, 'Celebrity Post')
+        self.assertIsNone(TimelineEntry.query.filter_by(user_id=self.reader.id, post_id=post.id).first())
+        posts, _ = timeline.following_feed(self.reader.id)
+        self.assertEqual([p.title for p in posts], ['Celebrity Post'])
+
+    def test_following_feed_pagination(self):
+        """Test that following the cursor walks the whole feed without duplicates."""
+        for i in range(5):
+            self.create_post(self.author, f'Paged {i}')
+        seen, cursor = [], None
+        while True:
+            posts, cursor = timeline.following_feed(self.reader.id, after=cursor, per_page=2)
+            seen.extend(post.title for post in posts)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f'Paged {i}' for i in reversed(range(5))])
+
+    def test_delete_post_removes_timeline_entries(self):
+        """Test that deleting a post removes it from every timeline."""
+        post = self.create_post(self.reader, 'Own Post')
+        with self.app.test_request_context():
+            self.client.post(url_for('post.delete_post', post_id=post.id), follow_redirects=True)
+        self.assertEqual(TimelineEntry.query.filter_by(post_id=post.id).count(), 0)
+
+    def test_follow_and_unfollow_update_timeline(self):
+        """Test that following backfills recent posts and unfollowing removes them."""
+        self.create_post(self.stranger, 'Backfilled Post')
+        with self.app.test_request_context():
+            self.client.post(url_for('profile.toggle_follow', user_id=self.stranger.id))
+        self.assertEqual(TimelineEntry.query.filter_by(user_id=self.reader.id, author_id=self.stranger.id).count(), 1)
+
+        with self.app.test_request_context():
+            self.client.post(url_for('profile.toggle_follow', user_id=self.stranger.id))
+        self.assertEqual(TimelineEntry.query.filter_by(user_id=self.reader.id, author_id=self.stranger.id).count(), 0)
+
+    def test_following_page_renders(self):
+        """Test the following feed page loads with followed posts."""
+        self.create_post(self.author, 'Rendered Post')
+        with self.app.test_request_context():
+            response = self.client.get(url_for('main.following'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Rendered Post', response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
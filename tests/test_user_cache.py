@@ -0,0 +1,138 @@
+import unittest
+from unittest import mock
+from sqlalchemy import event
+from app import create_app, db, follows, user_cache
+from app.models import User, Post
+from app.user_cache import UserCache
+
+
+class UserCacheTestCase(unittest.TestCase):
+    """Test cases for the Flask-Login user cache."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up testing environment."""
+        cls.app = create_app('testing')
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.create_all()
+
+        # Create two users
+        password_hash = 'hashed_password'
+        cls.alice = User(username='alice', email='alice@example.com', password_hash=password_hash)
+        cls.bob = User(username='bob', email='bob@example.com', password_hash=password_hash)
+        db.session.add_all([cls.alice, cls.bob])
+        db.session.commit()
+        cls.alice_id, cls.bob_id = cls.alice.id, cls.bob.id
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Start each test with an empty cache and session."""
+        user_cache.get_cache().clear()
+        db.session.remove()
+
+    def tearDown(self):
+        """Clean up test data after each test."""
+        db.session.rollback()
+        follows.unfollow(self.alice_id, self.bob_id)
+        db.session.query(Post).delete()
+        db.session.query(User).filter_by(id=self.alice_id).update({'bio': None})
+        db.session.commit()
+
+    def new_request(self):
+        """Simulate a new request: a fresh session with an empty identity map."""
+        db.session.remove()
+
+    def count_queries(self, fn):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return result, statements
+
+    def test_second_load_hits_cache_without_queries(self):
+        """Test that a cached user is loaded with no SQL and counted as a hit."""
+        before = user_cache.get_cache().stats()
+        user_cache.load_user(self.alice_id)
+        self.new_request()
+        user, statements = self.count_queries(lambda: user_cache.load_user(self.alice_id))
+        self.assertEqual(statements, [])
+        self.assertEqual(user.username, 'alice')
+        after = user_cache.get_cache().stats()
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (1, 1))
+
+    def test_restored_user_is_a_normal_session_member(self):
+        """Test that a cached user compares equal to related rows and saves edits."""
+        db.session.add(Post(title='Mine', content='Body', author_id=self.alice_id))
+        db.session.commit()
+        user_cache.load_user(self.alice_id)
+        self.new_request()
+
+        user = user_cache.load_user(self.alice_id)
+        post = Post.query.filter_by(title='Mine').one()
+        self.assertIs(post.author, user)
+        self.assertEqual([p.title for p in user.posts], ['Mine'])
+
+        user.bio = 'Loves tomatoes'
+        db.session.commit()
+        self.new_request()
+        self.assertEqual(user_cache.load_user(self.alice_id).bio, 'Loves tomatoes')
+
+    def test_orm_change_invalidates_on_commit(self):
+        """Test that committing a change to a user drops them from the cache."""
+        user_cache.load_user(self.alice_id)
+        self.new_request()
+        user = db.session.get(User, self.alice_id)
+        user.bio = 'Changed'
+        db.session.flush()
+        self.assertEqual(len(user_cache.get_cache()), 1)
+        db.session.commit()
+        self.assertEqual(len(user_cache.get_cache()), 0)
+
+    def test_follow_counts_invalidate_both_users(self):
+        """Test that Core updates to the follow counters invalidate both users."""
+        user_cache.load_user(self.alice_id)
+        user_cache.load_user(self.bob_id)
+        follows.follow(self.alice_id, self.bob_id)
+        db.session.commit()
+        self.assertEqual(len(user_cache.get_cache()), 0)
+        self.new_request()
+        self.assertEqual(user_cache.load_user(self.bob_id).follower_count, 1)
+
+    def test_rollback_keeps_cached_entry(self):
+        """Test that a rolled-back change does not invalidate the cache."""
+        user_cache.load_user(self.alice_id)
+        follows.follow(self.alice_id, self.bob_id)
+        db.session.rollback()
+        self.assertEqual(len(user_cache.get_cache()), 1)
+
+    def test_lru_eviction_and_ttl(self):
+        """Test that the cache is bounded by size and entries expire."""
+        cache = UserCache(maxsize=2, ttl=60)
+        cache.put(1, {'id': 1})
+        cache.put(2, {'id': 2})
+        cache.get(1)
+        cache.put(3, {'id': 3})
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(1))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        with mock.patch('app.user_cache.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()['expired'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from app import create_app, db
-from app.models import User, Post, Comment, PostLike, CommentLike
-from app.utils import add_like, remove_like
+from app.models import User, Post, Comment, Reaction
+from app.utils import add_like, remove_like, get_reacted_ids, get_user_reactions
 
 
 class UtilFunctionsTestCase(unittest.TestCase):
@@ -36,54 +36,80 @@ class UtilFunctionsTestCase(unittest.TestCase):
         db.drop_all()
         cls.app_context.pop()
 
+    def count_likes(self, target_type):
+        """Count stored likes on targets of `target_type`."""
+        return Reaction.query.filter_by(target_type=target_type, kind=Reaction.LIKE).count()
+
     def test_add_like_to_post(self):
         """Test adding a like to a post."""
-        result = add_like(self.user, Post, PostLike, self.post.id)
-        self.assertEqual(PostLike.query.count(), 1, "PostLike count should be 1 after adding a like.")
+        result = add_like(self.user, Post, self.post.id)
+        self.assertEqual(self.count_likes(Reaction.POST), 1, "Post like count should be 1 after adding a like.")
+
+    def test_add_and_remove_like_update_cached_count(self):
+        """Test that add_like/remove_like keep Post.like_count in step."""
+        add_like(self.user, Post, self.post.id)
+        self.assertEqual(db.session.get(Post, self.post.id).like_count, 1)
+        remove_like(self.user, Post, self.post.id)
+        self.assertEqual(db.session.get(Post, self.post.id).like_count, 0)
 
     def test_add_duplicate_like_to_post(self):
         """Test adding a duplicate like to a post."""
-        add_like(self.user, Post, PostLike, self.post.id)  # Add first like
-        result = add_like(self.user, Post, PostLike, self.post.id)  # Try adding a duplicate
+        add_like(self.user, Post, self.post.id)  # Add first like
+        result = add_like(self.user, Post, self.post.id)  # Try adding a duplicate
         self.assertFalse(result, "Duplicate like should not be added.")
-        self.assertEqual(PostLike.query.count(), 1, "PostLike count should remain 1 after a duplicate like.")
+        self.assertEqual(self.count_likes(Reaction.POST), 1, "Post like count should remain 1 after a duplicate like.")
 
     def test_remove_like_from_post(self):
         """Test removing a like from a post."""
-        add_like(self.user, Post, PostLike, self.post.id)
-        result = remove_like(self.user, PostLike, self.post.id)
+        add_like(self.user, Post, self.post.id)
+        result = remove_like(self.user, Post, self.post.id)
         self.assertTrue(result, "Failed to remove like from post.")
-        self.assertEqual(PostLike.query.count(), 0, "PostLike count should be 0 after removing a like.")
+        self.assertEqual(self.count_likes(Reaction.POST), 0, "Post like count should be 0 after removing a like.")
 
     def test_remove_nonexistent_like_from_post(self):
         """Test removing a like that doesn't exist."""
-        result = remove_like(self.user, PostLike, self.post.id)
+        result = remove_like(self.user, Post, self.post.id)
         self.assertFalse(result, "Should return False when trying to remove a nonexistent like.")
-        self.assertEqual(PostLike.query.count(), 0, "PostLike count should remain 0 when no like exists.")
+        self.assertEqual(self.count_likes(Reaction.POST), 0, "Post like count should remain 0 when no like exists.")
 
     def test_add_like_to_comment(self):
         """Test adding a like to a comment."""
-        result = add_like(self.user, Comment, CommentLike, self.comment.id)
+        result = add_like(self.user, Comment, self.comment.id)
         self.assertTrue(result, "Failed to add like to comment.")
-        self.assertEqual(CommentLike.query.count(), 1, "CommentLike count should be 1 after adding a like.")
+        self.assertEqual(self.count_likes(Reaction.COMMENT), 1, "Comment like count should be 1 after adding a like.")
 
     def test_remove_like_from_comment(self):
         """Test removing a like from a comment."""
-        add_like(self.user, Comment, CommentLike, self.comment.id)
-        result = remove_like(self.user, CommentLike, self.comment.id)
+        add_like(self.user, Comment, self.comment.id)
+        result = remove_like(self.user, Comment, self.comment.id)
         self.assertTrue(result, "Failed to remove like from comment.")
-        self.assertEqual(CommentLike.query.count(), 0, "CommentLike count should be 0 after removing a like.")
+        self.assertEqual(self.count_likes(Reaction.COMMENT), 0, "Comment like count should be 0 after removing a like.")
+
+    def test_get_reacted_ids(self):
+        """Test the bulk 'reacted by me' lookup."""
+        add_like(self.user, Comment, self.comment.id)
+        self.assertEqual(get_reacted_ids(self.user.id, Comment, [self.comment.id, 999]), {self.comment.id})
+        self.assertEqual(get_reacted_ids(self.user.id + 1, Comment, [self.comment.id]), set())
+        self.assertEqual(get_reacted_ids(None, Comment, [self.comment.id]), set())
+        remove_like(self.user, Comment, self.comment.id)
+
+    def test_get_user_reactions_returns_kinds(self):
+        """Test that one lookup reports both likes and dislikes by target id."""
+        add_like(self.user, Post, self.post.id)
+        self.assertEqual(get_user_reactions(self.user.id, Post, [self.post.id, 999]), {self.post.id: Reaction.LIKE})
+        self.assertEqual(get_user_reactions(self.user.id, Comment, [self.post.id]), {})
+        remove_like(self.user, Post, self.post.id)
 
     def test_error_handling_in_add_like(self):
         """Test error handling in add_like (simulate exception)."""
         with self.app.app_context():
-            result = add_like(None, Post, PostLike, self.post.id)  # Passing None as user
+            result = add_like(None, Post, self.post.id)  # Passing None as user
         self.assertFalse(result, "add_like should return False when an exception occurs.")
 
     def test_error_handling_in_remove_like(self):
         """Test error handling in remove_like (simulate exception)."""
         with self.app.app_context():
-            result = remove_like(None, PostLike, self.post.id)  # Passing None as user
+            result = remove_like(None, Post, self.post.id)  # Passing None as user
         self.assertFalse(result, "remove_like should return False when an exception occurs.")
 
 